@@ -4,6 +4,7 @@ import tkinter.messagebox as messagebox
 from theme import create_styled_frame, create_styled_label, create_styled_button, create_styled_entry, COLORS, FONTS
 # Import data handling functions
 from data_handler import load_data, save_data, get_next_id # Import necessary data functions
+from cost_basis import refresh_cost_basis
 from datetime import datetime
 from ui_elements import show_error, show_success
 
@@ -41,6 +42,8 @@ class ExpensesBillsManager:
         print("[DEBUG] Saving expenses and bills data...")
         save_data('expenses', self.expenses)
         save_data('bills', self.bills)
+        # Bills with a product and quantity feed the per-product cost basis
+        refresh_cost_basis(self.bills)
         print("[DEBUG] Expenses and bills data saved")
 
     def create_expenses_bills_interface(self):
@@ -380,6 +383,7 @@ class ExpensesBillsManager:
             if supplier_names:
                 self.supplier_menu.set(supplier_names[0])
             self.supplier_menu.pack(fill='x', padx=20, pady=(0, 10))
+            self.bill_product_menu, self.bill_quantity_entry = self._create_bill_product_fields(form_frame)
 
         # Save button
         save_button = create_styled_button(
@@ -390,6 +394,51 @@ class ExpensesBillsManager:
         )
         save_button.pack(pady=20)
 
+    def _create_bill_product_fields(self, form_frame, entry=None):
+        """Add the optional purchased product and quantity fields to a bill form"""
+        products = load_data('products') or []
+        self.bill_no_product_label = "- / -"
+        self.bill_product_by_label = {f"{p.get('name', '')} #{p.get('id', '')}": p for p in products}
+
+        product_label = create_styled_label(form_frame, text=self.LANGUAGES[self.current_language].get("product", "Product / المنتج"), style='subheading')
+        product_label.pack(pady=(0, 5), padx=20, anchor='w')
+        product_menu = ctk.CTkOptionMenu(form_frame, values=[self.bill_no_product_label] + list(self.bill_product_by_label))
+        product_menu.set(self.bill_no_product_label)
+        if entry and entry.get('product_id') not in (None, ''):
+            for label, product in self.bill_product_by_label.items():
+                if str(product.get('id')) == str(entry.get('product_id')):
+                    product_menu.set(label)
+        product_menu.pack(fill='x', padx=20, pady=(0, 10))
+
+        quantity_label = create_styled_label(form_frame, text=self.LANGUAGES[self.current_language].get("quantity", "Quantity / الكمية"), style='subheading')
+        quantity_label.pack(pady=(0, 5), padx=20, anchor='w')
+        quantity_entry = create_styled_entry(form_frame)
+        if entry and entry.get('quantity') not in (None, ''):
+            quantity_entry.insert(0, str(entry.get('quantity')))
+        quantity_entry.pack(fill='x', padx=20, pady=(0, 10))
+        return product_menu, quantity_entry
+
+    def _read_bill_product_fields(self, product_menu, quantity_entry, entry_data):
+        """Copy the purchased product and quantity into a bill; returns False if the quantity is invalid"""
+        product = self.bill_product_by_label.get(product_menu.get())
+        quantity_text = quantity_entry.get().strip()
+        if product is None:
+            entry_data['product_id'] = ''
+            entry_data['product_name'] = ''
+            entry_data['quantity'] = ''
+            return True
+        try:
+            quantity = float(quantity_text)
+            if quantity <= 0:
+                raise ValueError
+        except ValueError:
+            show_error(self.LANGUAGES[self.current_language].get("invalid_value", "Invalid value entered"), self.current_language)
+            return False
+        entry_data['product_id'] = product.get('id', '')
+        entry_data['product_name'] = product.get('name', '')
+        entry_data['quantity'] = quantity
+        return True
+
     def _toggle_paid_amount_field(self):
         method = self.payment_method_menu.get()
         partial = self.LANGUAGES[self.current_language].get("partial", "Partial / جزئي")
@@ -437,6 +486,8 @@ class ExpensesBillsManager:
             else:
                 new_entry_data['supplier_id'] = ''
                 new_entry_data['supplier_name'] = ''
+            if not self._read_bill_product_fields(self.bill_product_menu, self.bill_quantity_entry, new_entry_data):
+                return
 
         # Basic validation (e.g., date format, amount is numeric)
         if not new_entry_data.get('date') or not new_entry_data.get('description') or not new_entry_data.get('amount'):
@@ -576,6 +627,7 @@ class ExpensesBillsManager:
             elif supplier_names:
                 self.edit_supplier_menu.set(supplier_names[0])
             self.edit_supplier_menu.pack(fill='x', padx=20, pady=(0, 10))
+            self.edit_bill_product_menu, self.edit_bill_quantity_entry = self._create_bill_product_fields(form_frame, entry)
 
         # Update button
         update_button = create_styled_button(
@@ -610,6 +662,9 @@ class ExpensesBillsManager:
             self.edit_remaining_value.pack_forget()
 
     def update_entry(self, dialog, original_entry):
+        if original_entry.get('type', '').lower() == 'bill' and self.edit_supplier_menu:
+            if not self._read_bill_product_fields(self.edit_bill_product_menu, self.edit_bill_quantity_entry, original_entry):
+                return
         for key, entry_widget in self.edit_entry_entries.items():
             original_entry[key] = entry_widget.get().strip()
         # Payment method
@@ -2,6 +2,15 @@ import customtkinter as ctk
 from tkinter import ttk, messagebox
 from ui_elements import show_error, show_success
 from data_handler import load_data, save_data, get_next_id, import_from_excel
+from sales_rollups import ensure_daily_rollups, record_sale_rollup
+from sales_cube import ensure_cube, record_sale_in_cube
+from basket_analysis import BasketIndex, ensure_baskets, record_sale_in_baskets
+from sales_heatmap import ensure_heatmap, record_sale_in_heatmap
+from stock_ledger import ensure_ledger, movement, record_movements, compact_if_needed
+from low_stock import low_stock_tracker
+from constants import DEFAULT_STORE
+from store_registry import store_registry
+from scanner_input import ScannerInput
 from theme import (
     COLORS, FONTS, create_styled_button,
     create_styled_entry, create_styled_frame,
@@ -22,6 +31,11 @@ class RecordSale:
         # Load products initially, but don't display until record_sale is called
         self.products = load_data("products") or []
         self.products = [p for p in self.products if p.get('status', 'Active') == 'Active']
+        self.customers = []
+        self.employees = []
+        self.basket_index = None
+        self.product_by_key = {}
+        self.product_by_barcode = {}
 
     def refresh_products(self):
         """Refresh the products list from database and update display"""
@@ -33,6 +47,12 @@ class RecordSale:
             print(f"[DEBUG] Loaded products: {all_products}")
             # Filter out deleted or inactive products
             self.products = [p for p in all_products if p.get('status', 'Active') == 'Active']
+            self.product_by_key = {
+                str(p.get('id')) if p.get('id') not in (None, '') else p.get('name', ''): p for p in self.products
+            }
+            self.product_by_barcode = {
+                str(p.get('barcode', '')).strip(): p for p in self.products if str(p.get('barcode', '')).strip()
+            }
             print(f"[DEBUG] Active products count: {len(self.products)}")
             print(f"[DEBUG] Active products: {self.products}")
             
@@ -165,6 +185,8 @@ class RecordSale:
                     self.subtotal_value.configure(text=f"${subtotal:.2f}")
                 if hasattr(self, 'total_value') and self.total_value.winfo_exists():
                     self.total_value.configure(text=f"${total:.2f}")
+
+                self.update_suggestions()
                     
         except Exception as e:
             show_error(f"Error updating cart display: {str(e)}", self.current_language)
@@ -230,7 +252,7 @@ class RecordSale:
             placeholder_text=barcode_label_text
         )
         self.barcode_entry.pack(side='left', padx=10, pady=10, fill='x', expand=True)
-        self.barcode_entry.bind('<Return>', self.handle_barcode_entry)
+        self.scanner = ScannerInput(self.barcode_entry, self.handle_scanned_codes)
         
         # Search section
         search_frame = create_styled_frame(left_frame, style='card')
@@ -264,6 +286,11 @@ class RecordSale:
         self.cart_frame = ctk.CTkScrollableFrame(right_frame, orientation='vertical')
         self.cart_frame.pack(fill='both', expand=True, padx=20, pady=(0, 20))
         
+        # Add-on suggestions for what is in the cart
+        self.basket_index = BasketIndex.load()
+        self.suggestions_frame = create_styled_frame(right_frame, style='card')
+        self.suggestions_frame.pack(fill='x', padx=20, pady=(0, 20))
+
         # Initial display of cart items - now happens after frame creation
         self.update_cart_display()
         
@@ -301,6 +328,68 @@ class RecordSale:
         )
         self.total_value.pack(side='right', padx=20, pady=20)
         
+        # Customer selection (walk-in sales have no customer)
+        customer_frame = create_styled_frame(right_frame, style='card')
+        customer_frame.pack(fill='x', padx=20, pady=(0, 20))
+
+        customer_label = create_styled_label(
+            customer_frame,
+            text=self.LANGUAGES[self.current_language].get("customer_name", "Customer Name"),
+            style='subheading'
+        )
+        customer_label.pack(side='left', padx=20, pady=20)
+
+        self.customers = load_data("customers") or []
+        self.walk_in_label = "Walk-in / زبون عابر" if self.current_language == 'en' else "زبون عابر / Walk-in"
+        self.customer_by_label = {
+            f"{customer.get('name', '')} #{customer.get('id', '')}": customer for customer in self.customers
+        }
+        self.customer_menu = ctk.CTkOptionMenu(
+            customer_frame,
+            values=[self.walk_in_label] + list(self.customer_by_label)
+        )
+        self.customer_menu.set(self.walk_in_label)
+        self.customer_menu.pack(side='right', padx=20, pady=20)
+
+        # Employee making the sale
+        employee_frame = create_styled_frame(right_frame, style='card')
+        employee_frame.pack(fill='x', padx=20, pady=(0, 20))
+
+        employee_label = create_styled_label(
+            employee_frame,
+            text=self.LANGUAGES[self.current_language].get("employee", "Employee"),
+            style='subheading'
+        )
+        employee_label.pack(side='left', padx=20, pady=20)
+
+        self.employees = load_data("employees") or []
+        self.no_employee_label = "- / -"
+        self.employee_by_label = {
+            f"{employee.get('name', '')} #{employee.get('id', '')}": employee for employee in self.employees
+        }
+        self.employee_menu = ctk.CTkOptionMenu(
+            employee_frame,
+            values=[self.no_employee_label] + list(self.employee_by_label)
+        )
+        self.employee_menu.set(self.no_employee_label)
+        self.employee_menu.pack(side='right', padx=20, pady=20)
+
+        # Store the sale is made in
+        store_frame = create_styled_frame(right_frame, style='card')
+        store_frame.pack(fill='x', padx=20, pady=(0, 20))
+
+        store_label = create_styled_label(
+            store_frame,
+            text="Store / المخزن" if self.current_language == 'en' else "المخزن / Store",
+            style='subheading'
+        )
+        store_label.pack(side='left', padx=20, pady=20)
+
+        store_names = store_registry.names()
+        self.store_menu = ctk.CTkOptionMenu(store_frame, values=store_names)
+        self.store_menu.set(store_names[0])
+        self.store_menu.pack(side='right', padx=20, pady=20)
+
         # Checkout button
         checkout_button = create_styled_button(
             right_frame,
@@ -310,23 +399,62 @@ class RecordSale:
         )
         checkout_button.pack(pady=20)
 
-    def add_to_cart(self, product):
+    def update_suggestions(self):
+        """Show the products most often bought together with the cart contents"""
+        if not hasattr(self, 'suggestions_frame') or not self.suggestions_frame.winfo_exists():
+            return
+        for widget in self.suggestions_frame.winfo_children():
+            widget.destroy()
+        if self.basket_index is None or not self.cart:
+            return
+
+        in_cart = {str(item['product'].get('id')) for item in self.cart}
+        suggestions = {}
+        for item in self.cart:
+            for companion, name, lift, confidence in self.basket_index.top_companions(item['product'].get('id')):
+                product = self.product_by_key.get(companion)
+                if product is None or companion in in_cart:
+                    continue
+                if companion not in suggestions or lift > suggestions[companion][1]:
+                    suggestions[companion] = (product, lift, confidence)
+        if not suggestions:
+            return
+
+        suggestions_label = create_styled_label(
+            self.suggestions_frame,
+            text="Often bought with / يشترى عادة مع" if self.current_language == 'en' else "يشترى عادة مع / Often bought with",
+            style='body'
+        )
+        suggestions_label.pack(side='left', padx=10, pady=10)
+        ranked = sorted(suggestions.values(), key=lambda suggestion: suggestion[1], reverse=True)
+        for product, lift, confidence in ranked[:3]:
+            suggestion_button = create_styled_button(
+                self.suggestions_frame,
+                text=f"+ {product.get('name', '')} ({confidence:.0%})",
+                style='outline',
+                command=lambda p=product: self.add_to_cart(p)
+            )
+            suggestion_button.pack(side='left', padx=5, pady=10)
+
+    def add_to_cart(self, product, quantity=1, update_display=True):
         """Add a product to the cart"""
         try:
             # Check if product is already in cart
             for item in self.cart:
                 # Ensure 'id' exists in product dictionary
                 if item['product'].get('id') == product.get('id'):
-                    item['quantity'] += 1
-                    self.update_cart_display()
+                    item['quantity'] += quantity
+                    if update_display:
+                        self.update_cart_display()
                     return
 
             # Add new item to cart
             self.cart.append({
                 'product': product,
-                'quantity': 1
+                'quantity': quantity
             })
-            self.update_cart_display()
+            if update_display:
+                self.update_cart_display()
         except Exception as e:
             show_error(f"Error adding to cart: {str(e)}", self.current_language)
 
@@ -346,17 +474,38 @@ class RecordSale:
                 return
 
             # Create sale record
+            customer = self.customer_by_label.get(self.customer_menu.get()) if hasattr(self, 'customer_menu') else None
+            # The employee stays selected between sales
+            employee = self.employee_by_label.get(self.employee_menu.get()) if hasattr(self, 'employee_menu') else None
             sale = {
                 'id': get_next_id('sales'),
                 'items': self.cart,
                 'total': sum(float(item['product'].get('price', 0)) * item['quantity'] for item in self.cart),
-                'date': str(datetime.now())
+                'date': str(datetime.now()),
+                'customer_id': customer.get('id') if customer else None,
+                'customer': customer.get('name', '') if customer else '',
+                'employee_id': employee.get('id') if employee else None,
+                'employee': employee.get('name', '') if employee else '',
+                'store': self.store_menu.get() if hasattr(self, 'store_menu') else DEFAULT_STORE
             }
             
+            # Build the rollups and cube from history before the first incremental update
+            ensure_daily_rollups()
+            ensure_cube()
+            ensure_baskets()
+            ensure_heatmap()
+            ensure_ledger()
+
             # Save sale
             sales = load_data("sales") or []
             sales.append(sale)
             save_data("sales", sales)
+            record_sale_rollup(sale)
+            record_sale_in_cube(sale)
+            record_sale_in_baskets(sale)
+            record_sale_in_heatmap(sale)
+            if self.basket_index is not None:
+                self.basket_index.add_sale(sale)
             
             # Update inventory - ensure quantity is a number before subtracting
             inventory_updated = False
@@ -370,6 +519,7 @@ class RecordSale:
                          current_quantity = product.get('quantity', 0)
                          if isinstance(current_quantity, (int, float)):
                             product['quantity'] = current_quantity - item['quantity']
+                            low_stock_tracker.update('products', product)
                             inventory_updated = True
                             break
                          else:
@@ -379,29 +529,33 @@ class RecordSale:
 
             if inventory_updated:
                  save_data("products", products_to_update) # Save the updated products list back to database
+            record_movements([
+                movement('products', item['product'].get('id'), 'sale', -item['quantity'], f"sale:{sale['id']}", sale['store'])
+                for item in self.cart
+            ])
+            compact_if_needed()
 
             # Clear cart and show success message
             self.cart = []
             self.update_cart_display()
+            if hasattr(self, 'customer_menu'):
+                self.customer_menu.set(self.walk_in_label)
             show_success(self.LANGUAGES[self.current_language].get("sale_recorded", "Sale recorded successfully"), self.current_language)
 
         except Exception as e:
             show_error(f"Error processing checkout: {str(e)}", self.current_language)
 
-    def handle_barcode_entry(self, event=None):
-        """Handle barcode entry and add product to cart if found"""
-        barcode = self.barcode_entry.get().strip()
-        if not barcode:
-            return
-        # ابحث عن المنتج بالباركود
-        found_product = None
-        for product in self.products:
-            if str(product.get('barcode', '')).strip() == barcode:
-                found_product = product
-                break
-        if found_product:
-            self.add_to_cart(found_product)
-            self.barcode_entry.delete(0, 'end')
-        else:
-            show_error(self.LANGUAGES[self.current_language].get("product_not_found", "Product not found"), self.current_language)
-            self.barcode_entry.delete(0, 'end')
+    def handle_scanned_codes(self, codes):
+        """Add a batch of scanned (barcode, count) pairs to the cart with a single display update"""
+        not_found = []
+        for barcode, count in codes:
+            # ابحث عن المنتج بالباركود
+            product = self.product_by_barcode.get(barcode)
+            if product is not None:
+                self.add_to_cart(product, count, update_display=False)
+            else:
+                not_found.append(barcode)
+        if len(not_found) < len(codes):
+            self.update_cart_display()
+        if not_found:
+            show_error(f"{self.LANGUAGES[self.current_language].get('product_not_found', 'Product not found')}: {', '.join(not_found)}", self.current_language)
@@ -1,4 +1,21 @@
 from data_handler import load_data
+from sales_cube import ensure_cube, query_cube
+from sales_utils import get_preset_range
+
+# Words in a question that select a sales cube dimension
+DIMENSION_WORDS = {
+    "store": "store",
+    "branch": "store",
+    "location": "store",
+    "product": "product",
+    "flavor": "flavor",
+    "category": "category",
+    "type": "category",
+    "employee": "employee",
+    "worker": "employee",
+    "month": "month",
+    "day": "day"
+}
 
 class AIModel:
     def __init__(self):
@@ -15,7 +32,10 @@ class AIModel:
         products = load_data("products")
         suppliers = load_data("suppliers")
         employees = load_data("employees")
-        sales = load_data("sales")
+
+        # Grouped sales questions are answered from the sales cube
+        if any(keyword in query_lower for keyword in ["sales", "revenue"]) and " by " in query_lower:
+            return self.answer_sales_breakdown(query_lower, products or [])
 
         # Search products by name or kind
         if any(keyword in query_lower for keyword in ["product", "products", "hookah", "flavor", "type", "kind"]):
@@ -63,9 +83,51 @@ class AIModel:
 
         # Sales info
         elif "sales" in query_lower:
+            sales = load_data("sales")
             if not sales:
                 return "No sales records found in the database."
             return f"There are {len(sales)} sales records in the database."
 
         else:
             return "Sorry, I did not understand your query. Please ask about products, suppliers, employees, or sales."
+
+    def answer_sales_breakdown(self, query_lower, products):
+        """Answer questions like "mint sales by store last month" with grouped cube totals"""
+        subject, grouping = query_lower.split(" by ", 1)
+        start_date, end_date = None, None
+        for preset in ["today", "this week", "this month", "last month"]:
+            if preset in query_lower:
+                start_date, end_date = get_preset_range(preset.replace(" ", "_"))
+                # "last month" is the period, not a request to group by month
+                grouping = grouping.replace(preset, " ")
+                break
+
+        group_by = []
+        for token in grouping.split():
+            for word, dimension in DIMENSION_WORDS.items():
+                if token.startswith(word) and dimension not in group_by:
+                    group_by.append(dimension)
+        if not group_by:
+            group_by = ["product"]
+
+        # Flavors and product names mentioned before "by" become filters
+        subject_words = subject.split()
+        filters = {}
+        flavors = {p.get("flavor", "") for p in products if p.get("flavor")}
+        matched_flavors = [flavor for flavor in flavors if flavor.lower() in subject_words]
+        if matched_flavors:
+            filters["flavor"] = matched_flavors
+        matched_products = [p.get("name") for p in products if p.get("name") and p.get("name").lower() in subject]
+        if matched_products:
+            filters["product"] = matched_products
+
+        ensure_cube()
+        rows = query_cube(group_by, filters, start_date, end_date, limit=10)
+        if not rows:
+            return "No sales found for that question."
+
+        lines = [f"Sales by {', '.join(group_by)}" + (f" ({start_date} - {end_date})" if start_date else "") + ":"]
+        for row in rows:
+            group_text = " / ".join(str(row.get(dimension) or "-") for dimension in group_by)
+            lines.append(f"{group_text}: ${row['revenue']:.2f} ({row['quantity']} items)")
+        return "\n".join(lines)
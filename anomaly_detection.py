@@ -0,0 +1,164 @@
+import numpy as np
+from datetime import date, datetime, timedelta
+from data_handler import load_data, save_data, load_data_in_range
+from sales_rollups import ensure_daily_rollups, load_daily_rollups
+from sales_cube import ensure_cube, load_product_day_matrix
+
+ROLLING_WINDOW = 28  # Days in the rolling baseline
+WEEKDAY_WEEKS = 8  # Same-weekday history in the seasonal baseline
+HISTORY_DAYS = max(ROLLING_WINDOW, WEEKDAY_WEEKS * 7)
+MIN_HISTORY_DAYS = 14
+MIN_WEEKDAY_SAMPLES = 2
+Z_THRESHOLD = 3.0  # Deviation from the weekday baseline
+ROLLING_Z_THRESHOLD = 2.0  # Deviation from the rolling baseline
+STD_FLOOR_RATIO = 0.1  # Near-constant series still need a 10% move to count
+MIN_PRODUCT_DAILY_QUANTITY = 1.0
+BACKFILL_DAYS = 30  # Days scanned on the very first run
+ANOMALY_RETENTION_DAYS = 90
+
+def trailing_stats(matrix, window):
+    """Mean, std and sample count of the previous `window` days (excluding the day itself) along the last axis"""
+    matrix = np.asarray(matrix, dtype=float)
+    days = matrix.shape[-1]
+    zeros = np.zeros(matrix.shape[:-1] + (1,))
+    cumulative = np.concatenate([zeros, np.cumsum(matrix, axis=-1)], axis=-1)
+    cumulative_sq = np.concatenate([zeros, np.cumsum(matrix ** 2, axis=-1)], axis=-1)
+    upper = np.arange(days)
+    lower = np.maximum(0, upper - window)
+    count = upper - lower
+    divisor = np.maximum(count, 1)
+    mean = (cumulative[..., upper] - cumulative[..., lower]) / divisor
+    variance = (cumulative_sq[..., upper] - cumulative_sq[..., lower]) / divisor - mean ** 2
+    return mean, np.sqrt(np.maximum(variance, 0.0)), np.broadcast_to(count, matrix.shape)
+
+def weekday_stats(matrix, weeks):
+    """Mean, std and sample count of the same weekday over the previous `weeks` weeks"""
+    matrix = np.asarray(matrix, dtype=float)
+    days = matrix.shape[-1]
+    lagged = np.zeros((weeks,) + matrix.shape)
+    valid = np.zeros((weeks,) + matrix.shape, dtype=bool)
+    for week in range(1, weeks + 1):
+        lag = 7 * week
+        if lag >= days:
+            break
+        lagged[week - 1, ..., lag:] = matrix[..., :days - lag]
+        valid[week - 1, ..., lag:] = True
+    count = valid.sum(axis=0)
+    divisor = np.maximum(count, 1)
+    mean = lagged.sum(axis=0) / divisor
+    variance = (((lagged - mean) ** 2) * valid).sum(axis=0) / divisor
+    return mean, np.sqrt(variance), count
+
+def score_series(matrix, min_std=1.0):
+    """Score every day of one or more daily series against its rolling and weekday baselines.
+
+    A day is flagged when it is far from the same weekday's history and also
+    away from the recent rolling average, so ordinary weekend peaks do not fire.
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+    rolling_mean, rolling_std, rolling_count = trailing_stats(matrix, ROLLING_WINDOW)
+    weekday_mean, weekday_std, weekday_count = weekday_stats(matrix, WEEKDAY_WEEKS)
+    rolling_z = (matrix - rolling_mean) / np.maximum(rolling_std, np.maximum(STD_FLOOR_RATIO * rolling_mean, min_std))
+    weekday_z = (matrix - weekday_mean) / np.maximum(weekday_std, np.maximum(STD_FLOOR_RATIO * weekday_mean, min_std))
+    flagged = (
+        (rolling_count >= MIN_HISTORY_DAYS)
+        & (weekday_count >= MIN_WEEKDAY_SAMPLES)
+        & (np.abs(weekday_z) >= Z_THRESHOLD)
+        & (np.abs(rolling_z) >= ROLLING_Z_THRESHOLD)
+    )
+    return {
+        'flagged': flagged,
+        'expected': weekday_mean,
+        'rolling_mean': rolling_mean,
+        'weekday_z': weekday_z,
+        'rolling_z': rolling_z
+    }
+
+def _day_offsets(days, first_ordinal):
+    return np.asarray([datetime.strptime(day, '%Y-%m-%d').toordinal() for day in days], dtype=np.int64) - first_ordinal
+
+def _anomaly(day_ordinal, kind, value, scores, row, column, product_id='', product=''):
+    weekday_z = float(scores['weekday_z'][row, column])
+    return {
+        'day': date.fromordinal(day_ordinal).strftime('%Y-%m-%d'),
+        'kind': kind,
+        'product_id': product_id,
+        'product': product,
+        'value': round(float(value), 2),
+        'expected': round(float(scores['expected'][row, column]), 2),
+        'z_score': round(weekday_z, 2),
+        'direction': 'spike' if weekday_z > 0 else 'drop'
+    }
+
+def find_anomalies(start_date, end_date, scan_from):
+    """Detect revenue and per-product quantity anomalies on the days from scan_from to end_date.
+
+    start_date..end_date is the history the baselines are computed from.
+    """
+    first = start_date.toordinal()
+    length = end_date.toordinal() - first + 1
+    scan_offset = scan_from.toordinal() - first
+    anomalies = []
+
+    # Daily revenue from the (day, employee) rollups
+    rollups = load_daily_rollups(start_date, end_date)
+    if rollups:
+        offsets = _day_offsets([rollup['day'] for rollup in rollups], first)
+        revenue = np.bincount(offsets, weights=[float(rollup.get('revenue', 0)) for rollup in rollups], minlength=length)
+        # Baselines start on the first day with sales, not before the shop opened
+        opened = int(np.flatnonzero(revenue)[0]) if revenue.any() else length
+        series = revenue[opened:]
+        scores = score_series(series)
+        for column in np.flatnonzero(scores['flagged'][0]):
+            if column + opened >= scan_offset:
+                anomalies.append(_anomaly(first + opened + int(column), 'revenue', series[column], scores, 0, column))
+
+    # Daily quantity per product from the sales cube
+    product_ids, names, quantities = load_product_day_matrix(start_date, end_date)
+    if product_ids:
+        scores = score_series(quantities)
+        flagged = scores['flagged'] & (scores['rolling_mean'] >= MIN_PRODUCT_DAILY_QUANTITY)
+        flagged[:, :scan_offset] = False
+        for row, column in zip(*np.nonzero(flagged)):
+            product_id = product_ids[row]
+            anomalies.append(_anomaly(
+                first + int(column), 'product', quantities[row, column], scores, row, column,
+                product_id=product_id, product=names[product_id]
+            ))
+
+    anomalies.sort(key=lambda anomaly: (anomaly['day'], -abs(anomaly['z_score'])))
+    return anomalies
+
+def detect_anomalies(today=None):
+    """Scan the complete days since the last run and persist any new anomalies.
+
+    Today is never scanned because a half-finished day looks like a drop.
+    Returns the newly found anomalies.
+    """
+    today = today or date.today()
+    last_complete = today - timedelta(days=1)
+    state = (load_data('anomaly_state') or [{}])[0]
+    if state.get('last_day'):
+        scan_from = datetime.strptime(state['last_day'], '%Y-%m-%d').date() + timedelta(days=1)
+    else:
+        scan_from = last_complete - timedelta(days=BACKFILL_DAYS - 1)
+    if scan_from > last_complete:
+        return []
+
+    ensure_daily_rollups()
+    ensure_cube()
+    found = find_anomalies(scan_from - timedelta(days=HISTORY_DAYS), last_complete, scan_from)
+
+    # Keep recent findings from earlier runs and drop anything being rescanned
+    cutoff = (today - timedelta(days=ANOMALY_RETENTION_DAYS)).strftime('%Y-%m-%d')
+    scan_from_text = scan_from.strftime('%Y-%m-%d')
+    kept = [anomaly for anomaly in (load_data('sales_anomalies') or []) if cutoff <= anomaly.get('day', '') < scan_from_text]
+    save_data('sales_anomalies', kept + found)
+    save_data('anomaly_state', [{'last_day': last_complete.strftime('%Y-%m-%d')}])
+    print(f"[DEBUG] Scanned {scan_from} - {last_complete} for sales anomalies: {len(found)} found")
+    return found
+
+def load_recent_anomalies(days=7, today=None):
+    """Load the persisted anomalies of the last `days` days using the day index"""
+    today = today or date.today()
+    return load_data_in_range('sales_anomalies', today - timedelta(days=days), today, date_field='day')
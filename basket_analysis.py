@@ -0,0 +1,132 @@
+from collections import defaultdict
+from itertools import combinations
+from constants import MONGODB_COLLECTIONS
+from data_handler import load_data, save_data, increment_documents, get_collection
+from sales_utils import iter_sale_items
+
+PAIRS_COLLECTION = MONGODB_COLLECTIONS["basket_pairs"]
+ITEMS_COLLECTION = MONGODB_COLLECTIONS["basket_items"]
+ALL_BASKETS = "__all__"  # basket_items key holding the total ticket count
+MIN_PAIR_COUNT = 2  # Pairs seen fewer times are noise
+COMPANION_COUNT = 5
+
+def basket_products(sale):
+    """Return {product_key: name} for the distinct products on a ticket"""
+    products = {}
+    for product_id, name, category, price, quantity in iter_sale_items(sale):
+        product_key = str(product_id) if product_id not in (None, '') else name
+        products[product_key] = name
+    return products
+
+def basket_updates(sale):
+    """Return the (key, increments, labels) counter updates one ticket adds"""
+    products = basket_products(sale)
+    if not products:
+        return [], []
+    item_updates = [({'product_id': ALL_BASKETS}, {'baskets': 1}, None)]
+    item_updates += [({'product_id': key}, {'baskets': 1}, {'product': name}) for key, name in products.items()]
+    # Pairs are stored once, with product_a < product_b
+    pair_updates = [
+        ({'product_a': a, 'product_b': b}, {'count': 1}, None)
+        for a, b in combinations(sorted(products), 2)
+    ]
+    return item_updates, pair_updates
+
+def record_sale_in_baskets(sale):
+    """Add one ticket to the pair counts without touching the sales history"""
+    item_updates, pair_updates = basket_updates(sale)
+    return increment_documents(ITEMS_COLLECTION, item_updates) and increment_documents(PAIRS_COLLECTION, pair_updates)
+
+def rebuild_baskets(sales=None):
+    """Recompute the pair counts from the sales history"""
+    if sales is None:
+        sales = load_data('sales') or []
+    items = {}
+    pairs = defaultdict(int)
+    for sale in sales:
+        item_updates, pair_updates = basket_updates(sale)
+        for key, increments, labels in item_updates:
+            item = items.setdefault(key['product_id'], dict(key, baskets=0))
+            item['baskets'] += 1
+            item.update(labels or {})
+        for key, increments, labels in pair_updates:
+            pairs[(key['product_a'], key['product_b'])] += 1
+    save_data('basket_items', list(items.values()))
+    save_data('basket_pairs', [{'product_a': a, 'product_b': b, 'count': count} for (a, b), count in pairs.items()])
+    print(f"[DEBUG] Rebuilt basket counts: {len(items) - 1} products, {len(pairs)} pairs")
+
+def ensure_baskets():
+    """Build the pair counts from history the first time they are needed"""
+    collection = get_collection(ITEMS_COLLECTION)
+    if collection is not None and collection.find_one({}, {'_id': 1}) is None:
+        rebuild_baskets()
+
+class BasketIndex:
+    """In-memory pair counts with support/lift scores and cached companion lookups"""
+    def __init__(self, min_pair_count=MIN_PAIR_COUNT, companion_count=COMPANION_COUNT):
+        self.min_pair_count = min_pair_count
+        self.companion_count = companion_count
+        self.baskets = 0
+        self.product_counts = {}
+        self.names = {}
+        self.pair_counts = defaultdict(dict)  # product -> {companion: tickets with both}
+        self.companions = {}  # product -> ranked companions, filled on first lookup
+
+    @classmethod
+    def load(cls):
+        """Load the persisted counts (builds them from history on first use)"""
+        ensure_baskets()
+        index = cls()
+        for item in load_data('basket_items') or []:
+            if item.get('product_id') == ALL_BASKETS:
+                index.baskets = int(item.get('baskets', 0))
+            else:
+                index.product_counts[str(item.get('product_id'))] = int(item.get('baskets', 0))
+                index.names[str(item.get('product_id'))] = item.get('product', '')
+        for pair in load_data('basket_pairs') or []:
+            a, b, count = str(pair.get('product_a')), str(pair.get('product_b')), int(pair.get('count', 0))
+            index.pair_counts[a][b] = count
+            index.pair_counts[b][a] = count
+        print(f"[DEBUG] Loaded basket index: {index.baskets} baskets, {len(index.product_counts)} products")
+        return index
+
+    def add_sale(self, sale):
+        """Fold a new ticket into the in-memory counts"""
+        products = basket_products(sale)
+        if not products:
+            return
+        self.baskets += 1
+        for key, name in products.items():
+            self.product_counts[key] = self.product_counts.get(key, 0) + 1
+            self.names[key] = name
+            self.companions.pop(key, None)
+        for a, b in combinations(products, 2):
+            self.pair_counts[a][b] = self.pair_counts[a].get(b, 0) + 1
+            self.pair_counts[b][a] = self.pair_counts[b].get(a, 0) + 1
+
+    def support(self, a, b):
+        """Share of all tickets containing both products"""
+        return self.pair_counts.get(a, {}).get(b, 0) / self.baskets if self.baskets else 0.0
+
+    def lift(self, a, b):
+        """How much more often the products sell together than if they were independent"""
+        count_a = self.product_counts.get(a, 0)
+        count_b = self.product_counts.get(b, 0)
+        if not count_a or not count_b:
+            return 0.0
+        return self.pair_counts.get(a, {}).get(b, 0) * self.baskets / (count_a * count_b)
+
+    def top_companions(self, product_key):
+        """Return [(companion_key, name, lift, confidence)] ranked by lift, cached per product"""
+        product_key = str(product_key)
+        cached = self.companions.get(product_key)
+        if cached is None:
+            product_count = self.product_counts.get(product_key, 0)
+            ranked = []
+            for companion, count in self.pair_counts.get(product_key, {}).items():
+                lift = self.lift(product_key, companion)
+                if count >= self.min_pair_count and lift > 1.0:
+                    ranked.append((companion, self.names.get(companion, companion), round(lift, 2), round(count / product_count, 2)))
+            ranked.sort(key=lambda companion: (companion[2], companion[3]), reverse=True)
+            cached = self.companions[product_key] = ranked[:self.companion_count]
+        return cached
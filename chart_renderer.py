@@ -0,0 +1,141 @@
+import os
+import hashlib
+import threading
+import numpy as np
+from datetime import date
+
+try:
+    # Figure + FigureCanvasAgg render off-screen with the Agg backend, without pyplot's global state
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    MATPLOTLIB_AVAILABLE = True
+except ImportError:
+    MATPLOTLIB_AVAILABLE = False
+    print("[WARNING] matplotlib is not installed; analytics charts are disabled")
+
+def lttb_downsample(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of a series to at most threshold points"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.size
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < edges.size:
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = n - 1, n
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        # Keep the point forming the largest triangle with the previous pick and the next bucket's average
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return x[selected], y[selected]
+
+def draw_time_series(axes, width, day_ordinals, series, title, colors):
+    """Plot (label, values) series over days, downsampled to the chart's pixel width"""
+    for index, (label, values) in enumerate(series):
+        x, y = lttb_downsample(day_ordinals, values, max(3, int(width)))
+        days = [date.fromordinal(int(ordinal)) for ordinal in x]
+        axes.plot(days, y, label=label, color=colors['lines'][index % len(colors['lines'])], linewidth=1.2)
+    axes.set_title(title, color=colors['text'])
+    if len(series) > 1:
+        axes.legend(loc='upper left', fontsize='small')
+    axes.figure.autofmt_xdate()
+
+def draw_bar_chart(axes, labels, values, title, colors):
+    """Plot a horizontal bar chart with the largest value on top"""
+    positions = np.arange(len(labels))
+    axes.barh(positions, values, color=colors['lines'][0])
+    axes.set_yticks(positions)
+    axes.set_yticklabels(labels, fontsize='small')
+    axes.invert_yaxis()
+    axes.set_title(title, color=colors['text'])
+
+def draw_heatmap(axes, matrix, row_labels, column_labels, title, colors):
+    """Plot a matrix as a colour-scaled grid with labelled rows and columns"""
+    image = axes.imshow(matrix, aspect='auto', cmap='YlOrRd', interpolation='nearest')
+    axes.set_yticks(np.arange(len(row_labels)))
+    axes.set_yticklabels(row_labels, fontsize='small')
+    axes.set_xticks(np.arange(len(column_labels)))
+    axes.set_xticklabels(column_labels, fontsize='small')
+    axes.set_title(title, color=colors['text'])
+    colorbar = axes.figure.colorbar(image, ax=axes)
+    colorbar.ax.tick_params(colors=colors['text'])
+
+class ChartRenderer:
+    """Renders report charts to PNG files and keeps them in a small disk cache.
+
+    Charts are keyed by the caller's key (report type, parameters and data
+    versions) plus the pixel size, so a chart for unchanged data is only drawn
+    once and later visits load the stored PNG. Rendering is safe to run on the
+    report worker thread.
+    """
+    def __init__(self, cache_dir, max_files=50, dpi=100):
+        self.cache_dir = cache_dir
+        self.max_files = max_files
+        self.dpi = dpi
+
+    @property
+    def available(self):
+        return MATPLOTLIB_AVAILABLE
+
+    def cached_path(self, key, width, height):
+        """Return the PNG path used for a chart key and size"""
+        digest = hashlib.sha1(repr((key, width, height)).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+    def get_or_render(self, key, width, height, draw, colors):
+        """Return the PNG path for this chart, calling draw(axes) only when it is not cached"""
+        path = self.cached_path((key, colors['background'], colors['text']), width, height)
+        if os.path.exists(path):
+            os.utime(path, None)
+            print(f"[DEBUG] Chart cache hit: {path}")
+            return path
+        if not self.available:
+            return None
+
+        figure = Figure(figsize=(width / self.dpi, height / self.dpi), dpi=self.dpi)
+        figure.patch.set_facecolor(colors['background'])
+        axes = figure.add_subplot(111)
+        axes.set_facecolor(colors['background'])
+        axes.tick_params(colors=colors['text'])
+        for spine in axes.spines.values():
+            spine.set_color(colors['text'])
+        draw(axes)
+        figure.tight_layout()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        FigureCanvasAgg(figure).print_png(temp_path)
+        os.replace(temp_path, path)
+        self._prune()
+        return path
+
+    def _prune(self):
+        """Delete the least recently used charts beyond max_files"""
+        try:
+            charts = [
+                os.path.join(self.cache_dir, name)
+                for name in os.listdir(self.cache_dir) if name.endswith('.png')
+            ]
+            charts.sort(key=os.path.getmtime, reverse=True)
+            for path in charts[self.max_files:]:
+                os.remove(path)
+        except OSError as e:
+            print(f"[WARNING] Could not prune chart cache: {str(e)}")
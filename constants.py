@@ -13,6 +13,16 @@ accounts_payable_file = "accounts_payable.xlsx"
 EXCEL_DATA_PATH = "excel_data"
 MONGODB_DATA_PATH = "mongodb_data"
 
+# Cache files
+DATA_VERSIONS_FILE = os.path.join(MONGODB_DATA_PATH, "data_versions.json")
+REPORT_CACHE_FILE = os.path.join(MONGODB_DATA_PATH, "report_cache.pkl")
+REPORT_CACHE_SIZE = 64
+CHART_CACHE_DIR = os.path.join(MONGODB_DATA_PATH, "charts")
+CHART_CACHE_SIZE = 50
+
+# Store used when no other location is chosen
+DEFAULT_STORE = "المحل / Shop"
+
 # Collection names
 MONGODB_COLLECTIONS = {
     "products": "products",
@@ -22,7 +32,49 @@ MONGODB_COLLECTIONS = {
     "accounts_receivable": "accounts_receivable",
     "accounts_payable": "accounts_payable",
     "employees": "employees",
-    "customers": "customers"
+    "customers": "customers",
+    "sales": "sales",
+    "customer_segments": "customer_segments",
+    "sales_daily_rollups": "sales_daily_rollups",
+    "bills": "bills",
+    "expenses": "expenses",
+    "product_costs": "product_costs",
+    "sales_cube": "sales_cube",
+    "sales_anomalies": "sales_anomalies",
+    "anomaly_state": "anomaly_state",
+    "basket_items": "basket_items",
+    "basket_pairs": "basket_pairs",
+    "sales_hourly_rollups": "sales_hourly_rollups",
+    "demand_forecasts": "demand_forecasts",
+    "stock_movements": "stock_movements",
+    "stock_snapshots": "stock_snapshots",
+    "store_stock": "store_stock",
+    "stores": "stores",
+    "stock_counts": "stock_counts"
+}
+
+# Indexed fields per collection (created on connect)
+MONGODB_INDEXES = {
+    "sales": ["date"],
+    "customer_segments": ["segment"],
+    "sales_daily_rollups": [[("day", 1), ("employee_id", 1)]],
+    "sales_cube": [
+        [("day", 1), ("product_id", 1), ("employee_id", 1), ("store", 1)],
+        [("store", 1), ("day", 1)],
+        [("product_id", 1), ("day", 1)]
+    ],
+    "sales_anomalies": ["day"],
+    "basket_items": ["product_id"],
+    "basket_pairs": [[("product_a", 1), ("product_b", 1)]],
+    "sales_hourly_rollups": [[("store", 1), ("weekday", 1), ("hour", 1)]],
+    "demand_forecasts": ["product_id"],
+    "stock_movements": [[("collection", 1), ("item_id", 1), ("date", 1)], ["date"]],
+    "stock_snapshots": [[("collection", 1), ("item_id", 1)], ["as_of"]],
+    "store_stock": [[("collection", 1), ("item_id", 1), ("store", 1)], [("collection", 1), ("store", 1)]],
+    "stock_counts": ["date"],
+    # Only flagged documents are indexed, so the low stock lookup stays small on large inventories
+    "inventory": [{"keys": [("low_stock", 1)], "partialFilterExpression": {"low_stock": True}}],
+    "products": [{"keys": [("low_stock", 1)], "partialFilterExpression": {"low_stock": True}}]
 }
 
 # Excel file paths
@@ -33,7 +85,8 @@ EXCEL_FILES = {
     "sales_journal": os.path.join(EXCEL_DATA_PATH, "sales_journal.xlsx"),
     "accounts_receivable": os.path.join(EXCEL_DATA_PATH, "accounts_receivable.xlsx"),
     "accounts_payable": os.path.join(EXCEL_DATA_PATH, "accounts_payable.xlsx"),
-    "employees": os.path.join(EXCEL_DATA_PATH, "hookah_employees.xlsx")
+    "employees": os.path.join(EXCEL_DATA_PATH, "hookah_employees.xlsx"),
+    "stores": os.path.join(EXCEL_DATA_PATH, "stores.xlsx")
 }
 
 # MongoDB configuration
@@ -0,0 +1,49 @@
+from data_handler import load_data, save_data
+
+def compute_cost_basis(bills):
+    """Weighted average unit cost per product from supplier bills that record a product and quantity"""
+    totals = {}
+    for bill in bills:
+        product_id = bill.get('product_id')
+        try:
+            quantity = float(bill.get('quantity') or 0)
+            amount = float(bill.get('amount') or 0)
+        except (ValueError, TypeError):
+            continue
+        if product_id in (None, '') or quantity <= 0:
+            continue
+
+        entry = totals.setdefault(str(product_id), {
+            'product_id': str(product_id),
+            'product_name': '',
+            'quantity': 0.0,
+            'amount': 0.0,
+            'last_bill_date': ''
+        })
+        entry['product_name'] = bill.get('product_name') or entry['product_name']
+        entry['quantity'] += quantity
+        entry['amount'] += amount
+        entry['last_bill_date'] = max(entry['last_bill_date'], str(bill.get('date', '')))
+
+    for entry in totals.values():
+        entry['unit_cost'] = round(entry['amount'] / entry['quantity'], 4)
+    return list(totals.values())
+
+def refresh_cost_basis(bills=None):
+    """Recompute the per-product cost basis from all bills and persist it"""
+    if bills is None:
+        bills = load_data('bills') or []
+    costs = compute_cost_basis(bills)
+    if save_data('product_costs', costs):
+        print(f"[DEBUG] Saved cost basis for {len(costs)} products")
+    return costs
+
+def load_cost_index():
+    """Return ({product_id: unit_cost}, {product_name: unit_cost}) hash indexes of the cost basis"""
+    by_id = {}
+    by_name = {}
+    for entry in load_data('product_costs') or []:
+        by_id[str(entry.get('product_id'))] = float(entry.get('unit_cost', 0))
+        if entry.get('product_name'):
+            by_name[entry['product_name']] = float(entry.get('unit_cost', 0))
+    return by_id, by_name
@@ -0,0 +1,122 @@
+import numpy as np
+from datetime import date
+from data_handler import load_data, save_data
+from sales_utils import parse_sale_datetime, iter_sale_lines
+
+RFM_BINS = 5
+
+# Segment key -> (English, Arabic) label
+SEGMENT_LABELS = {
+    'champions': ("Champions", "الأبطال"),
+    'loyal': ("Loyal", "الأوفياء"),
+    'new': ("New", "جدد"),
+    'regular': ("Regular", "منتظمون"),
+    'at_risk': ("At Risk", "معرضون للفقدان"),
+    'lost': ("Lost", "مفقودون")
+}
+
+def quantile_scores(values, bins=RFM_BINS):
+    """Score values 1..bins by percentile rank.
+
+    Tied values share their average rank, and ties at the best value always
+    get the top score. A series with a single value scores the middle bin.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    unique, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    if unique.size == 1:
+        return np.full(values.size, (bins + 1) // 2, dtype=np.int64)
+    last_rank = np.cumsum(counts)
+    average_rank = last_rank - (counts - 1) / 2
+    scores = np.clip(np.ceil(average_rank * bins / values.size), 1, bins).astype(np.int64)
+    scores[-1] = bins
+    return scores[inverse]
+
+def segment_for(r_score, f_score, m_score):
+    """Map RFM scores to a segment key"""
+    value_score = (f_score + m_score) / 2
+    if r_score >= 4 and value_score >= 4:
+        return 'champions'
+    if r_score >= 4 and f_score <= 1:
+        return 'new'
+    if r_score >= 3 and value_score >= 3:
+        return 'loyal'
+    if r_score <= 2 and value_score >= 3:
+        return 'at_risk'
+    if r_score <= 2:
+        return 'lost'
+    return 'regular'
+
+def compute_rfm(sales, today=None):
+    """Compute recency/frequency/monetary scores per customer over the sales history.
+
+    Sales without a customer (walk-in sales) are skipped. Returns one dict per
+    customer with the raw values, the 1-5 scores and the segment key.
+    """
+    today = today or date.today()
+    customer_keys = []
+    customer_names = {}
+    ordinals = []
+    totals = []
+    for sale in sales:
+        customer_key = sale.get('customer_id') or sale.get('customer')
+        sale_datetime = parse_sale_datetime(sale.get('date'))
+        if not customer_key or sale_datetime is None:
+            continue
+        customer_keys.append(str(customer_key))
+        customer_names[str(customer_key)] = sale.get('customer') or str(customer_key)
+        ordinals.append(sale_datetime.date().toordinal())
+        totals.append(sum(price * quantity for name, category, price, quantity in iter_sale_lines(sale)))
+
+    if not customer_keys:
+        return []
+
+    keys, inverse = np.unique(np.asarray(customer_keys), return_inverse=True)
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+
+    last_purchase = np.full(keys.size, np.iinfo(np.int64).min, dtype=np.int64)
+    np.maximum.at(last_purchase, inverse, ordinals)
+    recency = today.toordinal() - last_purchase
+    frequency = np.bincount(inverse, minlength=keys.size)
+    monetary = np.bincount(inverse, weights=np.asarray(totals, dtype=float), minlength=keys.size)
+
+    # Recent customers score high, so score the negated recency
+    r_scores = quantile_scores(-recency)
+    f_scores = quantile_scores(frequency)
+    m_scores = quantile_scores(monetary)
+
+    results = []
+    for index, key in enumerate(keys.tolist()):
+        r_score, f_score, m_score = int(r_scores[index]), int(f_scores[index]), int(m_scores[index])
+        results.append({
+            'customer_id': key,
+            'customer': customer_names[key],
+            'recency_days': int(recency[index]),
+            'frequency': int(frequency[index]),
+            'monetary': round(float(monetary[index]), 2),
+            'r_score': r_score,
+            'f_score': f_score,
+            'm_score': m_score,
+            'rfm_score': f"{r_score}{f_score}{m_score}",
+            'segment': segment_for(r_score, f_score, m_score),
+            'updated': str(today)
+        })
+    return results
+
+def refresh_customer_segments(sales=None):
+    """Recompute the segments from the full sales history and persist them"""
+    if sales is None:
+        sales = load_data('sales') or []
+    segments = compute_rfm(sales)
+    save_customer_segments(segments)
+    return segments
+
+def save_customer_segments(segments):
+    """Persist computed segments so other screens can read them without recomputing"""
+    if save_data('customer_segments', segments):
+        print(f"[DEBUG] Saved RFM segments for {len(segments)} customers")
+
+def load_customer_segments():
+    """Return the persisted segments keyed by customer id"""
+    return {str(row.get('customer_id')): row for row in (load_data('customer_segments') or [])}
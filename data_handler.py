@@ -2,23 +2,28 @@ from dotenv import load_dotenv
 load_dotenv()  # Load environment variables FIRST
 
 import os
-from pymongo import MongoClient, errors
+from pymongo import MongoClient, UpdateOne, errors
 from bson import ObjectId
 from constants import *
 from ui_elements import show_error, show_success
 import pandas as pd
 import atexit
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import tkinter as tk
 from tkinter import messagebox
 import re
 import shutil
+import threading
 
 # MongoDB Connection Variables
 client = None
 db = None
 
+# Per-collection data versions, bumped on every write (used to invalidate report caches)
+data_versions = None
+data_versions_lock = threading.Lock()
+
 def ensure_data_directories():
     """Ensure data directories exist"""
     os.makedirs(EXCEL_DATA_PATH, exist_ok=True)
@@ -44,6 +49,8 @@ def initialize_db():
             ensure_collection(collection_name)
             print(f"[DEBUG] Ensured collection exists: {collection_name}")
         
+        ensure_indexes()
+        
         return True
     except errors.ConnectionFailure as e:
         print(f"[ERROR] Could not connect to MongoDB: {str(e)}")
@@ -59,6 +66,23 @@ def ensure_collection(collection_name):
     if db is not None and collection_name not in db.list_collection_names():
         db.create_collection(collection_name)
 
+def ensure_indexes():
+    """Create the indexes listed in MONGODB_INDEXES (no-op if they already exist)"""
+    if db is None:
+        return
+    for data_type, specs in MONGODB_INDEXES.items():
+        collection = db[MONGODB_COLLECTIONS.get(data_type, data_type)]
+        for spec in specs:
+            try:
+                if isinstance(spec, dict):
+                    # {'keys': ..., **options}, e.g. a partial index
+                    options = {key: value for key, value in spec.items() if key != 'keys'}
+                    collection.create_index(spec['keys'], **options)
+                else:
+                    collection.create_index(spec)
+            except Exception as e:
+                print(f"[WARNING] Could not create index {spec} on {data_type}: {str(e)}")
+
 def load_data(data_type):
     """Load data from both MongoDB and JSON file with proper synchronization"""
     if data_type not in MONGODB_COLLECTIONS:
@@ -188,6 +212,7 @@ def save_data(data_type, data):
         else:
             print(f"[WARNING] Failed to export data to Excel")
         
+        bump_data_version(data_type)
         return True
     except Exception as e:
         print(f"[ERROR] Error saving data: {str(e)}")
@@ -292,6 +317,7 @@ def insert_document(collection_name, document):
     try:
         collection = db[collection_name]
         result = collection.insert_one(document)
+        bump_data_version(collection_name)
         return str(result.inserted_id)
     except Exception as e:
         show_error(f"Error inserting document: {str(e)}")
@@ -308,11 +334,133 @@ def update_document(collection_name, document_id, update_data):
             {'_id': ObjectId(document_id)},
             {'$set': update_data}
         )
+        if result.modified_count > 0:
+            bump_data_version(collection_name)
         return result.modified_count > 0
     except Exception as e:
         show_error(f"Error updating document: {str(e)}")
         return False
 
+def increment_document(collection_name, key, increments, set_fields=None):
+    """Atomically add to counters of the document matching key, creating it if needed"""
+    return increment_documents(collection_name, [(key, increments, set_fields)])
+
+def increment_documents(collection_name, updates):
+    """Apply several (key, increments, set_fields) counter updates in one bulk write"""
+    if db is None:
+        print("[ERROR] Database connection not available")
+        return False
+    if not updates:
+        return True
+    try:
+        operations = []
+        for key, increments, set_fields in updates:
+            update = {'$inc': increments}
+            if set_fields:
+                update['$set'] = set_fields
+            operations.append(UpdateOne(key, update, upsert=True))
+        db[collection_name].bulk_write(operations, ordered=False)
+        bump_data_version(collection_name)
+        return True
+    except Exception as e:
+        print(f"[ERROR] Error incrementing documents in {collection_name}: {str(e)}")
+        return False
+
+def bulk_update_documents(collection_name, updates):
+    """Apply several (query, update) pairs in one bulk write; returns the number modified"""
+    if db is None:
+        print("[ERROR] Database connection not available")
+        return 0
+    if not updates:
+        return 0
+    try:
+        result = db[collection_name].bulk_write([UpdateOne(query, update) for query, update in updates], ordered=False)
+        if result.modified_count > 0:
+            bump_data_version(collection_name)
+        return result.modified_count
+    except Exception as e:
+        print(f"[ERROR] Error updating documents in {collection_name}: {str(e)}")
+        return 0
+
+def insert_documents(collection_name, documents):
+    """Append several documents in one insert_many"""
+    if db is None:
+        print("[ERROR] Database connection not available")
+        return False
+    if not documents:
+        return True
+    try:
+        db[collection_name].insert_many([dict(document) for document in documents], ordered=False)
+        bump_data_version(collection_name)
+        return True
+    except Exception as e:
+        print(f"[ERROR] Error inserting documents into {collection_name}: {str(e)}")
+        return False
+
+def delete_documents(collection_name, query):
+    """Delete every document matching query in one delete_many; returns the number deleted"""
+    if db is None:
+        print("[ERROR] Database connection not available")
+        return 0
+    try:
+        result = db[collection_name].delete_many(query)
+        if result.deleted_count > 0:
+            bump_data_version(collection_name)
+        return result.deleted_count
+    except Exception as e:
+        print(f"[ERROR] Error deleting documents from {collection_name}: {str(e)}")
+        return 0
+
+def update_documents(collection_name, query, update):
+    """Apply one update to every document matching query in a single update_many; returns the number modified, or None on failure"""
+    if db is None:
+        print("[ERROR] Database connection not available")
+        return None
+    try:
+        result = db[collection_name].update_many(query, update)
+        if result.modified_count > 0:
+            bump_data_version(collection_name)
+        return result.modified_count
+    except Exception as e:
+        print(f"[ERROR] Error updating documents in {collection_name}: {str(e)}")
+        return None
+
+def find_data(data_type, query, projection=None):
+    """Return only the documents matching a MongoDB query (evaluated by the server)"""
+    try:
+        if db is None:
+            initialize_db()
+        collection = get_collection(MONGODB_COLLECTIONS.get(data_type, data_type))
+        if collection is not None:
+            return list(collection.find(query, dict(projection or {}, _id=0)))
+    except Exception as e:
+        print(f"[ERROR] Error querying {data_type}: {str(e)}")
+    return []
+
+def count_data(data_type, query=None):
+    """Count the documents matching a query without loading them"""
+    try:
+        if db is None:
+            initialize_db()
+        collection = get_collection(MONGODB_COLLECTIONS.get(data_type, data_type))
+        if collection is not None:
+            return collection.count_documents(query or {})
+    except Exception as e:
+        print(f"[ERROR] Error counting {data_type}: {str(e)}")
+    return 0
+
+def aggregate_data(data_type, pipeline):
+    """Run an aggregation pipeline on a collection and return the resulting documents"""
+    try:
+        if db is None:
+            initialize_db()
+        collection = get_collection(MONGODB_COLLECTIONS.get(data_type, data_type))
+        if collection is not None:
+            return list(collection.aggregate(pipeline))
+    except Exception as e:
+        print(f"[ERROR] Error aggregating {data_type}: {str(e)}")
+    return []
+
 def delete_document(collection_name, document_id):
     """Delete a document from both MongoDB and JSON file"""
     if db is None:
@@ -324,6 +472,7 @@ def delete_document(collection_name, document_id):
         result = collection.delete_one({'_id': ObjectId(document_id)})
         
         if result.deleted_count > 0:
+            bump_data_version(collection_name)
             # If deleted from MongoDB, update JSON file
             data = list(collection.find())
             # Convert ObjectId to string for JSON serialization
@@ -459,6 +608,62 @@ def filter_data(data_type, filters):
     
     return results
 
+def _load_data_versions():
+    """Load the persisted data versions once (caller holds data_versions_lock)"""
+    global data_versions
+    if data_versions is None:
+        data_versions = {}
+        if os.path.exists(DATA_VERSIONS_FILE):
+            try:
+                with open(DATA_VERSIONS_FILE, 'r') as f:
+                    data_versions = json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Could not read data versions: {str(e)}")
+    return data_versions
+
+def get_data_version(data_type):
+    """Return the current version number of a collection"""
+    with data_versions_lock:
+        return _load_data_versions().get(data_type, 0)
+
+def bump_data_version(data_type):
+    """Mark a collection as changed so cached results built from it are invalidated"""
+    with data_versions_lock:
+        versions = _load_data_versions()
+        versions[data_type] = versions.get(data_type, 0) + 1
+        try:
+            ensure_data_directories()
+            with open(DATA_VERSIONS_FILE, 'w') as f:
+                json.dump(versions, f, indent=4)
+        except Exception as e:
+            print(f"[WARNING] Could not save data versions: {str(e)}")
+        return versions[data_type]
+
+def load_data_in_range(data_type, start_date=None, end_date=None, date_field='date'):
+    """Load documents whose date falls in [start_date, end_date] using the indexed date field.
+
+    Dates are stored as 'YYYY-MM-DD HH:MM:SS' strings, so the range is expressed
+    as a string comparison that MongoDB can answer from the index. Passing no
+    bounds returns the whole collection.
+    """
+    query = {}
+    if start_date is not None:
+        query.setdefault(date_field, {})['$gte'] = start_date.strftime('%Y-%m-%d')
+    if end_date is not None:
+        query.setdefault(date_field, {})['$lt'] = (end_date + timedelta(days=1)).strftime('%Y-%m-%d')
+
+    try:
+        if db is None:
+            initialize_db()
+        collection = get_collection(MONGODB_COLLECTIONS.get(data_type, data_type))
+        if collection is not None:
+            documents = list(collection.find(query, {'_id': 0}).sort(date_field, 1))
+            print(f"[DEBUG] Loaded {len(documents)} {data_type} documents for range {start_date} - {end_date}")
+            return documents
+    except Exception as e:
+        print(f"[ERROR] Error loading {data_type} in range: {str(e)}")
+    return []
+
 def close_connection():
     """Close the MongoDB connection"""
     global client
@@ -512,6 +717,8 @@ def delete_document(collection_name, document_id):
         collection = get_collection(collection_name)
         if collection is not None:
             result = collection.delete_one({'_id': document_id})
+            if result.deleted_count > 0:
+                bump_data_version(collection_name)
             return result.deleted_count > 0
     except Exception as e:
         print(f"Error deleting document: {str(e)}")
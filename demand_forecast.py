@@ -0,0 +1,132 @@
+import numpy as np
+from datetime import date, timedelta
+from data_handler import load_data, save_data
+from sales_cube import ensure_cube, load_product_day_matrix
+
+FORECAST_HISTORY_DAYS = 90
+FORECAST_HORIZON = 60  # Days of daily forecasts stored per product
+WARMUP_DAYS = 7  # Days averaged for the initial level
+DAMPING = 0.9  # Damped trend so a recent rise does not grow forever
+
+# Smoothing parameters tried for every product; beta 0 is simple exponential smoothing
+ALPHAS = [0.1, 0.2, 0.3, 0.5, 0.7]
+BETAS = [0.0, 0.05, 0.1, 0.2]
+
+def fit_holt(matrix, alpha, beta, phi=DAMPING):
+    """Run damped Holt smoothing over every row at once.
+
+    Returns (level, trend, sse) arrays, where sse is the one-step-ahead
+    squared error after the warm-up days.
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+    level = matrix[:, :WARMUP_DAYS].mean(axis=1)
+    trend = np.zeros(matrix.shape[0])
+    sse = np.zeros(matrix.shape[0])
+    for day in range(WARMUP_DAYS, matrix.shape[1]):
+        observed = matrix[:, day]
+        predicted = np.maximum(level + phi * trend, 0.0)
+        sse += (observed - predicted) ** 2
+        previous_level = level
+        level = alpha * observed + (1 - alpha) * (level + phi * trend)
+        trend = beta * (level - previous_level) + (1 - beta) * phi * trend
+    return level, trend, sse
+
+def forecast_paths(level, trend, horizon=FORECAST_HORIZON, phi=DAMPING):
+    """Daily forecasts for the next `horizon` days, one row per product"""
+    damping = np.cumsum(phi ** np.arange(1, horizon + 1))
+    return np.maximum(level[:, None] + trend[:, None] * damping[None, :], 0.0)
+
+def fit_forecasts(matrix):
+    """Pick the best (alpha, beta) per product by one-step error and forecast the horizon"""
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+    count = matrix.shape[0]
+    best_sse = np.full(count, np.inf)
+    best = {
+        'level': np.zeros(count),
+        'trend': np.zeros(count),
+        'alpha': np.zeros(count),
+        'beta': np.zeros(count)
+    }
+    for alpha in ALPHAS:
+        for beta in BETAS:
+            level, trend, sse = fit_holt(matrix, alpha, beta)
+            better = sse < best_sse
+            best_sse = np.where(better, sse, best_sse)
+            best['level'] = np.where(better, level, best['level'])
+            best['trend'] = np.where(better, trend, best['trend'])
+            best['alpha'] = np.where(better, alpha, best['alpha'])
+            best['beta'] = np.where(better, beta, best['beta'])
+    fitted_days = max(1, matrix.shape[1] - WARMUP_DAYS)
+    best['rmse'] = np.sqrt(best_sse / fitted_days)
+    best['paths'] = forecast_paths(best['level'], best['trend'])
+    return best
+
+def refresh_forecasts(today=None):
+    """Refit every product on the last FORECAST_HISTORY_DAYS complete days and persist the forecasts"""
+    today = today or date.today()
+    end_date = today - timedelta(days=1)
+    ensure_cube()
+    product_ids, names, matrix = load_product_day_matrix(end_date - timedelta(days=FORECAST_HISTORY_DAYS - 1), end_date)
+    forecasts = []
+    if product_ids:
+        fitted = fit_forecasts(matrix)
+        for row, product_id in enumerate(product_ids):
+            forecasts.append({
+                'product_id': product_id,
+                'product': names[product_id],
+                'daily_demand': round(float(fitted['paths'][row, 0]), 3),
+                'horizon_demand': round(float(fitted['paths'][row].sum()), 2),
+                'forecast': [round(float(value), 3) for value in fitted['paths'][row]],
+                'alpha': float(fitted['alpha'][row]),
+                'beta': float(fitted['beta'][row]),
+                'rmse': round(float(fitted['rmse'][row]), 3),
+                'updated': str(today)
+            })
+    save_data('demand_forecasts', forecasts)
+    print(f"[DEBUG] Fitted demand forecasts for {len(forecasts)} products")
+    return forecasts
+
+def load_forecasts(today=None):
+    """Return the stored forecasts, refitting them once per day"""
+    today = today or date.today()
+    forecasts = load_data('demand_forecasts') or []
+    if not forecasts or forecasts[0].get('updated') != str(today):
+        forecasts = refresh_forecasts(today)
+    return forecasts
+
+class ForecastIndex:
+    """Stored forecasts looked up by product id or name, with cumulative demand for stock-out dates"""
+    def __init__(self, forecasts, today=None):
+        self.today = today or date.today()
+        self.by_id = {}
+        self.by_name = {}
+        for forecast in forecasts:
+            forecast = dict(forecast, cumulative=np.cumsum(forecast.get('forecast') or [0.0]))
+            self.by_id[str(forecast.get('product_id'))] = forecast
+            if forecast.get('product'):
+                self.by_name[forecast['product']] = forecast
+
+    @classmethod
+    def load(cls, today=None):
+        return cls(load_forecasts(today), today)
+
+    def get(self, product_id=None, name=None):
+        """Return the forecast for a product id, falling back to its name"""
+        forecast = self.by_id.get(str(product_id)) if product_id not in (None, '') else None
+        return forecast or self.by_name.get(name)
+
+    def stock_out_date(self, quantity, product_id=None, name=None):
+        """Date the stock is expected to run out, or None if it lasts beyond the forecast horizon"""
+        forecast = self.get(product_id, name)
+        try:
+            quantity = float(quantity or 0)
+        except (ValueError, TypeError):
+            return None
+        if forecast is None:
+            return None
+        if quantity <= 0:
+            return self.today
+        days = int(np.searchsorted(forecast['cumulative'], quantity, side='left'))
+        if days >= len(forecast['cumulative']):
+            return None
+        return self.today + timedelta(days=days)
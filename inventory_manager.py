@@ -1,7 +1,19 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 from ui_elements import show_error, show_success
-from data_handler import load_data, save_data, get_next_id, import_from_excel
+from data_handler import load_data, save_data, get_next_id, import_from_excel, export_to_excel, delete_documents, update_documents, bulk_update_documents
+from demand_forecast import ForecastIndex
+from replenishment import suggest_purchases, group_by_supplier
+from stock_ledger import (
+    ensure_ledger, movement, record_movement, record_movements, quantity_change_movement,
+    item_history, transfer_stock, relocation_movements, current_stock, reconcile, seed_untracked_items
+)
+from store_stock import STOCK_COLLECTIONS, item_store, remove_items, stock_matrix
+from low_stock import low_stock_tracker
+from store_registry import store_registry
+from constants import DEFAULT_STORE
+from stock_take import StockTake
+from scanner_input import ScannerInput
 from theme import (
     COLORS, FONTS, create_styled_button,
     create_styled_entry, create_styled_frame,
@@ -16,6 +28,7 @@ class InventoryManager:
         self.back_callback = back_callback
         self.inventory = load_data("inventory") or []
         self.selected_items = set()
+        self.forecasts = None
 
     def refresh_inventory(self):
         """Refresh the inventory list from database and update display"""
@@ -28,6 +41,8 @@ class InventoryManager:
 
             # Load inventory from database
             self.inventory = load_data("inventory") or []
+            low_stock_tracker.load('inventory') # The Excel import may have changed any quantity
+            seed_untracked_items('inventory', self.inventory) # Imported items start with their quantity at their location
             print(f"[DEBUG] Loaded inventory count: {len(self.inventory)}")
             print(f"[DEBUG] Loaded inventory: {self.inventory}")
             
@@ -78,22 +93,24 @@ class InventoryManager:
         )
         refresh_button.pack(side='right', padx=20, pady=20)
         
+        # Demand forecasts (refitted once per day) for the stock-out column
+        self.forecasts = ForecastIndex.load()
+
         # Summary cards
         summary_frame = create_styled_frame(main_frame, style='card')
         summary_frame.pack(fill='x', padx=20, pady=(0, 20))
         
-        # Calculate summary data
-        total_items = len(self.inventory)
-        low_stock = len([i for i in self.inventory if i.get('quantity', 0) < i.get('min_quantity', 0)])
-        out_of_stock = len([i for i in self.inventory if i.get('quantity', 0) <= 0])
-        
+        # Summary data is kept current by the low stock tracker
+        total_items, low_stock, out_of_stock = low_stock_tracker.counts('inventory')
+
         # Create summary cards
         summary_cards = [
             ("total_items", "Total Items", total_items),
             ("low_stock", "Low Stock", low_stock),
             ("out_of_stock", "Out of Stock", out_of_stock)
         ]
-        
+        self.summary_labels = {}
+
         for i, (key, default_text, value) in enumerate(summary_cards):
             card = create_styled_frame(summary_frame, style='card')
             card.pack(side='left', expand=True, fill='both', padx=10, pady=10)
@@ -111,7 +128,8 @@ class InventoryManager:
                 style='heading'
             )
             value_label.pack(pady=(0, 10))
-        
+            self.summary_labels[key] = value_label
+
         # Search and filter section
         search_frame = create_styled_frame(main_frame, style='card')
         search_frame.pack(fill='x', padx=20, pady=(0, 20))
@@ -136,6 +154,38 @@ class InventoryManager:
             command=self.add_item
         )
         add_button.pack(side='right', padx=20, pady=20)
+
+        purchases_button = create_styled_button(
+            search_frame,
+            text=self.get_bilingual("suggested_purchases", "Suggested Purchases", "المشتريات المقترحة"),
+            style='outline',
+            command=self.show_suggested_purchases
+        )
+        purchases_button.pack(side='right', padx=20, pady=20)
+
+        store_stock_button = create_styled_button(
+            search_frame,
+            text=self.get_bilingual("stock_by_store", "Stock by Store", "المخزون حسب الفرع"),
+            style='outline',
+            command=self.show_store_stock
+        )
+        store_stock_button.pack(side='right', padx=20, pady=20)
+
+        stock_take_button = create_styled_button(
+            search_frame,
+            text=self.get_bilingual("stock_take", "Stock Take", "جرد المخزون"),
+            style='outline',
+            command=self.show_stock_take
+        )
+        stock_take_button.pack(side='right', padx=20, pady=20)
+
+        reconcile_button = create_styled_button(
+            search_frame,
+            text=self.get_bilingual("reconcile_stock", "Reconcile Stock", "مطابقة المخزون"),
+            style='outline',
+            command=self.show_reconcile
+        )
+        reconcile_button.pack(side='right', padx=20, pady=20)
         
         # زر حذف المحدد
         delete_selected_button = create_styled_button(
@@ -145,7 +195,56 @@ class InventoryManager:
             command=self.delete_selected_items
         )
         delete_selected_button.pack(side='right', padx=20, pady=20)
-        
+
+        # Bulk updates applied to the selected items
+        bulk_frame = create_styled_frame(main_frame, style='card')
+        bulk_frame.pack(fill='x', padx=20, pady=(0, 20))
+
+        create_styled_label(
+            bulk_frame,
+            text=self.get_bilingual("selected_items", "Selected Items", "العناصر المحددة"),
+            style='subheading'
+        ).pack(side='left', padx=(20, 10), pady=10)
+
+        store_names = self.get_store_names()
+        bulk_location_menu = create_styled_option_menu(
+            bulk_frame,
+            values=store_names or [""]
+        )
+        bulk_location_menu.pack(side='left', padx=5, pady=10)
+        create_styled_button(
+            bulk_frame,
+            text=self.get_bilingual("change_location", "Change Location", "تغيير الموقع"),
+            style='outline',
+            command=lambda: self.bulk_set_field('location', bulk_location_menu.get())
+        ).pack(side='left', padx=(5, 15), pady=10)
+
+        bulk_category_entry = create_styled_entry(
+            bulk_frame,
+            placeholder_text=self.get_bilingual("category", "Category", "الفئة"),
+            width=140
+        )
+        bulk_category_entry.pack(side='left', padx=5, pady=10)
+        create_styled_button(
+            bulk_frame,
+            text=self.get_bilingual("set_category", "Set Category", "تعيين الفئة"),
+            style='outline',
+            command=lambda: self.bulk_set_field('category', bulk_category_entry.get().strip())
+        ).pack(side='left', padx=(5, 15), pady=10)
+
+        bulk_quantity_entry = create_styled_entry(
+            bulk_frame,
+            placeholder_text="±N",
+            width=80
+        )
+        bulk_quantity_entry.pack(side='left', padx=5, pady=10)
+        create_styled_button(
+            bulk_frame,
+            text=self.get_bilingual("adjust_quantity", "Adjust Quantity", "تعديل الكمية"),
+            style='outline',
+            command=lambda: self.bulk_adjust_quantity(bulk_quantity_entry.get().strip())
+        ).pack(side='left', padx=5, pady=10)
+
         # Inventory table (scrollable)
         table_frame = create_styled_frame(main_frame, style='card')
         table_frame.pack(fill='both', expand=True, padx=20, pady=(0, 20))
@@ -162,6 +261,7 @@ class InventoryManager:
             ("quantity", "Quantity"),
             ("min_quantity", "Min Quantity"),
             ("location", "Location"),
+            ("stock_out_date", "Stock-out Date"),
             ("actions", "Actions")
         ]
         for i, (key, default_text) in enumerate(headers):
@@ -172,74 +272,124 @@ class InventoryManager:
             )
             header.grid(row=0, column=i, padx=10, pady=10, sticky='w')
         
-        # Inventory list
+        # Inventory list; each row keeps its widgets so bulk operations can update it in place
+        self.inventory_table = scrollable_table
+        self.item_rows = {}
+        self.selected_items.clear() # The checkboxes are recreated unchecked
         for i, item in enumerate(self.inventory, 1):
-            # Checkbox لتحديد العنصر
-            var = ctk.BooleanVar()
-            checkbox = ctk.CTkCheckBox(
-                scrollable_table,
-                variable=var,
-                text="",
-                command=lambda v=var, item_id=item.get('id'): self.toggle_select_item(v, item_id)
-            )
-            checkbox.grid(row=i, column=0, padx=10, pady=10)
-            
-            name_label = create_styled_label(
-                scrollable_table,
-                text=item.get('name', ''),
-                style='body'
-            )
-            name_label.grid(row=i, column=1, padx=10, pady=10, sticky='w')
-            
-            category_label = create_styled_label(
-                scrollable_table,
-                text=item.get('category', ''),
-                style='body'
-            )
-            category_label.grid(row=i, column=2, padx=10, pady=10, sticky='w')
-            
-            quantity_label = create_styled_label(
-                scrollable_table,
-                text=str(item.get('quantity', 0)),
-                style='body'
-            )
-            quantity_label.grid(row=i, column=3, padx=10, pady=10, sticky='w')
-            
-            min_quantity_label = create_styled_label(
-                scrollable_table,
-                text=str(item.get('min_quantity', 0)),
-                style='body'
-            )
-            min_quantity_label.grid(row=i, column=4, padx=10, pady=10, sticky='w')
-            
-            location_label = create_styled_label(
-                scrollable_table,
-                text=item.get('location', ''),
-                style='body'
-            )
-            location_label.grid(row=i, column=5, padx=10, pady=10, sticky='w')
-            
-            # Action buttons
-            actions_frame = create_styled_frame(scrollable_table, style='card')
-            actions_frame.grid(row=i, column=6, padx=10, pady=10, sticky='w')
-            
-            edit_button = create_styled_button(
-                actions_frame,
-                text=self.get_bilingual("edit", "Edit", "تعديل"),
-                style='outline',
-                width=80,
-                command=lambda i=item: self.edit_item(i)
-            )
-            edit_button.pack(side='left', padx=5)
-            
-            delete_button = create_styled_button(
-                actions_frame,
-                text=self.get_bilingual("delete", "Delete", "حذف"),
-                style='outline',
-                width=80,
-                command=lambda i=item: self.delete_item(i)
-            )
-            delete_button.pack(side='left', padx=5)
+            self.render_item_row(i, item)
+
+    def render_item_row(self, i, item):
+        """Create the table row of one item and remember its widgets"""
+        scrollable_table = self.inventory_table
+        # Checkbox لتحديد العنصر
+        var = ctk.BooleanVar()
+        checkbox = ctk.CTkCheckBox(
+            scrollable_table,
+            variable=var,
+            text="",
+            command=lambda v=var, item_id=item.get('id'): self.toggle_select_item(v, item_id)
+        )
+        checkbox.grid(row=i, column=0, padx=10, pady=10)
+        
+        name_label = create_styled_label(
+            scrollable_table,
+            text=item.get('name', ''),
+            style='body'
+        )
+        name_label.grid(row=i, column=1, padx=10, pady=10, sticky='w')
+        
+        category_label = create_styled_label(
+            scrollable_table,
+            text=item.get('category', ''),
+            style='body'
+        )
+        category_label.grid(row=i, column=2, padx=10, pady=10, sticky='w')
+        
+        quantity_label = create_styled_label(
+            scrollable_table,
+            text=str(item.get('quantity', 0)),
+            style='body'
+        )
+        quantity_label.grid(row=i, column=3, padx=10, pady=10, sticky='w')
+        
+        min_quantity_label = create_styled_label(
+            scrollable_table,
+            text=str(item.get('min_quantity', 0)),
+            style='body'
+        )
+        min_quantity_label.grid(row=i, column=4, padx=10, pady=10, sticky='w')
+        
+        location_label = create_styled_label(
+            scrollable_table,
+            text=item.get('location', ''),
+            style='body'
+        )
+        location_label.grid(row=i, column=5, padx=10, pady=10, sticky='w')
+
+        stock_out_date = self.forecasts.stock_out_date(item.get('quantity', 0), item.get('product_id'), item.get('name'))
+        stock_out_label = create_styled_label(
+            scrollable_table,
+            text=str(stock_out_date) if stock_out_date else '-',
+            style='body'
+        )
+        stock_out_label.grid(row=i, column=6, padx=10, pady=10, sticky='w')
+        
+        # Action buttons
+        actions_frame = create_styled_frame(scrollable_table, style='card')
+        actions_frame.grid(row=i, column=7, padx=10, pady=10, sticky='w')
+        
+        edit_button = create_styled_button(
+            actions_frame,
+            text=self.get_bilingual("edit", "Edit", "تعديل"),
+            style='outline',
+            width=80,
+            command=lambda i=item: self.edit_item(i)
+        )
+        edit_button.pack(side='left', padx=5)
+        
+        delete_button = create_styled_button(
+            actions_frame,
+            text=self.get_bilingual("delete", "Delete", "حذف"),
+            style='outline',
+            width=80,
+            command=lambda i=item: self.delete_item(i)
+        )
+        delete_button.pack(side='left', padx=5)
+
+        history_button = create_styled_button(
+            actions_frame,
+            text=self.get_bilingual("history", "History", "السجل"),
+            style='outline',
+            width=80,
+            command=lambda i=item: self.show_item_history(i)
+        )
+        history_button.pack(side='left', padx=5)
+
+        self.item_rows[item.get('id')] = {
+            'widgets': [checkbox, name_label, category_label, quantity_label, min_quantity_label, location_label, stock_out_label, actions_frame],
+            'category': category_label,
+            'quantity': quantity_label,
+            'location': location_label,
+            'stock_out': stock_out_label
+        }
+
+    def update_item_row(self, item):
+        """Refresh the labels of an item's row after a bulk update"""
+        row = self.item_rows.get(item.get('id'))
+        if row is None:
+            return
+        row['category'].configure(text=item.get('category', ''))
+        row['quantity'].configure(text=str(item.get('quantity', 0)))
+        row['location'].configure(text=item.get('location', ''))
+        stock_out_date = self.forecasts.stock_out_date(item.get('quantity', 0), item.get('product_id'), item.get('name'))
+        row['stock_out'].configure(text=str(stock_out_date) if stock_out_date else '-')
+
+    def update_summary_cards(self):
+        """Show the tracker's current counts on the summary cards"""
+        counts = low_stock_tracker.counts('inventory')
+        for key, value in zip(["total_items", "low_stock", "out_of_stock"], counts):
+            self.summary_labels[key].configure(text=str(value))
 
     def add_item(self):
         """Add a new inventory item"""
@@ -307,13 +457,7 @@ class InventoryManager:
             style='subheading'
         )
         location_label.pack(pady=(0, 5))
-        import json, os
-        stores_file = os.path.join("excel_data", "stores.json")
-        store_names = ["المحل / Shop"]
-        if os.path.exists(stores_file):
-            with open(stores_file, 'r', encoding='utf-8') as f:
-                stores = json.load(f)
-                store_names += [store['name'] for store in stores]
+        store_names = self.get_store_names()
         location_menu = create_styled_option_menu(
             form_frame,
             values=store_names
@@ -406,13 +550,7 @@ class InventoryManager:
             style='subheading'
         )
         location_label.pack(pady=(0, 5))
-        import json, os
-        stores_file = os.path.join("excel_data", "stores.json")
-        store_names = ["المحل / Shop"]
-        if os.path.exists(stores_file):
-            with open(stores_file, 'r', encoding='utf-8') as f:
-                stores = json.load(f)
-                store_names += [store['name'] for store in stores]
+        store_names = self.get_store_names()
         location_menu = create_styled_option_menu(
             form_frame,
             values=store_names
@@ -461,8 +599,11 @@ class InventoryManager:
             'location': location
         }
         
+        ensure_ledger()
         self.inventory.append(new_item)
         save_data("inventory", self.inventory)
+        record_movement('inventory', new_item['id'], 'restock', quantity, 'opening', location)
+        low_stock_tracker.add('inventory', new_item)
         dialog.destroy()
         self.manage_inventory()
         show_success(self.get_bilingual("item_added", "Item added successfully", "تم إضافة العنصر بنجاح"), self.current_language)
@@ -473,6 +614,10 @@ class InventoryManager:
             show_error(self.get_bilingual("invalid_item", "Please fill all fields correctly", "يرجى ملء جميع الحقون الصحيحة"), self.current_language)
             return
 
+        ensure_ledger()
+        # Stock held at the old location moves with the item, then the edit applies at the new one
+        movements = relocation_movements('inventory', [item], location)
+        quantity_change = quantity_change_movement('inventory', item.get('id'), item.get('quantity', 0), quantity, 'edit', location)
         item.update({
             'name': name,
             'category': category,
@@ -482,6 +627,10 @@ class InventoryManager:
         })
         
         save_data("inventory", self.inventory)
+        if quantity_change:
+            movements.append(quantity_change)
+        record_movements(movements)
+        low_stock_tracker.update('inventory', item)
         dialog.destroy()
         self.manage_inventory()
         show_success(self.get_bilingual("item_updated", "Item updated successfully", "تم تحديث العنصر بنجاح"), self.current_language)
@@ -490,18 +639,318 @@ class InventoryManager:
         """Delete an inventory item"""
         self.inventory.remove(item)
         save_data("inventory", self.inventory)
+        low_stock_tracker.remove('inventory', item.get('id'))
+        remove_items('inventory', [item.get('id')])
         self.manage_inventory()
         show_success(self.get_bilingual("item_deleted", "Item deleted successfully", "تم حذف العنصر بنجاح"), self.current_language)
 
+    def show_item_history(self, item):
+        """Show the latest stock movements of an item from the ledger"""
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title(f"{self.get_bilingual('history', 'History', 'السجل')}: {item.get('name', '')}")
+        dialog.geometry("600x400")
+        dialog.configure(fg_color=COLORS['background'])
+        dialog.grab_set()
+
+        text = ctk.CTkTextbox(dialog, wrap='word')
+        text.pack(fill='both', expand=True, padx=20, pady=20)
+        text.insert('end', f"{self.get_bilingual('ledger_quantity', 'Ledger Quantity', 'كمية السجل')}: {current_stock('inventory', item.get('id')):g}  "
+                           f"({self.get_bilingual('quantity', 'Quantity', 'الكمية')}: {item.get('quantity', 0)})\n\n")
+        movements = item_history('inventory', item.get('id'))
+        if not movements:
+            text.insert('end', self.get_bilingual("no_movements", "No stock movements recorded", "لا توجد حركات مخزون مسجلة"))
+        for entry in movements:
+            text.insert('end', f"{entry.get('date', '')[:19]}  {entry.get('type', ''):<11}{entry.get('delta', 0):>+8g}  {entry.get('reference', '')}\n")
+        text.configure(state='disabled')
+
+    def show_reconcile(self):
+        """List the items whose quantity disagrees with the stock ledger and correct them from it"""
+        ensure_ledger()
+        mismatches = {collection: reconcile(collection) for collection in STOCK_COLLECTIONS}
+
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title(self.get_bilingual("reconcile_stock", "Reconcile Stock", "مطابقة المخزون"))
+        dialog.geometry("600x500")
+        dialog.configure(fg_color=COLORS['background'])
+        dialog.grab_set()
+
+        text = ctk.CTkTextbox(dialog, wrap='word')
+        text.pack(fill='both', expand=True, padx=20, pady=20)
+        for collection, rows in mismatches.items():
+            for item, ledger_quantity in rows:
+                text.insert('end', f"{collection}: {item.get('name', '')}  {item.get('quantity', 0)} -> {ledger_quantity:g}\n")
+        if not any(mismatches.values()):
+            text.insert('end', self.get_bilingual("stock_reconciled", "Every quantity matches the ledger", "كل الكميات مطابقة للسجل"))
+            text.configure(state='disabled')
+            return
+        text.configure(state='disabled')
+
+        def correct():
+            corrected = 0
+            for collection, rows in mismatches.items():
+                if not rows:
+                    continue
+                quantities = {item.get('id'): int(quantity) if float(quantity).is_integer() else quantity for item, quantity in rows}
+                bulk_update_documents(collection, [({'id': item_id}, {'$set': {'quantity': quantity}}) for item_id, quantity in quantities.items()])
+                items = self.inventory if collection == 'inventory' else [item for item, quantity in rows]
+                items = [item for item in items if item.get('id') in quantities]
+                for item in items:
+                    item['quantity'] = quantities[item.get('id')]
+                    if collection == 'inventory':
+                        self.update_item_row(item)
+                low_stock_tracker.update_items(collection, items)
+                export_to_excel(collection) # Keep the Excel copy in step so a refresh does not undo the correction
+                corrected += len(quantities)
+            self.update_summary_cards()
+            dialog.destroy()
+            show_success(
+                f"{self.get_bilingual('stock_corrected', 'Quantities corrected from the ledger', 'تم تصحيح الكميات من السجل')}: {corrected}",
+                self.current_language
+            )
+
+        create_styled_button(
+            dialog,
+            text=self.get_bilingual("correct_from_ledger", "Correct from Ledger", "التصحيح من السجل"),
+            style='primary',
+            command=correct
+        ).pack(pady=(0, 20))
+
+    def show_suggested_purchases(self):
+        """Show the reorder suggestions grouped by supplier"""
+        try:
+            grouped = group_by_supplier(suggest_purchases(self.inventory))
+        except Exception as e:
+            show_error(f"Error computing suggested purchases: {str(e)}", self.current_language)
+            return
+
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title(self.get_bilingual("suggested_purchases", "Suggested Purchases", "المشتريات المقترحة"))
+        dialog.geometry("600x500")
+        dialog.configure(fg_color=COLORS['background'])
+        dialog.grab_set()
+
+        text = ctk.CTkTextbox(dialog, wrap='word')
+        text.pack(fill='both', expand=True, padx=20, pady=20)
+        if not grouped:
+            text.insert('end', self.get_bilingual("nothing_to_reorder", "Nothing needs reordering", "لا يوجد ما يحتاج لإعادة الطلب"))
+        for supplier_name, suggestions in grouped.items():
+            text.insert('end', f"{supplier_name or self.get_bilingual('no_supplier', 'No Supplier', 'بدون مورد')}\n")
+            for suggestion in suggestions:
+                text.insert(
+                    'end',
+                    f"  {suggestion['name']}: {suggestion['order_quantity']} "
+                    f"({self.get_bilingual('quantity', 'Quantity', 'الكمية')} {suggestion['quantity']:g}, "
+                    f"{self.get_bilingual('reorder_point', 'Reorder Point', 'نقطة إعادة الطلب')} {suggestion['reorder_point']}, "
+                    f"{suggestion['daily_velocity']}/{self.get_bilingual('day', 'day', 'يوم')})\n"
+                )
+            text.insert('end', "\n")
+        text.configure(state='disabled')
+
+    def show_store_stock(self):
+        """Show the item x store stock matrix with cross-store totals and transfers between stores"""
+        ensure_ledger() # Seeds the store quantities on first use, so the matrix is not empty
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title(self.get_bilingual("stock_by_store", "Stock by Store", "المخزون حسب الفرع"))
+        dialog.geometry("900x600")
+        dialog.configure(fg_color=COLORS['background'])
+        dialog.grab_set()
+
+        collections = {
+            self.get_bilingual("inventory", "Inventory", "المخزون"): 'inventory',
+            self.get_bilingual("products", "Products", "المنتجات"): 'products'
+        }
+        controls = ctk.CTkFrame(dialog, fg_color='transparent')
+        controls.pack(fill='x', padx=20, pady=(20, 10))
+        collection_menu = create_styled_option_menu(controls, values=list(collections), command=lambda _: render())
+        collection_menu.pack(side='left')
+
+        matrix_frame = ctk.CTkScrollableFrame(dialog, orientation='vertical')
+        matrix_frame.pack(fill='both', expand=True, padx=20, pady=10)
+
+        transfer_frame = create_styled_frame(dialog, style='card')
+        transfer_frame.pack(fill='x', padx=20, pady=(10, 20))
+        item_menu = create_styled_option_menu(transfer_frame, values=[""])
+        item_menu.pack(side='left', padx=5, pady=10)
+        from_menu = create_styled_option_menu(transfer_frame, values=[""])
+        from_menu.pack(side='left', padx=5, pady=10)
+        create_styled_label(transfer_frame, text="→", style='body').pack(side='left', padx=5)
+        to_menu = create_styled_option_menu(transfer_frame, values=[""])
+        to_menu.pack(side='left', padx=5, pady=10)
+        quantity_entry = create_styled_entry(
+            transfer_frame,
+            placeholder_text=self.get_bilingual("quantity", "Quantity", "الكمية"),
+            width=80
+        )
+        quantity_entry.pack(side='left', padx=5, pady=10)
+        item_ids = {}
+
+        def render():
+            collection = collections[collection_menu.get()]
+            items = self.inventory if collection == 'inventory' else load_data('products') or []
+            names = {str(item.get('id')): item.get('name', '') for item in items}
+            stores, rows = stock_matrix(collection)
+            for widget in matrix_frame.winfo_children():
+                widget.destroy()
+
+            headers = [self.get_bilingual("item_name", "Item Name", "اسم العنصر")] + stores + [self.get_bilingual("total", "Total", "الإجمالي")]
+            for column, text in enumerate(headers):
+                create_styled_label(matrix_frame, text=text, style='subheading').grid(row=0, column=column, padx=10, pady=5, sticky='w')
+            store_totals = dict.fromkeys(stores, 0)
+            for row_index, row in enumerate(rows, 1):
+                values = [names.get(row['item_id'], row['item_id'])]
+                for store in stores:
+                    quantity = row['stores'].get(store, 0)
+                    store_totals[store] += quantity
+                    values.append(f"{quantity:g}")
+                values.append(f"{row['total']:g}")
+                for column, text in enumerate(values):
+                    create_styled_label(matrix_frame, text=text, style='body').grid(row=row_index, column=column, padx=10, pady=2, sticky='w')
+            totals = [self.get_bilingual("total", "Total", "الإجمالي")] + [f"{store_totals[store]:g}" for store in stores] + [f"{sum(store_totals.values()):g}"]
+            for column, text in enumerate(totals):
+                create_styled_label(matrix_frame, text=text, style='subheading').grid(row=len(rows) + 1, column=column, padx=10, pady=5, sticky='w')
+
+            item_ids.clear()
+            item_ids.update({f"{name} #{item_id}": item_id for item_id, name in names.items()})
+            item_menu.configure(values=list(item_ids) or [""])
+            item_menu.set(next(iter(item_ids), ""))
+            store_names = list(dict.fromkeys(self.get_store_names() + stores))
+            for menu, default in ((from_menu, 0), (to_menu, min(1, len(store_names) - 1))):
+                menu.configure(values=store_names)
+                menu.set(store_names[default])
+
+        def transfer():
+            collection = collections[collection_menu.get()]
+            try:
+                quantity = float(quantity_entry.get())
+            except ValueError:
+                show_error(self.get_bilingual("invalid_quantity", "Please enter a valid quantity", "يرجى إدخال كمية صحيحة"), self.current_language)
+                return
+            quantity = int(quantity) if quantity.is_integer() else quantity
+            try:
+                ensure_ledger()
+                transfer_stock(collection, item_ids.get(item_menu.get(), ""), from_menu.get(), to_menu.get(), quantity)
+            except ValueError as e:
+                show_error(str(e), self.current_language)
+                return
+            render()
+            show_success(self.get_bilingual("transfer_done", "Stock transferred successfully", "تم نقل المخزون بنجاح"), self.current_language)
+
+        create_styled_button(
+            transfer_frame,
+            text=self.get_bilingual("transfer", "Transfer", "نقل"),
+            style='primary',
+            command=transfer
+        ).pack(side='left', padx=5, pady=10)
+        render()
+
+    def show_stock_take(self):
+        """Count stock by scanning barcodes, then commit every difference in one batch"""
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title(self.get_bilingual("stock_take", "Stock Take", "جرد المخزون"))
+        dialog.geometry("700x600")
+        dialog.configure(fg_color=COLORS['background'])
+        dialog.grab_set()
+
+        collections = {
+            self.get_bilingual("inventory", "Inventory", "المخزون"): 'inventory',
+            self.get_bilingual("products", "Products", "المنتجات"): 'products'
+        }
+        controls = ctk.CTkFrame(dialog, fg_color='transparent')
+        controls.pack(fill='x', padx=20, pady=(20, 10))
+        collection_menu = create_styled_option_menu(controls, values=list(collections), command=lambda _: start())
+        collection_menu.pack(side='left')
+        # The count is of one store; it is compared with that store's stock only
+        store_menu = create_styled_option_menu(controls, values=self.get_store_names(), command=lambda _: start())
+        store_menu.set(DEFAULT_STORE)
+        store_menu.pack(side='left', padx=(10, 0))
+        barcode_entry = create_styled_entry(
+            controls,
+            placeholder_text=self.get_bilingual("barcode", "Barcode", "باركود")
+        )
+        barcode_entry.pack(side='left', fill='x', expand=True, padx=(10, 0))
+
+        status_label = create_styled_label(dialog, text="", style='body')
+        status_label.pack(fill='x', padx=20)
+
+        counts_frame = ctk.CTkScrollableFrame(dialog, orientation='vertical')
+        counts_frame.pack(fill='both', expand=True, padx=20, pady=10)
+        # Rows are created on an item's first scan and only their labels change afterwards
+        rows = {}
+        session = {}
+
+        def start():
+            collection = collections[collection_menu.get()]
+            items = self.inventory if collection == 'inventory' else load_data('products') or []
+            session['take'] = StockTake(
+                collection, items, (load_data('products') or []) if collection == 'inventory' else (), store_menu.get()
+            )
+            rows.clear()
+            for widget in counts_frame.winfo_children():
+                widget.destroy()
+            headers = [("item_name", "Item Name"), ("system_quantity", "System"), ("counted", "Counted"), ("difference", "Difference")]
+            for column, (key, default_text) in enumerate(headers):
+                create_styled_label(
+                    counts_frame,
+                    text=self.get_bilingual(key, default_text, default_text),
+                    style='subheading'
+                ).grid(row=0, column=column, padx=10, pady=5, sticky='w')
+            status_label.configure(text="")
+            barcode_entry.focus_set()
+
+        def on_codes(codes):
+            for barcode, count in codes:
+                on_scan(barcode, count)
+
+        def on_scan(barcode, count):
+            take = session['take']
+            scanned = take.scan(barcode, count)
+            if scanned is None:
+                status_label.configure(text=f"{self.get_bilingual('product_not_found', 'Product not found', 'المنتج غير موجود')}: {barcode}")
+                return
+            item, counted = scanned
+            row = rows.get(item.get('id'))
+            if row is None:
+                system = take.system_quantity(item)
+                labels = [
+                    create_styled_label(counts_frame, text=text, style='body')
+                    for text in (item.get('name', ''), f"{system:g}", "", "")
+                ]
+                for column, label in enumerate(labels):
+                    label.grid(row=len(rows) + 1, column=column, padx=10, pady=2, sticky='w')
+                row = rows[item.get('id')] = (labels, system)
+            labels, system = row
+            labels[2].configure(text=f"{counted:g}")
+            labels[3].configure(text=f"{counted - system:+g}")
+            status_label.configure(text=f"{item.get('name', '')}: {counted:g}")
+
+        def commit():
+            take = session['take']
+            if not take.counts:
+                show_error(self.get_bilingual("nothing_counted", "Nothing has been counted", "لم يتم جرد أي شيء"), self.current_language)
+                return
+            adjusted = take.commit()
+            if take.collection == 'inventory':
+                for item in self.inventory:
+                    self.update_item_row(item)
+                self.update_summary_cards()
+            start()
+            show_success(
+                f"{self.get_bilingual('stock_take_committed', 'Stock take saved', 'تم حفظ الجرد')}: {adjusted}",
+                self.current_language
+            )
+
+        ScannerInput(barcode_entry, on_codes)
+        create_styled_button(
+            dialog,
+            text=self.get_bilingual("commit_count", "Commit Count", "اعتماد الجرد"),
+            style='primary',
+            command=commit
+        ).pack(pady=(0, 20))
+        start()
+
     def get_store_names(self):
-        """Load store names from stores.json file"""
-        import json, os
-        stores_file = os.path.join("excel_data", "stores.json")
-        if not os.path.exists(stores_file):
-            return []
-        with open(stores_file, 'r', encoding='utf-8') as f:
-            stores = json.load(f)
-        return [store['name'] for store in stores]
+        """Store names for location menus, from the cached store registry"""
+        return store_registry.names()
 
     def get_bilingual(self, key, default_en, default_ar):
         en = self.LANGUAGES['en'].get(key, default_en)
@@ -514,9 +963,18 @@ class InventoryManager:
         else:
             self.selected_items.discard(item_id)
 
-    def delete_selected_items(self):
-        if not self.selected_items:
+    def get_selected_items(self):
+        """Return the selected items, or show an error and return None when nothing is selected"""
+        items = [item for item in self.inventory if item.get('id') in self.selected_items]
+        if not items:
             show_error(self.get_bilingual("no_selection", "No items selected", "لم يتم تحديد عناصر"), self.current_language)
+            return None
+        return items
+
+    def delete_selected_items(self):
+        """Delete the selected items with one delete_many and drop their rows"""
+        items = self.get_selected_items()
+        if items is None:
             return
         confirm = messagebox.askyesno(
             self.get_bilingual("confirm_delete", "Confirm Delete", "تأكيد الحذف"),
@@ -524,8 +982,72 @@ class InventoryManager:
         )
         if not confirm:
             return
+        item_ids = [item.get('id') for item in items]
+        deleted = delete_documents("inventory", {'id': {'$in': item_ids}})
+        if not deleted:
+            show_error(self.get_bilingual("bulk_update_failed", "Could not update the selected items", "تعذر تحديث العناصر المحددة"), self.current_language)
+            return
+        export_to_excel("inventory") # Keep the Excel copy in step so Refresh does not bring the items back
         self.inventory = [item for item in self.inventory if item.get('id') not in self.selected_items]
-        save_data("inventory", self.inventory)
+        remove_items('inventory', item_ids)
+        for item_id in item_ids:
+            low_stock_tracker.remove('inventory', item_id)
+            for widget in self.item_rows.pop(item_id, {}).get('widgets', []):
+                widget.destroy()
         self.selected_items.clear()
+        self.update_summary_cards()
         show_success(self.get_bilingual("items_deleted", "Selected items deleted successfully", "تم حذف العناصر المحددة بنجاح"), self.current_language)
-        self.refresh_inventory()
+
+    def bulk_set_field(self, field, value):
+        """Set the location or category of every selected item with one update_many"""
+        items = self.get_selected_items()
+        if items is None:
+            return
+        if not value:
+            show_error(self.get_bilingual("invalid_item", "Please fill all fields correctly", "يرجى ملء جميع الحقون الصحيحة"), self.current_language)
+            return
+        if field == 'location':
+            ensure_ledger()
+            movements = relocation_movements('inventory', items, value)
+        # 0 modified just means the items already had this value
+        if update_documents("inventory", {'id': {'$in': [item.get('id') for item in items]}}, {'$set': {field: value}}) is None:
+            show_error(self.get_bilingual("bulk_update_failed", "Could not update the selected items", "تعذر تحديث العناصر المحددة"), self.current_language)
+            return
+        if field == 'location':
+            record_movements(movements)
+        export_to_excel("inventory")
+        for item in items:
+            item[field] = value
+            self.update_item_row(item)
+        show_success(self.get_bilingual("items_updated", "Selected items updated successfully", "تم تحديث العناصر المحددة بنجاح"), self.current_language)
+
+    def bulk_adjust_quantity(self, amount):
+        """Add ±N to the quantity of every selected item with one update_many and record the adjustments"""
+        items = self.get_selected_items()
+        if items is None:
+            return
+        try:
+            delta = float(amount)
+            quantities = [float(item.get('quantity', 0) or 0) for item in items]
+        except (ValueError, TypeError):
+            show_error(self.get_bilingual("invalid_quantity", "Please enter a valid quantity", "يرجى إدخال كمية صحيحة"), self.current_language)
+            return
+        delta = int(delta) if delta.is_integer() else delta
+        if not delta or any(quantity + delta < 0 for quantity in quantities):
+            show_error(self.get_bilingual("invalid_quantity", "Please enter a valid quantity", "يرجى إدخال كمية صحيحة"), self.current_language)
+            return
+
+        ensure_ledger()
+        item_ids = [item.get('id') for item in items]
+        if not update_documents("inventory", {'id': {'$in': item_ids}}, {'$inc': {'quantity': delta}}):
+            show_error(self.get_bilingual("bulk_update_failed", "Could not update the selected items", "تعذر تحديث العناصر المحددة"), self.current_language)
+            return
+        record_movements([movement('inventory', item.get('id'), 'adjustment', delta, 'bulk', item_store(item)) for item in items])
+        for item, quantity in zip(items, quantities):
+            item['quantity'] = quantity + delta
+        low_stock_tracker.update_items('inventory', items)
+        export_to_excel("inventory")
+        for item in items:
+            self.update_item_row(item)
+        self.update_summary_cards()
+        show_success(self.get_bilingual("items_updated", "Selected items updated successfully", "تم تحديث العناصر المحددة بنجاح"), self.current_language)
@@ -0,0 +1,128 @@
+from data_handler import find_data, count_data, update_documents
+
+TRACKED_COLLECTIONS = ['inventory', 'products']
+
+# Per-item threshold, evaluated by MongoDB; a missing min_quantity means only out of stock counts
+LOW_STOCK_EXPR = {'$lte': ['$quantity', {'$ifNull': ['$min_quantity', 0]}]}
+
+def stock_status(item):
+    """Return (quantity, min_quantity, is_low, is_out) for an inventory item or product"""
+    try:
+        quantity = float(item.get('quantity', 0) or 0)
+        min_quantity = float(item.get('min_quantity', 0) or 0)
+    except (ValueError, TypeError):
+        return None
+    return quantity, min_quantity, quantity <= min_quantity, quantity <= 0
+
+def refresh_low_stock_flags(collection):
+    """Recompute the low_stock flag of every document server-side with $expr"""
+    flagged = update_documents(collection, {'$expr': LOW_STOCK_EXPR, 'low_stock': {'$ne': True}}, {'$set': {'low_stock': True}})
+    cleared = update_documents(collection, {'$expr': {'$not': [LOW_STOCK_EXPR]}, 'low_stock': True}, {'$unset': {'low_stock': ''}})
+    print(f"[DEBUG] Low stock flags on {collection}: {flagged} set, {cleared} cleared")
+
+def set_low_stock_flag(collection, item, is_low):
+    """Keep one document's flag (and the in-memory copy that save_data will write) in step"""
+    if is_low:
+        item['low_stock'] = True
+    else:
+        item.pop('low_stock', None)
+    if item.get('id') is not None:
+        update = {'$set': {'low_stock': True}} if is_low else {'$unset': {'low_stock': ''}}
+        update_documents(collection, {'id': item.get('id')}, update)
+
+class LowStockTracker:
+    """Low and out-of-stock items per collection, kept current as quantities change.
+
+    Each collection is loaded once on first use from the flagged documents
+    (partial index on low_stock); afterwards every quantity change updates the
+    sets and the item's flag, so counts and alert lists are read in O(1).
+    """
+    def __init__(self):
+        self.low = {collection: {} for collection in TRACKED_COLLECTIONS}  # item_id -> item
+        self.out = {collection: set() for collection in TRACKED_COLLECTIONS}
+        self.totals = {collection: 0 for collection in TRACKED_COLLECTIONS}
+        self.loaded = set()
+
+    def load(self, collection):
+        """(Re)build a collection's sets from the documents MongoDB flags as low"""
+        refresh_low_stock_flags(collection)
+        self.low[collection] = {}
+        self.out[collection] = set()
+        for item in find_data(collection, {'low_stock': True}):
+            self._track(collection, item)
+        self.totals[collection] = count_data(collection)
+        self.loaded.add(collection)
+        print(f"[DEBUG] Tracking {len(self.low[collection])} low stock {collection} items")
+
+    def _ensure_loaded(self, collection):
+        if collection not in self.loaded:
+            self.load(collection)
+
+    def _track(self, collection, item):
+        item_id = str(item.get('id'))
+        status = stock_status(item)
+        self.low[collection].pop(item_id, None)
+        self.out[collection].discard(item_id)
+        if status is None:
+            return False
+        quantity, min_quantity, is_low, is_out = status
+        if is_low:
+            self.low[collection][item_id] = item
+        if is_out:
+            self.out[collection].add(item_id)
+        return is_low
+
+    def update(self, collection, item):
+        """Re-evaluate one item after its quantity or minimum changed"""
+        self._ensure_loaded(collection)
+        was_low = str(item.get('id')) in self.low[collection]
+        is_low = self._track(collection, item)
+        if is_low != was_low or bool(item.get('low_stock')) != is_low:
+            set_low_stock_flag(collection, item, is_low)
+
+    def update_items(self, collection, items):
+        """Re-evaluate several items at once, correcting their flags with at most two update_many calls"""
+        self._ensure_loaded(collection)
+        flagged, cleared = [], []
+        for item in items:
+            is_low = self._track(collection, item)
+            if bool(item.get('low_stock')) != is_low:
+                (flagged if is_low else cleared).append(item)
+        for item in flagged:
+            item['low_stock'] = True
+        for item in cleared:
+            item.pop('low_stock', None)
+        if flagged:
+            update_documents(collection, {'id': {'$in': [item.get('id') for item in flagged]}}, {'$set': {'low_stock': True}})
+        if cleared:
+            update_documents(collection, {'id': {'$in': [item.get('id') for item in cleared]}}, {'$unset': {'low_stock': ''}})
+
+    def add(self, collection, item):
+        """Track a newly created item (already saved by the caller)"""
+        if collection in self.loaded:
+            self.totals[collection] += 1
+        else:
+            self.load(collection) # The count already includes the new item
+        self.update(collection, item)
+
+    def remove(self, collection, item_id):
+        """Stop tracking a deleted item (already deleted by the caller)"""
+        if collection in self.loaded:
+            self.totals[collection] = max(0, self.totals[collection] - 1)
+        else:
+            self.load(collection) # The count already leaves the item out
+        self.low[collection].pop(str(item_id), None)
+        self.out[collection].discard(str(item_id))
+
+    def counts(self, collection):
+        """Return (total, low, out_of_stock) counts"""
+        self._ensure_loaded(collection)
+        return self.totals[collection], len(self.low[collection]), len(self.out[collection])
+
+    def low_items(self, collection):
+        """Return the items currently at low stock"""
+        self._ensure_loaded(collection)
+        return list(self.low[collection].values())
+
+# Shared by every screen of the running app
+low_stock_tracker = LowStockTracker()
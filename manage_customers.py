@@ -3,6 +3,7 @@ import customtkinter as ctk
 from theme import create_styled_frame, create_styled_label, create_styled_button, create_styled_entry, COLORS, FONTS
 # Import data handling functions
 from data_handler import load_data, save_data, get_next_id
+from customer_segments import SEGMENT_LABELS, load_customer_segments, refresh_customer_segments
 from ui_elements import show_error, show_success
 
 class CustomerManager:
@@ -12,6 +13,7 @@ class CustomerManager:
         self.LANGUAGES = languages
         self.back_callback = back_callback
         self.customers = [] # We will load data here later
+        self.segments = {} # Persisted RFM scores keyed by customer id
 
         # This will be the main frame for the customer management section
         self.frame = None
@@ -60,6 +62,15 @@ class CustomerManager:
         )
         add_customer_button.pack(side='right', padx=20, pady=20)
 
+        # Recompute RFM segments from the sales history
+        update_segments_button = create_styled_button(
+            header_frame,
+            text=self.get_bilingual("update_segments", "Update Segments", "تحديث الشرائح"),
+            style='outline',
+            command=self.update_segments
+        )
+        update_segments_button.pack(side='right', padx=(20, 0), pady=20)
+
         # Search and Filter section
         search_frame = create_styled_frame(self.frame, style='card')
         search_frame.pack(fill='x', padx=20, pady=(0, 20))
@@ -89,6 +100,17 @@ class CustomerManager:
         self.filter_option_menu.set(filter_options[0]) # Set default to All Fields
         self.filter_option_menu.pack(side='left', padx=(0, 20), pady=20)
 
+        # Filter by RFM segment
+        self.all_segments_label = self.get_bilingual("all_segments", "All Segments", "كل الشرائح")
+        self.segment_by_label = {self.segment_label(key): key for key in SEGMENT_LABELS}
+        self.segment_option_menu = ctk.CTkOptionMenu(
+            search_frame,
+            values=[self.all_segments_label] + list(self.segment_by_label),
+            command=self.filter_customers
+        )
+        self.segment_option_menu.set(self.all_segments_label)
+        self.segment_option_menu.pack(side='left', padx=(0, 20), pady=20)
+
         filter_button = create_styled_button(
             search_frame,
             text=self.LANGUAGES[self.current_language].get("filter", "Filter"),
@@ -115,7 +137,8 @@ class CustomerManager:
         """Load customer data from the database"""
         print("[DEBUG] Loading customer data...")
         self.customers = load_data('customers') or []
-        print(f"[DEBUG] Loaded {len(self.customers)} customers")
+        self.segments = load_customer_segments()
+        print(f"[DEBUG] Loaded {len(self.customers)} customers and {len(self.segments)} segments")
 
 
     def save_customers(self):
@@ -131,7 +154,7 @@ class CustomerManager:
 
         # Sort the customer list
         if self.sort_column:
-            customer_list = sorted(customer_list, key=lambda x: x.get(self.sort_column, ''), reverse=(self.sort_order == 'desc'))
+            customer_list = sorted(customer_list, key=self.sort_value, reverse=(self.sort_order == 'desc'))
 
         # Clear existing list
         for widget in self.scrollable_customer_list.winfo_children():
@@ -154,6 +177,7 @@ class CustomerManager:
             ("phone", "Phone"),
             ("address", "Address"),
             ("notes", "Notes"),
+            ("segment", "Segment"),
             ("actions", "Actions")
         ]
 
@@ -217,9 +241,18 @@ class CustomerManager:
             )
             notes_label.grid(row=i, column=5, padx=10, pady=10, sticky='w')
 
+            # RFM segment
+            segment = self.get_segment(customer)
+            segment_label = create_styled_label(
+                self.scrollable_customer_list,
+                text=f"{self.segment_label(segment['segment'])} ({segment['rfm_score']})" if segment else "-",
+                style='body'
+            )
+            segment_label.grid(row=i, column=6, padx=10, pady=10, sticky='w')
+
             # Action buttons (placeholder)
             actions_frame = create_styled_frame(self.scrollable_customer_list, style='card')
-            actions_frame.grid(row=i, column=6, padx=10, pady=10, sticky='w')
+            actions_frame.grid(row=i, column=7, padx=10, pady=10, sticky='w')
 
             edit_button = create_styled_button(
                 actions_frame,
@@ -469,6 +502,12 @@ class CustomerManager:
                 # Should not happen if options and map are correct
                 filtered_customers = self.customers # Return all if filter key not found
 
+        # Narrow down to the selected segment
+        segment_key = self.segment_by_label.get(self.segment_option_menu.get())
+        if segment_key:
+            filtered_customers = [customer for customer in filtered_customers if
+                                  (self.get_segment(customer) or {}).get('segment') == segment_key]
+
         # Sort the filtered list before displaying
         self.display_customers(filtered_customers)
 
@@ -485,6 +524,32 @@ class CustomerManager:
         # Re-display the customers with the new sorting
         self.display_customers(self.customers) # Pass the full list to be sorted and displayed
 
+    def get_segment(self, customer):
+        """Return the persisted RFM scores for a customer (sales recorded by name fall back to the name)"""
+        return self.segments.get(str(customer.get('id'))) or self.segments.get(customer.get('name', ''))
+
+    def segment_label(self, segment_key):
+        label_en, label_ar = SEGMENT_LABELS.get(segment_key, (segment_key, segment_key))
+        return label_en if self.current_language == 'en' else label_ar
+
+    def sort_value(self, customer):
+        """Sort key for the current column; segments sort from best to worst"""
+        if self.sort_column == 'segment':
+            segment = self.get_segment(customer)
+            segment_order = list(SEGMENT_LABELS)
+            return segment_order.index(segment['segment']) if segment and segment['segment'] in segment_order else len(segment_order)
+        return customer.get(self.sort_column, '')
+
+    def update_segments(self):
+        """Recompute RFM segments from the full sales history"""
+        try:
+            refresh_customer_segments()
+            self.segments = load_customer_segments()
+            self.filter_customers()
+            show_success(self.get_bilingual("segments_updated", "Customer segments updated", "تم تحديث شرائح الزبائن"), self.current_language)
+        except Exception as e:
+            show_error(f"Error updating segments: {str(e)}", self.current_language)
+
     def get_bilingual(self, key, default_en, default_ar):
         en = self.LANGUAGES['en'].get(key, default_en)
         ar = self.LANGUAGES['ar'].get(key, default_ar)
@@ -1,14 +1,13 @@
 import customtkinter as ctk
-import os
-import json
 from theme import create_styled_button, create_styled_entry, create_styled_frame, create_styled_label
+from ui_elements import show_error
+from store_registry import store_registry
 
 class ManageStores:
     def __init__(self, root, LANGUAGES, back_callback):
         self.root = root
         self.LANGUAGES = LANGUAGES
         self.back_callback = back_callback
-        self.stores_file = os.path.join("excel_data", "stores.json")
         self.stores = self.load_stores()
 
     def get_bilingual(self, key, default_en, default_ar):
@@ -17,16 +16,10 @@ class ManageStores:
         return f"{en} / {ar}"
 
     def load_stores(self):
-        if not os.path.exists(self.stores_file):
-            return []
-        with open(self.stores_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
-    def save_stores(self):
-        with open(self.stores_file, 'w', encoding='utf-8') as f:
-            json.dump(self.stores, f, ensure_ascii=False, indent=2)
+        return store_registry.active_stores()
 
     def manage_stores(self):
+        self.stores = self.load_stores()
         for widget in self.root.winfo_children():
             widget.destroy()
         main_frame = create_styled_frame(self.root, style='section')
@@ -73,14 +66,13 @@ class ManageStores:
         name = self.new_store_entry.get().strip()
         if not name:
             return
-        new_id = max([s['id'] for s in self.stores], default=0) + 1
-        self.stores.append({"id": new_id, "name": name})
-        self.save_stores()
+        if store_registry.add(name) is None:
+            show_error(self.get_bilingual("store_exists", "A store with this name already exists", "يوجد مخزن بهذا الاسم بالفعل"))
+            return
         self.manage_stores()
 
     def delete_store(self, idx):
-        del self.stores[idx]
-        self.save_stores()
+        store_registry.delete(self.stores[idx]['id'])
         self.manage_stores()
 
     def edit_store_dialog(self, idx):
@@ -96,7 +88,8 @@ class ManageStores:
     def save_edit_store(self, idx, name, dialog):
         if not name.strip():
             return
-        self.stores[idx]['name'] = name.strip()
-        self.save_stores()
+        if name.strip() != self.stores[idx]['name'] and not store_registry.rename(self.stores[idx]['id'], name):
+            show_error(self.get_bilingual("store_exists", "A store with this name already exists", "يوجد مخزن بهذا الاسم بالفعل"))
+            return
         dialog.destroy()
         self.manage_stores() 
\ No newline at end of file
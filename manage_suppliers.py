@@ -10,6 +10,7 @@ from theme import (
     create_styled_entry, create_styled_frame,
     create_styled_label, create_styled_option_menu
 )
+from replenishment import DEFAULT_LEAD_TIME_DAYS
 
 class ManageSuppliers:
     def __init__(self, root, current_language, languages, back_callback):
@@ -277,6 +278,17 @@ class ManageSuppliers:
         
         phone_entry = create_styled_entry(form_frame)
         phone_entry.pack(fill='x', padx=20, pady=(0, 20))
+
+        # Lead time (optional)
+        lead_time_label = create_styled_label(
+            form_frame,
+            text=self.get_bilingual("lead_time_days", "Lead Time (days)", "مدة التوريد (أيام)"),
+            style='subheading'
+        )
+        lead_time_label.pack(pady=(0, 5))
+
+        lead_time_entry = create_styled_entry(form_frame, placeholder_text=str(DEFAULT_LEAD_TIME_DAYS))
+        lead_time_entry.pack(fill='x', padx=20, pady=(0, 20))
         
         # Status
         status_label = create_styled_label(
@@ -303,16 +315,24 @@ class ManageSuppliers:
                 contact_entry.get(),
                 email_entry.get(),
                 phone_entry.get(),
-                status_menu.get()
+                status_menu.get(),
+                lead_time_entry.get()
             )
         )
         save_button.pack(fill='x', padx=20, pady=(0, 20))
 
-    def save_supplier(self, dialog, name, contact, email, phone, status):
+    def save_supplier(self, dialog, name, contact, email, phone, status, lead_time=""):
         """Save a new supplier"""
         if not all([name, contact, email, phone]):
             show_error("Please fill all fields", self.current_language)
             return
+        try:
+            lead_time_days = int(lead_time) if str(lead_time).strip() else DEFAULT_LEAD_TIME_DAYS
+            if lead_time_days < 0:
+                raise ValueError
+        except ValueError:
+            show_error(self.get_bilingual("invalid_lead_time", "Lead time must be a whole number of days", "مدة التوريد يجب أن تكون عددا صحيحا من الأيام"), self.current_language)
+            return
             
         # Create new supplier
         supplier = {
@@ -321,7 +341,8 @@ class ManageSuppliers:
             'contact': contact,
             'email': email,
             'phone': phone,
-            'status': status
+            'status': status,
+            'lead_time_days': lead_time_days
         }
         
         # Add to suppliers list
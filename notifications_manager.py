@@ -4,8 +4,12 @@ from theme import create_styled_frame, create_styled_label, create_styled_button
 
 # Import data handling functions
 from data_handler import load_data # Import load_data
+from anomaly_detection import detect_anomalies, load_recent_anomalies
+from demand_forecast import ForecastIndex
+from replenishment import suggest_purchases, group_by_supplier
+from low_stock import low_stock_tracker
+from shrinkage import TOP_DISCREPANCIES, shrinkage_report
 from datetime import datetime, timedelta # Import for date calculations
-import statistics # For dynamic low stock threshold
 
 class NotificationsManager:
     def __init__(self, root, current_language, languages, back_callback, callbacks):
@@ -23,46 +27,70 @@ class NotificationsManager:
         self.bills_data = []
         self.active_alerts = []
 
-        # Calculate initial low stock threshold (can be made configurable later)
-        self.low_stock_threshold = 10 # Default value
-        self._calculate_low_stock_threshold()
-
-    def _calculate_low_stock_threshold(self):
-        """Calculate a dynamic low stock threshold based on inventory median quantity"""
-        self.inventory_data = load_data('inventory') or []
-        quantities = [int(item.get('quantity', 0)) for item in self.inventory_data if item.get('quantity')]
-        if quantities:
-            self.low_stock_threshold = max(1, int(statistics.median(quantities) * 0.25))
-            print(f"[DEBUG] Calculated dynamic low stock threshold: {self.low_stock_threshold}")
-        else:
-            self.low_stock_threshold = 10 # Fallback to default
-            print(f"[DEBUG] No inventory data, using default low stock threshold: {self.low_stock_threshold}")
-
     def check_low_stock(self):
-        """Check inventory for items below the low stock threshold"""
+        """Alert on the inventory items and products the low stock tracker currently holds"""
         low_stock_alerts = []
-        self.inventory_data = load_data('inventory') or [] # Reload data to be current
 
-        for item in self.inventory_data:
-            try:
-                quantity = int(item.get('quantity', 0))
+        for collection in ['inventory', 'products']:
+            for item in low_stock_tracker.low_items(collection):
+                quantity = item.get('quantity', 0)
+                threshold = item.get('min_quantity', 0)
                 item_name = item.get('name', self.LANGUAGES[self.current_language].get("unnamed_item", "Unnamed Item"))
-                if quantity <= self.low_stock_threshold:
-                    alert_message = self.LANGUAGES[self.current_language].get(
-                        "low_stock_alert",
-                        f"Low stock for {item_name}. Only {quantity} left. (Threshold: {self.low_stock_threshold})"
-                    ).format(item_name=item_name, quantity=quantity, threshold=self.low_stock_threshold)
-                    low_stock_alerts.append({
-                        'type': 'low_stock',
-                        'message': alert_message,
-                        'item_id': item.get('id'), # Include relevant IDs
-                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    })
-            except (ValueError, TypeError):
-                continue # Skip items with invalid quantity data
+                alert_message = self.LANGUAGES[self.current_language].get(
+                    "low_stock_alert",
+                    f"Low stock for {item_name}. Only {quantity} left. (Threshold: {threshold})"
+                ).format(item_name=item_name, quantity=quantity, threshold=threshold)
+                low_stock_alerts.append({
+                    'type': 'low_stock',
+                    'message': alert_message,
+                    'item_id': item.get('id'), # Include relevant IDs
+                    'collection': collection,
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                })
 
         return low_stock_alerts
 
+    def check_stock_out_forecasts(self, days_threshold=7):
+        """Check inventory for items the demand forecast expects to run out within the next days"""
+        stock_out_alerts = []
+        forecasts = ForecastIndex.load()
+        today = datetime.now().date()
+
+        for item in self.inventory_data:
+            stock_out_date = forecasts.stock_out_date(item.get('quantity', 0), item.get('product_id'), item.get('name'))
+            if stock_out_date is None or (stock_out_date - today).days > days_threshold:
+                continue
+            item_name = item.get('name', self.LANGUAGES[self.current_language].get("unnamed_item", "Unnamed Item"))
+            days_left = (stock_out_date - today).days
+            alert_message = self.LANGUAGES[self.current_language].get(
+                "stock_out_forecast_alert",
+                f"{item_name} is expected to run out in {days_left} days ({stock_out_date})."
+            ).format(item_name=item_name, days_left=days_left, stock_out_date=stock_out_date)
+            stock_out_alerts.append({
+                'type': 'stock_out_forecast',
+                'message': alert_message,
+                'item_id': item.get('id'), # Include relevant IDs
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
+
+        return stock_out_alerts
+
+    def check_reorders(self):
+        """Summarize the suggested purchase list as a single alert"""
+        plan = suggest_purchases(self.inventory_data)
+        if not plan:
+            return []
+        supplier_count = len(group_by_supplier(plan))
+        alert_message = self.LANGUAGES[self.current_language].get(
+            "reorder_alert",
+            f"{len(plan)} items should be reordered from {supplier_count} suppliers."
+        ).format(item_count=len(plan), supplier_count=supplier_count)
+        return [{
+            'type': 'reorder',
+            'message': alert_message,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }]
+
     def check_upcoming_bills(self, days_threshold=7):
         """Check for bills due within the next specified number of days"""
         upcoming_bills_alerts = []
@@ -99,13 +127,63 @@ class NotificationsManager:
 
         return upcoming_bills_alerts
 
+    def check_sales_anomalies(self, days_threshold=7):
+        """Scan the days since the last check for unusual sales and alert on the recent findings"""
+        detect_anomalies() # Incremental: only processes days not scanned yet
+        anomaly_alerts = []
+
+        for anomaly in load_recent_anomalies(days_threshold):
+            subject = anomaly.get('product') if anomaly.get('kind') == 'product' else self.LANGUAGES[self.current_language].get("revenue", "Revenue")
+            direction = self.LANGUAGES[self.current_language].get(anomaly.get('direction', ''), anomaly.get('direction', ''))
+            alert_message = self.LANGUAGES[self.current_language].get(
+                "sales_anomaly_alert",
+                f"Unusual {direction} on {anomaly.get('day')}: {subject} was {anomaly.get('value')} (expected about {anomaly.get('expected')}, z={anomaly.get('z_score')})."
+            ).format(direction=direction, day=anomaly.get('day'), subject=subject,
+                     value=anomaly.get('value'), expected=anomaly.get('expected'), z_score=anomaly.get('z_score'))
+            anomaly_alerts.append({
+                'type': 'sales_anomaly',
+                'message': alert_message,
+                'product_id': anomaly.get('product_id'), # Include relevant IDs
+                'timestamp': f"{anomaly.get('day')} 23:59:59"
+            })
+
+        return anomaly_alerts
+
+    def check_shrinkage(self, days_threshold=30):
+        """Alert on the largest shortfalls between expected stock and the counts of the last days"""
+        today = datetime.now().date()
+        shrinkage_alerts = []
+
+        for row in shrinkage_report(today - timedelta(days=days_threshold), today)[:TOP_DISCREPANCIES]:
+            if row['shrinkage'] <= 0:
+                break # Rows come largest shortfall first
+            alert_message = self.LANGUAGES[self.current_language].get(
+                "shrinkage_alert",
+                f"Shrinkage: {row['name']} at {row['store']} counted {row['counted']:g}, expected {row['expected']:g} ({row['shrinkage']:g} missing)."
+            ).format(name=row['name'], store=row['store'], counted=row['counted'],
+                     expected=row['expected'], shrinkage=row['shrinkage'])
+            shrinkage_alerts.append({
+                'type': 'shrinkage',
+                'message': alert_message,
+                'item_id': row['item_id'],
+                'collection': row['collection'],
+                'timestamp': row['counted_at']
+            })
+
+        return shrinkage_alerts
+
     def generate_alerts(self):
         """Generate a combined list of all active alerts"""
         print("[DEBUG] Generating alerts...")
         low_stock = self.check_low_stock()
+        self.inventory_data = load_data('inventory') or [] # The forecast and reorder checks need every item
+        stock_outs = self.check_stock_out_forecasts()
+        reorders = self.check_reorders()
         upcoming_bills = self.check_upcoming_bills() # Check bills due in next 7 days
+        sales_anomalies = self.check_sales_anomalies() # Unusual days in the last 7 days
+        shrinkage = self.check_shrinkage() # Largest count shortfalls in the last 30 days
 
-        self.active_alerts = low_stock + upcoming_bills
+        self.active_alerts = low_stock + stock_outs + reorders + upcoming_bills + sales_anomalies + shrinkage
         # Sort alerts by timestamp if desired (optional)
         self.active_alerts.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
         print(f"[DEBUG] Generated {len(self.active_alerts)} active alerts")
@@ -203,7 +281,13 @@ class NotificationsManager:
         print(f"[DEBUG] Alert clicked: {alert.get('type')}")
         alert_type = alert.get('type', '').lower()
 
-        if alert_type == 'low_stock':
+        if alert_type == 'low_stock' and alert.get('collection') == 'products':
+            # Navigate to Product Manager
+            if 'manage_products' in self.callbacks:
+                self.callbacks['manage_products']()
+            else:
+                print("[ERROR] Product Manager callback not available.")
+        elif alert_type in ('low_stock', 'stock_out_forecast', 'reorder'):
             # Navigate to Inventory Manager
             if 'manage_inventory' in self.callbacks:
                 self.callbacks['manage_inventory']()
@@ -215,4 +299,10 @@ class NotificationsManager:
                 self.callbacks['expenses_bills']()
             else:
                 print("[ERROR] Expenses and Bills callback not available.")
+        elif alert_type in ('sales_anomaly', 'shrinkage'):
+            # Navigate to Reporting and Analytics
+            if 'reporting_analytics' in self.callbacks:
+                self.callbacks['reporting_analytics']()
+            else:
+                print("[ERROR] Reporting and Analytics callback not available.")
         # Add handling for other alert types here in the future 
\ No newline at end of file
@@ -11,6 +11,10 @@ from theme import (
     create_styled_entry, create_styled_frame,
     create_styled_label, create_styled_option_menu
 )
+from stock_ledger import ensure_ledger, record_movement, record_movements, quantity_change_movement, relocation_movements, seed_untracked_items
+from store_stock import remove_items
+from store_registry import store_registry
+from low_stock import low_stock_tracker
 import os
 from datetime import datetime
 from PIL import Image
@@ -38,6 +42,7 @@ class ProductManager:
 
             # Load products from database
             self.products = load_data("products") or []
+            seed_untracked_items('products', self.products) # Imported products start with their quantity at their location
             print(f"[DEBUG] Loaded products count: {len(self.products)}")
             print(f"[DEBUG] Loaded products: {self.products}")
             
@@ -393,12 +398,7 @@ class ProductManager:
             style='subheading'
         )
         location_label.pack(pady=(0, 5))
-        stores_file = os.path.join("excel_data", "stores.json")
-        locations = ["المحل / Shop"]
-        if os.path.exists(stores_file):
-            with open(stores_file, 'r', encoding='utf-8') as f:
-                stores = json.load(f)
-                locations += [store['name'] for store in stores]
+        locations = store_registry.names()
         location_menu = create_styled_option_menu(
             form_frame,
             values=locations
@@ -704,12 +704,7 @@ class ProductManager:
             style='subheading'
         )
         location_label.pack(pady=(0, 5))
-        stores_file = os.path.join("excel_data", "stores.json")
-        locations = ["المحل / Shop"]
-        if os.path.exists(stores_file):
-            with open(stores_file, 'r', encoding='utf-8') as f:
-                stores = json.load(f)
-                locations += [store['name'] for store in stores]
+        locations = store_registry.names()
         location_menu = create_styled_option_menu(
             form_frame,
             values=locations
@@ -840,8 +835,11 @@ class ProductManager:
             'retail_quantity': retail_quantity,
             'is_wholesale_supplier': is_wholesale_supplier
         }
+        ensure_ledger()
         self.products.append(new_product)
         save_data("products", self.products)
+        record_movement('products', new_product['id'], 'restock', quantity, 'opening', location)
+        low_stock_tracker.add('products', new_product)
         # Notify RecordSale to refresh its list
         if self.record_sale_instance:
             self.record_sale_instance.refresh_products()
@@ -860,8 +858,15 @@ class ProductManager:
             show_error(self.get_bilingual("invalid_value", "Invalid value. Please enter a number.", "قيمة غير صالحة. يرجى إدخال رقم."), "en")
             return
         # Find the product by old_name and update
+        ensure_ledger()
+        quantity_change = None
+        movements = []
         for product in self.products:
             if product.get('name', '') == old_name:
+                # Stock held at the old location moves with the product, then the edit applies at the new one
+                movements = relocation_movements('products', [product], location)
+                quantity_change = quantity_change_movement('products', product.get('id'), product.get('quantity', 0), quantity, 'edit', location)
+                updated_product = product
                 product['name'] = name
                 product['type'] = type
                 product['flavor'] = flavor
@@ -873,6 +878,10 @@ class ProductManager:
                 product['is_wholesale_supplier'] = is_wholesale_supplier
                 break
         save_data("products", self.products)
+        if quantity_change:
+            movements.append(quantity_change)
+            low_stock_tracker.update('products', updated_product)
+        record_movements(movements)
         # Notify RecordSale to refresh its list
         if self.record_sale_instance:
             self.record_sale_instance.refresh_products()
@@ -890,6 +899,8 @@ class ProductManager:
             try:
                 self.products.remove(product)
                 save_data("products", self.products)
+                low_stock_tracker.remove('products', product.get('id'))
+                remove_items('products', [product.get('id')])
                 # Notify RecordSale to refresh its list
                 if self.record_sale_instance:
                     self.record_sale_instance.refresh_products()
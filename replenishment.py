@@ -0,0 +1,110 @@
+import numpy as np
+from datetime import date, timedelta
+from data_handler import load_data
+from sales_cube import ensure_cube, load_product_day_matrix
+
+VELOCITY_DAYS = 28  # Recent sales window the velocity is measured on
+DEFAULT_LEAD_TIME_DAYS = 3  # Used when a supplier has no lead time recorded
+REVIEW_DAYS = 7  # Days of demand an order should cover beyond the reorder point
+SERVICE_Z = 1.65  # Safety stock for a ~95% chance of not running out during the lead time
+NO_SUPPLIER = ""
+
+def latest_bill_suppliers(bills):
+    """Return {product_id: (supplier_id, supplier_name)} from the most recent bill of each product"""
+    latest = {}
+    for bill in bills:
+        product_id = bill.get('product_id')
+        if product_id in (None, ''):
+            continue
+        bill_date = str(bill.get('date', ''))
+        current = latest.get(str(product_id))
+        if current is None or bill_date >= current[0]:
+            latest[str(product_id)] = (bill_date, str(bill.get('supplier_id', '')), bill.get('supplier_name', ''))
+    return {product_id: (supplier_id, name) for product_id, (bill_date, supplier_id, name) in latest.items()}
+
+def compute_reorder_plan(items, product_ids, names, matrix, bills, suppliers):
+    """Compute reorder points and order quantities for every inventory item in one vectorized pass.
+
+    items are inventory documents; matrix holds one row of recent daily sales
+    per product in product_ids. Items are matched to products by product_id
+    or name. Returns one suggestion per item that is at or below its reorder point.
+    """
+    if not items:
+        return []
+    row_by_id = {product_id: row for row, product_id in enumerate(product_ids)}
+    row_by_name = {names[product_id]: row for product_id, row in row_by_id.items()}
+    bill_suppliers = latest_bill_suppliers(bills)
+    lead_times = {str(supplier.get('id', '')): supplier.get('lead_time_days') for supplier in suppliers}
+
+    # One extra all-zero row for items that never sold
+    days = max(1, matrix.shape[1])
+    velocity = np.append(matrix.mean(axis=1) if matrix.size else np.zeros(len(product_ids)), 0.0)
+    deviation = np.append(matrix.std(axis=1) if matrix.size else np.zeros(len(product_ids)), 0.0)
+
+    rows = np.empty(len(items), dtype=np.int64)
+    quantity = np.zeros(len(items))
+    min_quantity = np.zeros(len(items))
+    lead_time = np.full(len(items), float(DEFAULT_LEAD_TIME_DAYS))
+    item_suppliers = []
+    for index, item in enumerate(items):
+        product_id = str(item.get('product_id', '')) if item.get('product_id') not in (None, '') else None
+        row = row_by_id.get(product_id) if product_id is not None else None
+        rows[index] = row if row is not None else row_by_name.get(item.get('name'), len(product_ids))
+        try:
+            quantity[index] = float(item.get('quantity', 0) or 0)
+            min_quantity[index] = float(item.get('min_quantity', 0) or 0)
+        except (ValueError, TypeError):
+            pass
+        product_key = product_ids[rows[index]] if rows[index] < len(product_ids) else product_id
+        supplier_id, supplier_name = bill_suppliers.get(product_key, (NO_SUPPLIER, NO_SUPPLIER))
+        try:
+            lead_time[index] = float(lead_times.get(supplier_id) or DEFAULT_LEAD_TIME_DAYS)
+        except (ValueError, TypeError):
+            pass
+        item_suppliers.append((supplier_id, supplier_name))
+
+    item_velocity = velocity[rows]
+    safety_stock = SERVICE_Z * deviation[rows] * np.sqrt(lead_time)
+    reorder_point = np.maximum(np.ceil(item_velocity * lead_time + safety_stock), min_quantity)
+    order_quantity = np.maximum(np.ceil(reorder_point + item_velocity * REVIEW_DAYS - quantity), 0)
+    needs_order = (quantity <= reorder_point) & (order_quantity > 0)
+
+    plan = []
+    for index in np.flatnonzero(needs_order):
+        item = items[index]
+        supplier_id, supplier_name = item_suppliers[index]
+        plan.append({
+            'item_id': item.get('id'),
+            'name': item.get('name', ''),
+            'quantity': float(quantity[index]),
+            'min_quantity': float(min_quantity[index]),
+            'daily_velocity': round(float(item_velocity[index]), 2),
+            'lead_time_days': float(lead_time[index]),
+            'reorder_point': int(reorder_point[index]),
+            'order_quantity': int(order_quantity[index]),
+            'supplier_id': supplier_id,
+            'supplier_name': supplier_name
+        })
+    print(f"[DEBUG] Reorder plan: {len(plan)} of {len(items)} items over {days} days of sales")
+    return plan
+
+def group_by_supplier(plan):
+    """Group reorder suggestions into {supplier_name: [suggestions]}, largest orders first"""
+    grouped = {}
+    for suggestion in sorted(plan, key=lambda suggestion: suggestion['order_quantity'], reverse=True):
+        grouped.setdefault(suggestion['supplier_name'], []).append(suggestion)
+    return grouped
+
+def suggest_purchases(items=None, today=None):
+    """Build the suggested purchase list from the inventory and recent sales"""
+    today = today or date.today()
+    if items is None:
+        items = load_data('inventory') or []
+    end_date = today - timedelta(days=1)
+    ensure_cube()
+    product_ids, names, matrix = load_product_day_matrix(end_date - timedelta(days=VELOCITY_DAYS - 1), end_date)
+    return compute_reorder_plan(
+        items, product_ids, names, matrix,
+        load_data('bills') or [],
+        load_data('suppliers') or []
+    )
@@ -0,0 +1,88 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from data_handler import get_data_version
+
+class ReportCache:
+    """Bounded LRU cache of report results.
+
+    Entries are keyed by report type, report parameters and the current data
+    version of every collection the report reads, so a result is reused until
+    save_data() changes one of those collections. When persist_path is set the
+    cache is also written to disk and reloaded on the next start.
+    """
+    def __init__(self, max_entries=64, persist_path=None):
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def make_key(self, report_type, params, collections):
+        """Build the cache key for a report over the given collections"""
+        versions = tuple((name, get_data_version(name)) for name in collections)
+        return (report_type, repr(params), versions)
+
+    def get(self, key, default=None):
+        """Return a cached result and mark it as recently used"""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        """Store a result, evicting the least recently used entries if needed"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def get_or_compute(self, report_type, params, collections, compute):
+        """Return the cached result for this report or compute and store it"""
+        key = self.make_key(report_type, params, collections)
+        missing = object()
+        result = self.get(key, missing)
+        if result is not missing:
+            print(f"[DEBUG] Report cache hit: {report_type}")
+            return result
+        result = compute()
+        self.put(key, result)
+        return result
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def _load(self):
+        """Load persisted entries, ignoring a missing or unreadable file"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'rb') as f:
+                entries = pickle.load(f)
+            self._entries = OrderedDict(entries)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            print(f"[DEBUG] Loaded {len(self._entries)} cached reports from {self.persist_path}")
+        except Exception as e:
+            print(f"[WARNING] Could not load report cache: {str(e)}")
+            self._entries = OrderedDict()
+
+    def _save(self):
+        """Write the entries to disk (caller holds the lock)"""
+        if not self.persist_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.persist_path) or '.', exist_ok=True)
+            temp_path = self.persist_path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                pickle.dump(list(self._entries.items()), f)
+            os.replace(temp_path, self.persist_path)
+        except Exception as e:
+            print(f"[WARNING] Could not save report cache: {str(e)}")
@@ -0,0 +1,118 @@
+import threading
+import queue
+import traceback
+
+class ReportCancelled(Exception):
+    """Raised inside a report job once it has been cancelled"""
+
+class ReportJob:
+    """Handle passed to a running report computation for progress and cancellation"""
+    def __init__(self, job_id, messages):
+        self.job_id = job_id
+        self._messages = messages
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """Stop the computation if the job was cancelled"""
+        if self._cancel_event.is_set():
+            raise ReportCancelled()
+
+    def report_progress(self, fraction, message=""):
+        """Queue a progress update (0.0 - 1.0) and check for cancellation"""
+        self.check_cancelled()
+        self._messages.put((self.job_id, 'progress', (max(0.0, min(1.0, fraction)), message)))
+
+class ReportWorker:
+    """Runs report computations on a background thread and hands results back to Tk.
+
+    Only one job is active at a time: submitting a new job cancels the previous
+    one. Worker threads never touch widgets; results, errors and progress are
+    queued and delivered on the main thread through root.after polling.
+    """
+    def __init__(self, root, poll_interval=50):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._messages = queue.Queue()
+        self._next_job_id = 0
+        self._current_job = None
+        self._callbacks = {}
+        self._polling = False
+
+    @property
+    def busy(self):
+        return self._current_job is not None
+
+    def submit(self, compute, on_done, on_progress=None, on_error=None, on_cancel=None):
+        """Run compute(job) in the background and call on_done(result) on the Tk thread"""
+        self.cancel()
+
+        self._next_job_id += 1
+        job = ReportJob(self._next_job_id, self._messages)
+        self._current_job = job
+        self._callbacks[job.job_id] = (on_done, on_progress, on_error, on_cancel)
+
+        thread = threading.Thread(target=self._run, args=(job, compute), daemon=True)
+        thread.start()
+
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+        return job
+
+    def cancel(self):
+        """Cancel the running job, if any"""
+        job = self._current_job
+        if job is not None:
+            job.cancel()
+            self._current_job = None
+            on_cancel = self._callbacks.pop(job.job_id, (None, None, None, None))[3]
+            if on_cancel:
+                on_cancel()
+
+    def _run(self, job, compute):
+        """Thread body: run the computation and queue its outcome"""
+        try:
+            result = compute(job)
+            job.check_cancelled()
+            self._messages.put((job.job_id, 'done', result))
+        except ReportCancelled:
+            print(f"[DEBUG] Report job {job.job_id} cancelled")
+        except Exception as e:
+            print(f"[TRACEBACK] {traceback.format_exc()}")
+            self._messages.put((job.job_id, 'error', e))
+
+    def _poll(self):
+        """Deliver queued messages for the current job on the Tk thread"""
+        try:
+            while True:
+                job_id, kind, payload = self._messages.get_nowait()
+                callbacks = self._callbacks.get(job_id)
+                # Ignore messages from jobs that were cancelled or replaced
+                if callbacks is None:
+                    continue
+                on_done, on_progress, on_error, on_cancel = callbacks
+                if kind == 'progress':
+                    if on_progress:
+                        on_progress(*payload)
+                    continue
+                self._callbacks.pop(job_id, None)
+                if self._current_job is not None and self._current_job.job_id == job_id:
+                    self._current_job = None
+                if kind == 'done':
+                    on_done(payload)
+                elif kind == 'error' and on_error:
+                    on_error(payload)
+        except queue.Empty:
+            pass
+
+        if self._current_job is not None or not self._messages.empty():
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
@@ -1,11 +1,36 @@
 import customtkinter as ctk
+from tkcalendar import DateEntry
 # Import necessary styled functions from theme
-from theme import create_styled_frame, create_styled_label, create_styled_button, COLORS, FONTS
+from theme import create_styled_frame, create_styled_label, create_styled_button, create_styled_option_menu, create_styled_switch, COLORS, FONTS
 # Import data handling functions
-from data_handler import load_data#, save_data
+from data_handler import load_data, load_data_in_range, get_data_version#, save_data
+from constants import REPORT_CACHE_FILE, REPORT_CACHE_SIZE, CHART_CACHE_DIR, CHART_CACHE_SIZE
+from sales_utils import DATE_PRESETS, get_preset_range, iter_sale_lines, iter_sale_items, parse_sale_datetime
+from sales_trends import GRANULARITIES, TREND_TABLE_ROWS, build_daily_series, moving_average, resample, summarize_trends
+from report_worker import ReportWorker
+from report_cache import ReportCache
+from chart_renderer import ChartRenderer, draw_time_series, draw_bar_chart, draw_heatmap
+from customer_segments import SEGMENT_LABELS, compute_rfm, save_customer_segments
+from sales_rollups import UNASSIGNED_EMPLOYEE, ensure_daily_rollups, load_daily_rollups
+from cost_basis import load_cost_index
+from stock_valuation import value_stock
+from shrinkage import shrinkage_report, shrinkage_totals
+from sales_cube import ensure_cube, query_cube
+from sales_heatmap import WEEKDAY_LABELS, ensure_heatmap, load_heatmap, load_heatmap_stores
+from low_stock import stock_status
+from ui_elements import show_error
 from collections import defaultdict # Import defaultdict
-from datetime import datetime # Import datetime for date parsing
-import statistics
+from datetime import date
+import heapq
+import numpy as np
+from PIL import Image
+
+TOP_N_CHOICES = [10, 20, 50, 100]
+MARGIN_REPORT_PRODUCTS = 20
+BREAKDOWN_ROWS = 50
+HEATMAP_PEAK_HOURS = 3
+TOP_DISCREPANCY_ROWS = 20
+CHART_HEIGHT = 300
 
 class ReportingAnalytics:
     def __init__(self, root, current_language, languages, back_callback):
@@ -16,26 +41,33 @@ class ReportingAnalytics:
 
         # Initialize data
         self.frame = None
+        self.sales_data = []
+        self.inventory_data = []
+        self.customer_data = []
+
+        # Reporting period (inclusive dates, None means unbounded)
+        self.range_preset = 'this_month'
+        self.start_date, self.end_date = get_preset_range(self.range_preset)
+        # (range and data version, sales) loaded by the last report job
+        self._sales_snapshot = (False, [])
+        # Resolution of the sales over time table
+        self.trend_granularity = 'daily'
+        # Number of products listed in the top selling report
+        self.top_n = 20
+
+        # Reports are computed off the Tk thread and reused until the data changes
+        self.report_worker = ReportWorker(root)
+        self.report_cache = ReportCache(max_entries=REPORT_CACHE_SIZE, persist_path=REPORT_CACHE_FILE)
+        self.chart_renderer = ChartRenderer(CHART_CACHE_DIR, max_files=CHART_CACHE_SIZE)
+
         try:
-            self.sales_data = load_data('sales_records.json') or []
-            self.inventory_data = load_data('inventory.json') or []
-            self.customer_data = load_data('customers.json') or []
+            self.inventory_data = load_data('inventory') or []
+            self.customer_data = load_data('customers') or []
         except Exception:
-            self.sales_data = []
             self.inventory_data = []
             self.customer_data = []
-
-        # Calculate dynamic thresholds based on data
-        self.calculate_thresholds()
-
-    def calculate_thresholds(self):
-        """Calculate dynamic thresholds based on inventory data"""
-        quantities = [int(item.get('quantity', 0)) for item in self.inventory_data if item.get('quantity')]
-        if quantities:
-            # Set low stock threshold to 25% of the median quantity
-            self.low_stock_threshold = max(1, int(statistics.median(quantities) * 0.25))
-        else:
-            self.low_stock_threshold = 10  # Default fallback
+        self._inventory_version = get_data_version('inventory')
+        self._customers_version = get_data_version('customers')
 
     def create_reporting_analytics_interface(self):
         """Create the reporting and analytics interface"""
@@ -56,7 +88,7 @@ class ReportingAnalytics:
             header_frame,
             text=self.LANGUAGES[self.current_language].get("back", "Back"),
             style='outline',
-            command=self.back_callback
+            command=self.go_back
         )
         back_button.pack(side='left', padx=20, pady=20)
 
@@ -68,6 +100,83 @@ class ReportingAnalytics:
         )
         title_label.pack(side='left', padx=20, pady=20)
 
+        # Date range filter bar
+        filter_frame = create_styled_frame(self.frame, style='card')
+        filter_frame.pack(fill='x', padx=20, pady=(0, 20))
+
+        preset_labels = {
+            'today': self.get_bilingual('today', 'Today', 'اليوم'),
+            'this_week': self.get_bilingual('this_week', 'This Week', 'هذا الأسبوع'),
+            'this_month': self.get_bilingual('this_month', 'This Month', 'هذا الشهر'),
+            'last_month': self.get_bilingual('last_month', 'Last Month', 'الشهر الماضي'),
+            'all_time': self.get_bilingual('all_time', 'All Time', 'كل الفترات'),
+            'custom': self.get_bilingual('custom_range', 'Custom', 'فترة مخصصة')
+        }
+        self.preset_by_label = {label: key for key, label in preset_labels.items()}
+        self.preset_menu = create_styled_option_menu(
+            filter_frame,
+            values=[preset_labels[key] for key in DATE_PRESETS],
+            command=self.on_preset_change
+        )
+        self.preset_menu.set(preset_labels[self.range_preset])
+        self.preset_menu.pack(side='left', padx=20, pady=20)
+
+        from_label = create_styled_label(filter_frame, text=self.get_bilingual('from_date', 'From', 'من'), style='body')
+        from_label.pack(side='left', padx=(10, 5), pady=20)
+        self.from_date_entry = DateEntry(filter_frame, date_pattern='yyyy-mm-dd', width=12)
+        self.from_date_entry.pack(side='left', padx=(0, 10), pady=20)
+
+        to_label = create_styled_label(filter_frame, text=self.get_bilingual('to_date', 'To', 'إلى'), style='body')
+        to_label.pack(side='left', padx=(10, 5), pady=20)
+        self.to_date_entry = DateEntry(filter_frame, date_pattern='yyyy-mm-dd', width=12)
+        self.to_date_entry.pack(side='left', padx=(0, 10), pady=20)
+
+        # Picking a date by hand switches the preset to custom
+        self.from_date_entry.bind('<<DateEntrySelected>>', self.on_custom_date_selected)
+        self.to_date_entry.bind('<<DateEntrySelected>>', self.on_custom_date_selected)
+        self._sync_date_entries()
+
+        apply_button = create_styled_button(
+            filter_frame,
+            text=self.get_bilingual('apply', 'Apply', 'تطبيق'),
+            style='outline',
+            command=self.apply_date_range
+        )
+        apply_button.pack(side='right', padx=20, pady=20)
+
+        self.range_summary_label = create_styled_label(filter_frame, text="", style='small')
+        self.range_summary_label.pack(side='right', padx=10, pady=20)
+
+        # Background job progress
+        progress_frame = create_styled_frame(self.frame, style='card')
+        progress_frame.pack(fill='x', padx=20, pady=(0, 20))
+
+        self.progress_bar = ctk.CTkProgressBar(progress_frame)
+        self.progress_bar.set(0)
+        self.progress_bar.pack(side='left', fill='x', expand=True, padx=20, pady=15)
+
+        self.progress_label = create_styled_label(progress_frame, text="", style='small')
+        self.progress_label.pack(side='left', padx=10, pady=15)
+
+        self.cancel_button = create_styled_button(
+            progress_frame,
+            text=self.get_bilingual('cancel', 'Cancel', 'إلغاء'),
+            style='error',
+            width=100,
+            state='disabled',
+            command=self.cancel_report
+        )
+        self.cancel_button.pack(side='right', padx=20, pady=15)
+
+        self.show_charts_switch = None
+        if self.chart_renderer.available:
+            self.show_charts_switch = create_styled_switch(
+                progress_frame,
+                text=self.get_bilingual('show_charts', 'Show Charts', 'عرض الرسوم البيانية')
+            )
+            self.show_charts_switch.select()
+            self.show_charts_switch.pack(side='right', padx=10, pady=15)
+
         # Area for reports
         self.reports_area_frame = ctk.CTkScrollableFrame(self.frame, orientation='vertical')
         self.reports_area_frame.pack(fill='both', expand=True, padx=20, pady=(0, 20))
@@ -121,13 +230,29 @@ class ReportingAnalytics:
         self.customer_report_results_label.pack(pady=5)
 
         # Sales Over Time Report
+        sales_over_time_controls = ctk.CTkFrame(self.reports_area_frame, fg_color='transparent')
+        sales_over_time_controls.pack(pady=10)
+
         generate_sales_over_time_button = create_styled_button(
-            self.reports_area_frame,
+            sales_over_time_controls,
             text=self.LANGUAGES[self.current_language].get("generate_sales_over_time", "Generate Sales Over Time Report"),
             style='primary',
             command=self.generate_sales_over_time_report
         )
-        generate_sales_over_time_button.pack(pady=10)
+        generate_sales_over_time_button.pack(side='left', padx=(0, 10))
+
+        granularity_labels = {
+            'daily': self.get_bilingual('daily', 'Daily', 'يومي'),
+            'weekly': self.get_bilingual('weekly', 'Weekly', 'أسبوعي'),
+            'monthly': self.get_bilingual('monthly', 'Monthly', 'شهري')
+        }
+        self.granularity_by_label = {label: key for key, label in granularity_labels.items()}
+        self.granularity_menu = create_styled_option_menu(
+            sales_over_time_controls,
+            values=[granularity_labels[key] for key in GRANULARITIES]
+        )
+        self.granularity_menu.set(granularity_labels[self.trend_granularity])
+        self.granularity_menu.pack(side='left')
 
         self.sales_over_time_report_text = ctk.CTkTextbox(
             self.reports_area_frame,
@@ -137,14 +262,30 @@ class ReportingAnalytics:
         )
         self.sales_over_time_report_text.pack(pady=5, fill='both', expand=True)
 
+        self.sales_over_time_chart_label = ctk.CTkLabel(self.reports_area_frame, text="")
+        self.sales_over_time_chart_label.pack(pady=5)
+
         # Top Selling Products Report
+        top_selling_controls = ctk.CTkFrame(self.reports_area_frame, fg_color='transparent')
+        top_selling_controls.pack(pady=10)
+
         generate_top_selling_button = create_styled_button(
-            self.reports_area_frame,
+            top_selling_controls,
             text=self.LANGUAGES[self.current_language].get("generate_top_selling", "Generate Top Selling Products Report"),
             style='primary',
             command=self.generate_top_selling_products_report
         )
-        generate_top_selling_button.pack(pady=10)
+        generate_top_selling_button.pack(side='left', padx=(0, 10))
+
+        top_n_label = create_styled_label(top_selling_controls, text=self.get_bilingual('show_top', 'Top', 'أعلى'), style='body')
+        top_n_label.pack(side='left', padx=(0, 5))
+        self.top_n_menu = create_styled_option_menu(
+            top_selling_controls,
+            values=[str(value) for value in TOP_N_CHOICES],
+            width=80
+        )
+        self.top_n_menu.set(str(self.top_n))
+        self.top_n_menu.pack(side='left')
 
         self.top_selling_report_text = ctk.CTkTextbox(
             self.reports_area_frame,
@@ -154,36 +295,360 @@ class ReportingAnalytics:
         )
         self.top_selling_report_text.pack(pady=5, fill='both', expand=True)
 
+        self.top_selling_chart_label = ctk.CTkLabel(self.reports_area_frame, text="")
+        self.top_selling_chart_label.pack(pady=5)
+
+        # Employee Performance Report
+        generate_employee_button = create_styled_button(
+            self.reports_area_frame,
+            text=self.LANGUAGES[self.current_language].get("generate_employee_report", "Generate Employee Report"),
+            style='primary',
+            command=self.generate_employee_report
+        )
+        generate_employee_button.pack(pady=10)
+
+        self.employee_report_text = ctk.CTkTextbox(
+            self.reports_area_frame,
+            wrap='word',
+            state='disabled',
+            height=200
+        )
+        self.employee_report_text.pack(pady=5, fill='both', expand=True)
+
+        # Profit and Margin Report
+        generate_margin_button = create_styled_button(
+            self.reports_area_frame,
+            text=self.LANGUAGES[self.current_language].get("generate_margin_report", "Generate Margin Report"),
+            style='primary',
+            command=self.generate_margin_report
+        )
+        generate_margin_button.pack(pady=10)
+
+        self.margin_report_text = ctk.CTkTextbox(
+            self.reports_area_frame,
+            wrap='word',
+            state='disabled',
+            height=200
+        )
+        self.margin_report_text.pack(pady=5, fill='both', expand=True)
+
+        # Ad-hoc breakdown from the sales cube
+        breakdown_controls = ctk.CTkFrame(self.reports_area_frame, fg_color='transparent')
+        breakdown_controls.pack(pady=10)
+
+        generate_breakdown_button = create_styled_button(
+            breakdown_controls,
+            text=self.LANGUAGES[self.current_language].get("generate_breakdown", "Generate Breakdown"),
+            style='primary',
+            command=self.generate_breakdown_report
+        )
+        generate_breakdown_button.pack(side='left', padx=(0, 10))
+
+        dimension_labels = {
+            'store': self.get_bilingual('store', 'Store', 'المخزن'),
+            'product': self.get_bilingual('product', 'Product', 'المنتج'),
+            'category': self.get_bilingual('category', 'Category', 'الفئة'),
+            'flavor': self.get_bilingual('flavor', 'Flavor', 'النكهة'),
+            'employee': self.get_bilingual('employee', 'Employee', 'الموظف'),
+            'month': self.get_bilingual('month', 'Month', 'الشهر'),
+            'day': self.get_bilingual('day', 'Day', 'اليوم')
+        }
+        self.dimension_by_label = {label: key for key, label in dimension_labels.items()}
+        self.no_dimension_label = "- / -"
+        self.breakdown_menu = create_styled_option_menu(breakdown_controls, values=list(self.dimension_by_label))
+        self.breakdown_menu.set(dimension_labels['store'])
+        self.breakdown_menu.pack(side='left', padx=(0, 10))
+        self.breakdown_then_menu = create_styled_option_menu(
+            breakdown_controls,
+            values=[self.no_dimension_label] + list(self.dimension_by_label)
+        )
+        self.breakdown_then_menu.set(self.no_dimension_label)
+        self.breakdown_then_menu.pack(side='left')
+
+        self.breakdown_report_text = ctk.CTkTextbox(
+            self.reports_area_frame,
+            wrap='word',
+            state='disabled',
+            height=200
+        )
+        self.breakdown_report_text.pack(pady=5, fill='both', expand=True)
+
+        # Hour of day x weekday heatmap from the hourly rollups
+        heatmap_controls = ctk.CTkFrame(self.reports_area_frame, fg_color='transparent')
+        heatmap_controls.pack(pady=10)
+
+        generate_heatmap_button = create_styled_button(
+            heatmap_controls,
+            text=self.LANGUAGES[self.current_language].get("generate_heatmap", "Generate Sales Heatmap"),
+            style='primary',
+            command=self.generate_heatmap_report
+        )
+        generate_heatmap_button.pack(side='left', padx=(0, 10))
+
+        self.all_stores_label = self.get_bilingual('all_stores', 'All Stores', 'كل المخازن')
+        # The stores are filled in once the heatmap cells are built on the report worker
+        self.heatmap_store_menu = create_styled_option_menu(heatmap_controls, values=[self.all_stores_label])
+        self.heatmap_store_menu.set(self.all_stores_label)
+        self.heatmap_store_menu.pack(side='left')
+
+        self.heatmap_report_text = ctk.CTkTextbox(
+            self.reports_area_frame,
+            wrap='word',
+            state='disabled',
+            height=200
+        )
+        self.heatmap_report_text.pack(pady=5, fill='both', expand=True)
+
+        self.heatmap_chart_label = ctk.CTkLabel(self.reports_area_frame, text="")
+        self.heatmap_chart_label.pack(pady=5)
+
+        # Shrinkage: expected stock from the ledger against the stock take counts
+        generate_shrinkage_button = create_styled_button(
+            self.reports_area_frame,
+            text=self.LANGUAGES[self.current_language].get("generate_shrinkage", "Generate Shrinkage Report"),
+            style='primary',
+            command=self.generate_shrinkage_report
+        )
+        generate_shrinkage_button.pack(pady=10)
+
+        self.shrinkage_report_text = ctk.CTkTextbox(
+            self.reports_area_frame,
+            wrap='word',
+            state='disabled',
+            height=200
+        )
+        self.shrinkage_report_text.pack(pady=5, fill='both', expand=True)
+
+        # Load the sales for the initial period and the heatmap stores
+        self.apply_date_range(with_heatmap_stores=True)
+
+    def _sync_date_entries(self):
+        """Show the current period in the date pickers"""
+        today = date.today()
+        self.from_date_entry.set_date(self.start_date or today)
+        self.to_date_entry.set_date(self.end_date or today)
+
+    def on_preset_change(self, selected_label):
+        """Apply a preset period (today, this week, this month, all time)"""
+        self.range_preset = self.preset_by_label.get(selected_label, 'custom')
+        if self.range_preset != 'custom':
+            self.start_date, self.end_date = get_preset_range(self.range_preset)
+            self._sync_date_entries()
+            self.apply_date_range()
+
+    def on_custom_date_selected(self, event=None):
+        """Switch to the custom preset when a date is picked manually"""
+        self.range_preset = 'custom'
+        custom_label = next((label for label, key in self.preset_by_label.items() if key == 'custom'), None)
+        if custom_label:
+            self.preset_menu.set(custom_label)
+
+    def apply_date_range(self, with_heatmap_stores=False):
+        """Reload the sales for the selected period in the background"""
+        if self.range_preset == 'custom':
+            self.start_date = self.from_date_entry.get_date()
+            self.end_date = self.to_date_entry.get_date()
+            if self.start_date > self.end_date:
+                self.start_date, self.end_date = self.end_date, self.start_date
+                self._sync_date_entries()
+
+        start_date, end_date = self.start_date, self.end_date
+        self.run_report(
+            lambda job: self._load_range(job, start_date, end_date, with_heatmap_stores),
+            lambda result: self._show_range_summary(start_date, end_date, *result)
+        )
+
+    def _load_range(self, job, start_date, end_date, with_heatmap_stores):
+        """Count the period's sales, and build the heatmap cells and list their stores if asked (runs on the report worker)"""
+        count = len(self._sales_for_job(job, start_date, end_date))
+        if not with_heatmap_stores:
+            return count, None
+        ensure_heatmap() # Builds from the full sales history the first time
+        return count, load_heatmap_stores()
+
+    def _set_heatmap_stores(self, stores):
+        self.heatmap_store_menu.configure(values=[self.all_stores_label] + stores)
+
+    def _show_range_summary(self, start_date, end_date, count, heatmap_stores=None):
+        """Show the selected period and how many sales it contains"""
+        if heatmap_stores is not None:
+            self._set_heatmap_stores(heatmap_stores)
+        if start_date is None:
+            period_text = self.get_bilingual('all_time', 'All Time', 'كل الفترات')
+        else:
+            period_text = f"{start_date:%Y-%m-%d} → {end_date:%Y-%m-%d}"
+        self.range_summary_label.configure(
+            text=f"{period_text} ({count} {self.get_bilingual('sales_count', 'sales', 'مبيعات')})"
+        )
+
+    def _sales_for_job(self, job, start_date, end_date):
+        """Return the sales for the period, querying the database only when the period or data changed"""
+        snapshot_key = (start_date, end_date, get_data_version('sales'))
+        loaded_key, sales = self._sales_snapshot
+        if loaded_key != snapshot_key:
+            job.report_progress(0.0, self.get_bilingual('loading_sales', 'Loading sales...', 'جاري تحميل المبيعات...'))
+            sales = load_data_in_range('sales', start_date, end_date) or []
+            # Replace key and data together so a cancelled job can't mix them up
+            self._sales_snapshot = (snapshot_key, sales)
+        self.sales_data = sales
+        return sales
+
+    def _refresh_reference_data(self):
+        """Reload inventory and customers on the worker when save_data changed them"""
+        inventory_version = get_data_version('inventory')
+        if inventory_version != self._inventory_version:
+            self.inventory_data = load_data('inventory') or []
+            self._inventory_version = inventory_version
+        customers_version = get_data_version('customers')
+        if customers_version != self._customers_version:
+            self.customer_data = load_data('customers') or []
+            self._customers_version = customers_version
+
+    def _cached_report(self, report_type, params, collections, compute):
+        """Return a cached report result or compute it (runs on the report worker)"""
+        return self.report_cache.get_or_compute(report_type, params, collections, compute)
+
+    def _chart_size(self):
+        """Chart size in pixels for the current window, or None when charts are off (Tk thread)"""
+        if self.show_charts_switch is None or not self.show_charts_switch.get():
+            return None
+        return max(400, self.reports_area_frame.winfo_width() - 40), CHART_HEIGHT
+
+    def _chart_colors(self):
+        return {
+            'background': COLORS['card'],
+            'text': COLORS['text'],
+            'lines': [COLORS['primary'], COLORS['warning'], COLORS['success']]
+        }
+
+    def _render_chart(self, report_type, params, collections, chart_size, draw):
+        """Return a cached PNG for the chart or draw it (runs on the report worker)"""
+        if chart_size is None:
+            return None
+        key = self.report_cache.make_key(report_type, params, collections)
+        width, height = chart_size
+        return self.chart_renderer.get_or_render(key, width, height, draw, self._chart_colors())
+
+    def _show_chart(self, chart_label, chart_path):
+        """Display a rendered chart PNG below its report, or clear it"""
+        if not chart_path:
+            chart_label.configure(image=None)
+            chart_label.image = None
+            return
+        try:
+            with Image.open(chart_path) as img:
+                img.load()
+                chart_image = ctk.CTkImage(light_image=img, dark_image=img, size=img.size)
+            chart_label.configure(image=chart_image)
+            chart_label.image = chart_image # Keep a reference!
+        except Exception as e:
+            print(f"[ERROR] Could not display chart {chart_path}: {str(e)}")
+
+    def _iter_with_progress(self, job, items, message=""):
+        """Iterate over items while reporting progress and honouring cancellation"""
+        total = len(items)
+        step = max(1, total // 100)
+        for index, item in enumerate(items):
+            if index % step == 0:
+                job.report_progress(index / total if total else 1.0, message)
+            yield item
+        job.report_progress(1.0, message)
+
+    def run_report(self, compute, on_done):
+        """Run compute(job) on the report worker and pass its result to on_done on the Tk thread"""
+        # Submitting cancels the previous job, so reset the indicator afterwards
+        self.report_worker.submit(
+            compute,
+            lambda result: self._on_report_done(on_done, result),
+            on_progress=self._on_report_progress,
+            on_error=self._on_report_error,
+            on_cancel=self._on_report_cancelled
+        )
+        self.progress_bar.set(0)
+        self.progress_label.configure(text=self.get_bilingual('computing_report', 'Computing report...', 'جاري حساب التقرير...'))
+        self.cancel_button.configure(state='normal')
+
+    def cancel_report(self):
+        """Cancel the report that is currently being computed"""
+        self.report_worker.cancel()
+
+    def go_back(self):
+        """Stop any running report before leaving the screen"""
+        self.report_worker.cancel()
+        self.back_callback()
+
+    def _interface_alive(self):
+        return self.frame is not None and self.frame.winfo_exists()
+
+    def _finish_progress(self, text=""):
+        self.progress_bar.set(0)
+        self.progress_label.configure(text=text)
+        self.cancel_button.configure(state='disabled')
+
+    def _on_report_progress(self, fraction, message):
+        if not self._interface_alive():
+            return
+        self.progress_bar.set(fraction)
+        if message:
+            self.progress_label.configure(text=message)
+
+    def _on_report_done(self, on_done, result):
+        if not self._interface_alive():
+            return
+        self._finish_progress()
+        on_done(result)
+
+    def _on_report_error(self, error):
+        if not self._interface_alive():
+            return
+        self._finish_progress()
+        show_error(f"Error generating report: {str(error)}", self.current_language)
+
+    def _on_report_cancelled(self):
+        if not self._interface_alive():
+            return
+        self._finish_progress(self.get_bilingual('report_cancelled', 'Report cancelled', 'تم إلغاء التقرير'))
+
     def get_bilingual(self, key, default_en, default_ar):
         en = self.LANGUAGES['en'].get(key, default_en)
         ar = self.LANGUAGES['ar'].get(key, default_ar)
         return f"{en} / {ar}"
 
+    def _set_textbox(self, textbox, text):
+        """Replace the content of a read-only report textbox"""
+        textbox.configure(state='normal')
+        textbox.delete('1.0', 'end')
+        textbox.insert('1.0', text)
+        textbox.configure(state='disabled')
+
     def generate_sales_summary_report(self):
         """Generates and displays a comprehensive sales summary report."""
+        start_date, end_date = self.start_date, self.end_date
+        self.run_report(
+            lambda job: self._cached_report(
+                'sales_summary', (start_date, end_date), ['sales'],
+                lambda: self._compute_sales_summary(job, self._sales_for_job(job, start_date, end_date))
+            ),
+            lambda text: self.sales_report_results_label.configure(text=text)
+        )
+
+    def _compute_sales_summary(self, job, sales_data):
+        """Build the sales summary text (runs on the report worker)"""
         total_sales = 0
         total_items_sold = 0
         sales_by_category = defaultdict(float)
         sales_by_employee = defaultdict(float)
 
-        for sale in self.sales_data:
-            if 'items' in sale:
-                for item in sale['items']:
-                    try:
-                        price = float(item.get('price', 0))
-                        quantity = int(item.get('quantity', 0))
-                        category = item.get('category', 'Uncategorized')
-                        employee = sale.get('employee', 'Unknown')
-                        
-                        total_sales += price * quantity
-                        total_items_sold += quantity
-                        sales_by_category[category] += price * quantity
-                        sales_by_employee[employee] += price * quantity
-                    except (ValueError, TypeError):
-                        continue
+        for sale in self._iter_with_progress(job, sales_data):
+            employee = sale.get('employee', 'Unknown')
+            for name, category, price, quantity in iter_sale_lines(sale):
+                total_sales += price * quantity
+                total_items_sold += quantity
+                sales_by_category[category] += price * quantity
+                sales_by_employee[employee] += price * quantity
 
         # Calculate average sale value
-        avg_sale = total_sales / len(self.sales_data) if self.sales_data else 0
+        avg_sale = total_sales / len(sales_data) if sales_data else 0
 
         report_text = f"{self.get_bilingual('total_sales', 'Total Sales', 'المبيعات الكلية')}: ${total_sales:.2f}\n"
         report_text += f"{self.get_bilingual('total_items_sold', 'Total Items Sold', 'عدد الصنف المباع')}: {total_items_sold}\n"
@@ -197,29 +662,51 @@ class ReportingAnalytics:
         for employee, amount in sorted(sales_by_employee.items(), key=lambda x: x[1], reverse=True):
             report_text += f"{employee}: ${amount:.2f}\n"
 
-        self.sales_report_results_label.configure(text=report_text)
+        return report_text
 
     def generate_inventory_summary_report(self):
         """Generates and displays a comprehensive inventory summary report."""
+        as_of = min(self.end_date or date.today(), date.today())
+        self.run_report(
+            lambda job: self._cached_report(
+                'inventory_summary', (as_of,), ['inventory', 'products', 'bills', 'stock_movements'],
+                lambda: self._compute_inventory_summary(job, as_of)
+            ),
+            lambda text: self.inventory_report_results_label.configure(text=text)
+        )
+
+    def _compute_inventory_summary(self, job, as_of):
+        """Build the inventory summary text with stock valued at cost as of a date (runs on the report worker)"""
+        self._refresh_reference_data()
+        inventory_data = self.inventory_data
+        valuation = {row['item_id']: row for row in value_stock('inventory', as_of)}
+        job.check_cancelled()
         total_items = 0
-        total_value = 0
+        fifo_total = 0
+        average_total = 0
+        uncosted_items = []
         low_stock_items = []
         out_of_stock_items = []
         category_summary = defaultdict(lambda: {'count': 0, 'value': 0})
 
-        for item in self.inventory_data:
+        for item in self._iter_with_progress(job, inventory_data):
             try:
                 quantity = int(item.get('quantity', 0))
-                price = float(item.get('price', 0))
                 category = item.get('category', 'Uncategorized')
-                
-                total_items += quantity
-                total_value += quantity * price
-                
-                category_summary[category]['count'] += quantity
-                category_summary[category]['value'] += quantity * price
-
-                if quantity < self.low_stock_threshold:
+                value = valuation.get(item.get('id'), {})
+                held = value.get('quantity', 0) # As of the valuation date
+
+                total_items += held
+                fifo_total += value.get('fifo_value', 0)
+                average_total += value.get('average_value', 0)
+                if held > 0 and not value.get('costed'):
+                    uncosted_items.append(item.get('name', 'Unnamed Item'))
+
+                category_summary[category]['count'] += held
+                category_summary[category]['value'] += value.get('fifo_value', 0)
+
+                status = stock_status(item)
+                if status is not None and status[2]: # At or below the item's own min_quantity
                     low_stock_items.append(f"{item.get('name', 'Unnamed Item')} ({quantity})")
                 if quantity == 0:
                     out_of_stock_items.append(item.get('name', 'Unnamed Item'))
@@ -227,160 +714,533 @@ class ReportingAnalytics:
             except (ValueError, TypeError):
                 continue
 
-        report_text = f"{self.get_bilingual('total_items', 'Total Items in Inventory', 'عدد الصنف في المخزن')}: {total_items}\n"
-        report_text += f"{self.get_bilingual('total_value', 'Total Inventory Value', 'قيمة المخزن الكلية')}: ${total_value:.2f}\n\n"
+        report_text = f"{self.get_bilingual('total_items', 'Total Items in Inventory', 'عدد الصنف في المخزن')}: {total_items:g}\n"
+        report_text += f"{self.get_bilingual('valuation_date', 'Valued as of', 'التقييم بتاريخ')}: {as_of}\n"
+        report_text += f"{self.get_bilingual('fifo_value', 'Inventory Value (FIFO)', 'قيمة المخزن (الوارد أولاً)')}: ${fifo_total:.2f}\n"
+        report_text += f"{self.get_bilingual('average_value', 'Inventory Value (Moving Average)', 'قيمة المخزن (المتوسط المتحرك)')}: ${average_total:.2f}\n"
+        if uncosted_items:
+            report_text += f"{self.get_bilingual('uncosted_items', 'Items without purchase cost', 'أصناف بدون تكلفة شراء')}: {', '.join(uncosted_items)}\n"
+        report_text += "\n"
         
         report_text += f"{self.get_bilingual('inventory_by_category', 'Inventory by Category', 'المخزن بالفئة')}:\n"
         for category, data in sorted(category_summary.items()):
-            report_text += f"{category}: {data['count']} items (${data['value']:.2f})\n"
+            report_text += f"{category}: {data['count']:g} items (${data['value']:.2f})\n"
 
         if low_stock_items:
             report_text += f"\n{self.get_bilingual('low_stock_items', 'Low Stock Items', 'الصنف أقل من المخزن')}: {', '.join(low_stock_items)}"
         else:
-            report_text += f"\n{self.get_bilingual('no_low_stock', 'No items below the low stock threshold of', 'لا توجد أصناف أقل من المخزن')}: {self.low_stock_threshold}."
+            report_text += f"\n{self.get_bilingual('no_low_stock', 'No items at or below their minimum quantity', 'لا توجد أصناف أقل من المخزن')}."
 
         if out_of_stock_items:
             report_text += f"\n\n{self.get_bilingual('out_of_stock_items', 'Out of Stock Items', 'أصناف خارج المخزن')}: {', '.join(out_of_stock_items)}"
 
-        self.inventory_report_results_label.configure(text=report_text)
+        return report_text
 
     def generate_customer_summary_report(self):
-        """Generates and displays a comprehensive customer summary report."""
-        total_customers = len(self.customer_data)
-        customers_by_category = defaultdict(int)
-        total_purchases = 0
-        customer_purchases = defaultdict(int)
-
-        # Count purchases per customer
-        for sale in self.sales_data:
-            customer = sale.get('customer', 'Unknown')
-            if 'items' in sale:
-                for item in sale['items']:
-                    try:
-                        quantity = int(item.get('quantity', 0))
-                        customer_purchases[customer] += quantity
-                        total_purchases += quantity
-                    except (ValueError, TypeError):
-                        continue
-
-        # Categorize customers based on purchase frequency
-        for customer, purchases in customer_purchases.items():
-            if purchases > 10:
-                customers_by_category['frequent'] += 1
-            elif purchases > 5:
-                customers_by_category['regular'] += 1
-            else:
-                customers_by_category['occasional'] += 1
+        """Generates and displays RFM customer segments as of the end of the selected period."""
+        as_of = min(self.end_date or date.today(), date.today())
+        self.run_report(
+            lambda job: self._cached_report(
+                'customer_rfm', (as_of,), ['sales', 'customers'],
+                lambda: self._compute_customer_summary(job, as_of)
+            ),
+            lambda text: self.customer_report_results_label.configure(text=text)
+        )
 
-        report_text = f"{self.get_bilingual('total_customers', 'Total Number of Customers', 'عدد الزبائن الكلي')}: {total_customers}\n"
-        report_text += f"{self.get_bilingual('total_purchases', 'Total Purchases', 'عدد المشتريات الكلية')}: {total_purchases}\n\n"
-        
-        report_text += f"{self.get_bilingual('customer_categories', 'Customer Categories', 'فئات الزبائن')}:\n"
-        report_text += f"{self.get_bilingual('frequent_customers', 'Frequent Customers', 'الزبائن المستمرين')}: {customers_by_category['frequent']}\n"
-        report_text += f"{self.get_bilingual('regular_customers', 'Regular Customers', 'الزبائن المنتظمين')}: {customers_by_category['regular']}\n"
-        report_text += f"{self.get_bilingual('occasional_customers', 'Occasional Customers', 'الزبائن المنتظمين')}: {customers_by_category['occasional']}\n"
+    def _compute_customer_summary(self, job, as_of):
+        """Score customers by recency, frequency and monetary value (runs on the report worker)"""
+        self._refresh_reference_data()
+        job.report_progress(0.0, self.get_bilingual('loading_sales', 'Loading sales...', 'جاري تحميل المبيعات...'))
+        # RFM looks at the whole history up to the end of the period
+        history = load_data_in_range('sales', None, as_of) or []
+        job.check_cancelled()
+        segments = compute_rfm(history, as_of)
+        job.report_progress(0.9)
+
+        # Keep the persisted scores current for CustomerManager
+        if as_of == date.today():
+            save_customer_segments(segments)
+
+        customers_by_segment = defaultdict(int)
+        revenue_by_segment = defaultdict(float)
+        for row in segments:
+            customers_by_segment[row['segment']] += 1
+            revenue_by_segment[row['segment']] += row['monetary']
+
+        report_text = f"{self.get_bilingual('total_customers', 'Total Number of Customers', 'عدد الزبائن الكلي')}: {len(self.customer_data)}\n"
+        report_text += f"{self.get_bilingual('active_customers', 'Customers With Purchases', 'زبائن لديهم مشتريات')}: {len(segments)}\n"
+        report_text += f"{self.get_bilingual('total_purchases', 'Total Purchases', 'عدد المشتريات الكلية')}: {sum(row['frequency'] for row in segments)}\n\n"
+
+        report_text += f"{self.get_bilingual('customer_segments', 'Customer Segments (RFM)', 'شرائح الزبائن (RFM)')} - {as_of:%Y-%m-%d}:\n"
+        for segment, (label_en, label_ar) in SEGMENT_LABELS.items():
+            if customers_by_segment[segment]:
+                report_text += (
+                    f"{self.get_bilingual('segment_' + segment, label_en, label_ar)}: {customers_by_segment[segment]} "
+                    f"(${revenue_by_segment[segment]:.2f})\n"
+                )
 
-        self.customer_report_results_label.configure(text=report_text)
+        top_customers = heapq.nlargest(5, segments, key=lambda row: row['monetary'])
+        if top_customers:
+            report_text += f"\n{self.get_bilingual('top_customers', 'Top Customers', 'أفضل الزبائن')}:\n"
+            for row in top_customers:
+                report_text += f"{row['customer']}: ${row['monetary']:.2f} ({row['frequency']} / RFM {row['rfm_score']})\n"
+
+        return report_text
 
     def generate_sales_over_time_report(self):
-        """Generates and displays sales aggregated by date with trends."""
-        sales_by_date = defaultdict(float)
-        daily_items = defaultdict(int)
+        """Generates and displays sales resampled by day, week or month with trends."""
+        start_date, end_date = self.start_date, self.end_date
+        self.trend_granularity = self.granularity_by_label.get(self.granularity_menu.get(), 'daily')
+        granularity = self.trend_granularity
+        chart_size = self._chart_size()
+        self.run_report(
+            lambda job: self._compute_sales_over_time(job, start_date, end_date, granularity, chart_size),
+            lambda result: self._show_sales_over_time(*result)
+        )
 
-        for sale in self.sales_data:
-            sale_date_str = sale.get('date')
-            if not sale_date_str:
-                continue
+    def _show_sales_over_time(self, text, chart_path):
+        self._set_textbox(self.sales_over_time_report_text, text)
+        self._show_chart(self.sales_over_time_chart_label, chart_path)
 
-            try:
-                sale_date = datetime.fromisoformat(sale_date_str).strftime('%Y-%m-%d')
-            except ValueError:
-                continue
+    def _daily_series_for_job(self, job, start_date, end_date):
+        """Return the dense daily (days, revenue, items) series for the period (runs on the report worker)"""
+        # An all-time period is bounded by the first sale and today
+        series_end = date.today() if start_date is None else end_date
+        return self._cached_report(
+            'daily_sales_series', (start_date, series_end), ['sales'],
+            lambda: build_daily_series(
+                self._iter_with_progress(job, self._sales_for_job(job, start_date, end_date)),
+                start_date, series_end
+            )
+        )
 
-            if 'items' in sale:
-                for item in sale['items']:
-                    try:
-                        price = float(item.get('price', 0))
-                        quantity = int(item.get('quantity', 0))
-                        sales_by_date[sale_date] += price * quantity
-                        daily_items[sale_date] += quantity
-                    except (ValueError, TypeError):
-                        continue
-
-        # Calculate trends
-        dates = sorted(sales_by_date.keys())
-        if len(dates) >= 2:
-            first_date = dates[0]
-            last_date = dates[-1]
-            first_sales = sales_by_date[first_date]
-            last_sales = sales_by_date[last_date]
-            days_diff = (datetime.strptime(last_date, '%Y-%m-%d') - datetime.strptime(first_date, '%Y-%m-%d')).days
-            if days_diff > 0:
-                daily_growth = (last_sales - first_sales) / days_diff
-            else:
-                daily_growth = 0
-        else:
-            daily_growth = 0
+    def _compute_sales_over_time(self, job, start_date, end_date, granularity, chart_size):
+        """Build the sales over time table and chart (runs on the report worker)"""
+        days, revenue, items = self._daily_series_for_job(job, start_date, end_date)
+        trends = summarize_trends(days, revenue, items, granularity, max_rows=TREND_TABLE_ROWS)
+        job.check_cancelled()
+
+        chart_path = None
+        if days.size:
+            chart_path = self._render_chart(
+                'sales_over_time_chart', (start_date, int(days[-1]), granularity), ['sales'], chart_size,
+                lambda axes: self._draw_sales_over_time(axes, chart_size[0], days, revenue, granularity)
+            )
 
-        report_lines = [f"{self.get_bilingual('sales_by_date', 'Sales by Date', 'المبيعات بالتاريخ')}:"]
-        for date in dates:
-            report_lines.append(f"{date}: ${sales_by_date[date]:.2f} ({daily_items[date]} items)")
+        report_lines = [
+            f"{self.get_bilingual('total_revenue', 'Total Revenue', 'الإيرادات الكلية')}: ${trends['total_revenue']:.2f} "
+            f"({trends['total_items']} {self.get_bilingual('items', 'items', 'عنصر')}, {trends['days']} {self.get_bilingual('days', 'days', 'يوم')})",
+            f"{self.get_bilingual('avg_daily_revenue', 'Average Daily Revenue', 'متوسط الإيرادات اليومية')}: ${trends['average_daily_revenue']:.2f}",
+            f"{self.get_bilingual('moving_average_7', '7-Day Average', 'متوسط 7 أيام')}: ${trends['ma7']:.2f}    "
+            f"{self.get_bilingual('moving_average_30', '30-Day Average', 'متوسط 30 يوم')}: ${trends['ma30']:.2f}",
+            f"{self.get_bilingual('daily_growth', 'Average Daily Growth', 'متوسط النمو اليومي')}: "
+            f"${trends['growth_per_day']:+.2f} ({trends['growth_percent_per_day']:+.2f}%, R² {trends['r_squared']:.2f})",
+            ""
+        ]
 
-        if daily_growth != 0:
-            report_lines.append(f"\n{self.get_bilingual('daily_growth', 'Average Daily Growth', 'متوسط النمو اليومي')}: ${daily_growth:.2f}")
+        if granularity == 'daily':
+            report_lines.append(f"{'Date':<12}{'Revenue':>12}{'Items':>8}{'MA7':>12}{'MA30':>12}")
+        else:
+            report_lines.append(f"{'Period':<12}{'Revenue':>12}{'Items':>8}")
+        for row in trends['rows']:
+            line = f"{row['period']:%Y-%m-%d}  {row['revenue']:>10.2f}{row['items']:>8}"
+            if granularity == 'daily':
+                line += f"{row['ma7']:>12.2f}{row['ma30']:>12.2f}"
+            report_lines.append(line)
 
-        report_text = "\n".join(report_lines)
+        return "\n".join(report_lines), chart_path
 
-        self.sales_over_time_report_text.configure(state='normal')
-        self.sales_over_time_report_text.delete('1.0', 'end')
-        self.sales_over_time_report_text.insert('1.0', report_text)
-        self.sales_over_time_report_text.configure(state='disabled')
+    def _draw_sales_over_time(self, axes, width, days, revenue, granularity):
+        """Plot revenue for the chosen resolution, with moving averages for daily data"""
+        title = self.get_bilingual('sales_over_time', 'Sales Over Time', 'المبيعات عبر الزمن')
+        if granularity == 'daily':
+            series = [
+                (self.get_bilingual('revenue', 'Revenue', 'الإيرادات'), revenue),
+                (self.get_bilingual('moving_average_7', '7-Day Average', 'متوسط 7 أيام'), moving_average(revenue, 7)),
+                (self.get_bilingual('moving_average_30', '30-Day Average', 'متوسط 30 يوم'), moving_average(revenue, 30))
+            ]
+            draw_time_series(axes, width, days, series, title, self._chart_colors())
+        else:
+            period_starts, period_revenue = resample(days, revenue, granularity)
+            series = [(self.get_bilingual('revenue', 'Revenue', 'الإيرادات'), period_revenue)]
+            draw_time_series(axes, width, period_starts, series, title, self._chart_colors())
 
     def generate_top_selling_products_report(self):
-        """Generates and displays a report of top selling products with trends."""
-        product_sales = defaultdict(lambda: {'quantity': 0, 'revenue': 0, 'dates': set()})
-        
-        for sale in self.sales_data:
-            if 'items' in sale:
-                for item in sale['items']:
-                    try:
-                        name = item.get('name', 'Unnamed Item')
-                        price = float(item.get('price', 0))
-                        quantity = int(item.get('quantity', 0))
-                        date = sale.get('date', '')
-                        
-                        product_sales[name]['quantity'] += quantity
-                        product_sales[name]['revenue'] += price * quantity
-                        if date:
-                            product_sales[name]['dates'].add(date.split()[0])  # Get just the date part
-                    except (ValueError, TypeError):
-                        continue
-
-        # Sort products by quantity sold
-        sorted_products = sorted(
-            product_sales.items(),
-            key=lambda x: x[1]['quantity'],
-            reverse=True
-        )
-
-        report_lines = [f"{self.get_bilingual('top_selling_products', 'Top Selling Products', 'المبيعات الأعلى')}:"]
-        
-        for name, data in sorted_products:
-            days_sold = len(data['dates'])
-            avg_daily_sales = data['quantity'] / days_sold if days_sold > 0 else 0
-            
+        """Generates and displays a report of the top N selling products."""
+        start_date, end_date = self.start_date, self.end_date
+        self.top_n = int(self.top_n_menu.get())
+        top_n = self.top_n
+        chart_size = self._chart_size()
+        self.run_report(
+            lambda job: self._compute_top_selling_report(job, start_date, end_date, top_n, chart_size),
+            lambda result: self._show_top_selling_products(*result)
+        )
+
+    def _show_top_selling_products(self, text, chart_path):
+        self._set_textbox(self.top_selling_report_text, text)
+        self._show_chart(self.top_selling_chart_label, chart_path)
+
+    def _compute_top_selling_report(self, job, start_date, end_date, top_n, chart_size):
+        """Build the top selling products text and chart (runs on the report worker)"""
+        top_products, product_count = self._cached_report(
+            'top_selling_rows', (start_date, end_date, top_n), ['sales'],
+            lambda: self._compute_top_selling_products(job, self._sales_for_job(job, start_date, end_date), top_n)
+        )
+        job.check_cancelled()
+
+        chart_path = None
+        if top_products:
+            chart_path = self._render_chart(
+                'top_selling_chart', (start_date, end_date, top_n), ['sales'], chart_size,
+                lambda axes: draw_bar_chart(
+                    axes,
+                    [name for name, quantity, revenue, days_sold in top_products],
+                    [quantity for name, quantity, revenue, days_sold in top_products],
+                    self.get_bilingual('top_selling_products', 'Top Selling Products', 'المبيعات الأعلى'),
+                    self._chart_colors()
+                )
+            )
+
+        report_lines = [
+            f"{self.get_bilingual('top_selling_products', 'Top Selling Products', 'المبيعات الأعلى')} "
+            f"({len(top_products)} / {product_count}):"
+        ]
+
+        for name, quantity, revenue, days_sold in top_products:
+            avg_daily_sales = quantity / days_sold if days_sold > 0 else 0
+
             report_lines.append(f"\n{name}:")
-            report_lines.append(f"  {self.get_bilingual('total_quantity', 'Total Quantity', 'الكمية الكلية')}: {data['quantity']}")
-            report_lines.append(f"  {self.get_bilingual('total_revenue', 'Total Revenue', 'الإيرادات الكلية')}: ${data['revenue']:.2f}")
+            report_lines.append(f"  {self.get_bilingual('total_quantity', 'Total Quantity', 'الكمية الكلية')}: {quantity}")
+            report_lines.append(f"  {self.get_bilingual('total_revenue', 'Total Revenue', 'الإيرادات الكلية')}: ${revenue:.2f}")
             report_lines.append(f"  {self.get_bilingual('days_sold', 'Days Sold', 'عدد الأيام')}: {days_sold}")
             report_lines.append(f"  {self.get_bilingual('avg_daily_sales', 'Average Daily Sales', 'متوسط المبيعات اليومية')}: {avg_daily_sales:.1f}")
 
-        report_text = "\n".join(report_lines)
+        return "\n".join(report_lines), chart_path
+
+    def _compute_top_selling_products(self, job, sales_data, top_n):
+        """Select the top N products as (name, quantity, revenue, days sold) rows (runs on the report worker)"""
+        # name -> [quantity, revenue, day bitmap]; bit i is set when the product sold on first_day + i
+        product_sales = {}
+        first_day = None
+
+        for sale in self._iter_with_progress(job, sales_data):
+            sale_datetime = parse_sale_datetime(sale.get('date'))
+            day_bit = 0
+            if sale_datetime is not None:
+                day = sale_datetime.date().toordinal()
+                if first_day is None:
+                    first_day = day
+                elif day < first_day:
+                    # Sales normally arrive sorted by date; re-base the bitmaps if not
+                    shift = first_day - day
+                    for totals in product_sales.values():
+                        totals[2] <<= shift
+                    first_day = day
+                day_bit = 1 << (day - first_day)
+
+            for name, category, price, quantity in iter_sale_lines(sale):
+                totals = product_sales.get(name)
+                if totals is None:
+                    totals = product_sales[name] = [0, 0.0, 0]
+                totals[0] += quantity
+                totals[1] += price * quantity
+                totals[2] |= day_bit
+
+        # Select the N best sellers by quantity without sorting the whole catalog
+        top_products = heapq.nlargest(top_n, product_sales.items(), key=lambda item: item[1][0])
+        rows = [
+            (name, quantity, revenue, day_bitmap.bit_count())
+            for name, (quantity, revenue, day_bitmap) in top_products
+        ]
+        return rows, len(product_sales)
+
+    def generate_employee_report(self):
+        """Generates and displays revenue, tickets, basket size and busy hours per employee."""
+        start_date, end_date = self.start_date, self.end_date
+        self.run_report(
+            lambda job: self._cached_report(
+                'employee_performance', (start_date, end_date), ['sales_daily_rollups'],
+                lambda: self._compute_employee_report(job, start_date, end_date)
+            ),
+            lambda text: self._set_textbox(self.employee_report_text, text)
+        )
+
+    def _compute_employee_report(self, job, start_date, end_date):
+        """Build the employee report from the daily rollups (runs on the report worker)"""
+        job.report_progress(0.0, self.get_bilingual('loading_sales', 'Loading sales...', 'جاري تحميل المبيعات...'))
+        ensure_daily_rollups()
+        rollups = load_daily_rollups(start_date, end_date)
+        job.check_cancelled()
+        if not rollups:
+            return self.get_bilingual('no_sales', 'No sales in this period', 'لا توجد مبيعات في هذه الفترة')
+
+        employee_ids, inverse = np.unique([row.get('employee_id', UNASSIGNED_EMPLOYEE) for row in rollups], return_inverse=True)
+        revenue = np.bincount(inverse, weights=[row.get('revenue', 0) for row in rollups], minlength=employee_ids.size)
+        tickets = np.bincount(inverse, weights=[row.get('tickets', 0) for row in rollups], minlength=employee_ids.size)
+        items = np.bincount(inverse, weights=[row.get('items', 0) for row in rollups], minlength=employee_ids.size)
+
+        # Sum the per-day hourly buckets into one 24-hour profile per employee
+        rows, hours, hour_revenue, hour_tickets = [], [], [], []
+        for index, row in zip(inverse.tolist(), rollups):
+            for hour, value in (row.get('hourly_revenue') or {}).items():
+                rows.append(index)
+                hours.append(int(hour))
+                hour_revenue.append(value)
+                hour_tickets.append((row.get('hourly_tickets') or {}).get(hour, 0))
+        hourly_revenue = np.zeros((employee_ids.size, 24))
+        hourly_tickets = np.zeros((employee_ids.size, 24))
+        cells = (np.asarray(rows, dtype=np.int64), np.asarray(hours, dtype=np.int64))
+        np.add.at(hourly_revenue, cells, hour_revenue)
+        np.add.at(hourly_tickets, cells, hour_tickets)
+        job.report_progress(0.8)
+
+        employee_names = {}
+        for row in rollups:
+            if row.get('employee'):
+                employee_names[row.get('employee_id')] = row['employee']
+
+        report_lines = [f"{self.get_bilingual('employee_performance', 'Employee Performance', 'أداء الموظفين')}:"]
+        for index in np.argsort(-revenue).tolist():
+            employee_id = employee_ids[index]
+            if employee_id == UNASSIGNED_EMPLOYEE:
+                name = self.get_bilingual('unassigned', 'Unassigned', 'غير محدد')
+            else:
+                name = employee_names.get(employee_id, f"#{employee_id}")
+            ticket_count = int(tickets[index])
+            average_basket = revenue[index] / ticket_count if ticket_count else 0
+
+            report_lines.append(f"\n{name}:")
+            report_lines.append(f"  {self.get_bilingual('total_revenue', 'Total Revenue', 'الإيرادات الكلية')}: ${revenue[index]:.2f}")
+            report_lines.append(f"  {self.get_bilingual('tickets', 'Tickets', 'عدد الفواتير')}: {ticket_count}")
+            report_lines.append(f"  {self.get_bilingual('average_basket', 'Average Basket', 'متوسط السلة')}: ${average_basket:.2f}")
+            report_lines.append(f"  {self.get_bilingual('total_items_sold', 'Total Items Sold', 'إجمالي العناصر المباعة')}: {int(items[index])}")
+
+            active_hours = np.flatnonzero(hourly_tickets[index])
+            if active_hours.size:
+                hour_text = ", ".join(
+                    f"{hour:02d}:00 ${hourly_revenue[index, hour]:.0f} ({int(hourly_tickets[index, hour])})"
+                    for hour in active_hours.tolist()
+                )
+                report_lines.append(f"  {self.get_bilingual('hourly_breakdown', 'By Hour', 'حسب الساعة')}: {hour_text}")
+
+        return "\n".join(report_lines)
+
+    def generate_margin_report(self):
+        """Generates and displays gross margin per product and category from the bill cost basis."""
+        start_date, end_date = self.start_date, self.end_date
+        self.run_report(
+            lambda job: self._cached_report(
+                'margin', (start_date, end_date), ['sales', 'product_costs'],
+                lambda: self._compute_margin_report(job, self._sales_for_job(job, start_date, end_date))
+            ),
+            lambda text: self._set_textbox(self.margin_report_text, text)
+        )
+
+    def _compute_margin_report(self, job, sales_data):
+        """Join sale lines to unit costs in one pass and aggregate margins (runs on the report worker)"""
+        cost_by_id, cost_by_name = load_cost_index()
+        product_index = {}
+        category_index = {}
+        line_products, line_categories, line_revenue, line_quantity, line_unit_cost = [], [], [], [], []
+
+        for sale in self._iter_with_progress(job, sales_data):
+            for product_id, name, category, price, quantity in iter_sale_items(sale):
+                unit_cost = cost_by_id.get(str(product_id)) if product_id is not None else None
+                if unit_cost is None:
+                    unit_cost = cost_by_name.get(name, np.nan)
+                line_products.append(product_index.setdefault(name, len(product_index)))
+                line_categories.append(category_index.setdefault(category, len(category_index)))
+                line_revenue.append(price * quantity)
+                line_quantity.append(quantity)
+                line_unit_cost.append(unit_cost)
+
+        if not line_revenue:
+            return self.get_bilingual('no_sales', 'No sales in this period', 'لا توجد مبيعات في هذه الفترة')
+
+        revenue = np.asarray(line_revenue, dtype=float)
+        cost = np.asarray(line_unit_cost, dtype=float) * np.asarray(line_quantity, dtype=float)
+        # Lines without a cost basis are left out of the margin figures
+        has_cost = ~np.isnan(cost)
+        costed_revenue = np.where(has_cost, revenue, 0.0)
+        cost = np.where(has_cost, cost, 0.0)
+
+        def totals_by(groups, size):
+            groups = np.asarray(groups, dtype=np.int64)
+            group_revenue = np.bincount(groups, weights=costed_revenue, minlength=size)
+            group_cost = np.bincount(groups, weights=cost, minlength=size)
+            margin = group_revenue - group_cost
+            margin_percent = np.divide(margin * 100, group_revenue, out=np.zeros(size), where=group_revenue > 0)
+            return group_revenue, group_cost, margin, margin_percent
+
+        product_names = list(product_index)
+        category_names = list(category_index)
+        product_totals = totals_by(line_products, len(product_names))
+        category_totals = totals_by(line_categories, len(category_names))
+
+        total_costed_revenue = float(costed_revenue.sum())
+        total_margin = total_costed_revenue - float(cost.sum())
+        report_lines = [
+            f"{self.get_bilingual('total_revenue', 'Total Revenue', 'الإيرادات الكلية')}: ${revenue.sum():.2f}",
+            f"{self.get_bilingual('cost_of_goods', 'Cost of Goods Sold', 'تكلفة البضاعة المباعة')}: ${cost.sum():.2f}",
+            f"{self.get_bilingual('gross_margin', 'Gross Margin', 'هامش الربح الإجمالي')}: ${total_margin:.2f} "
+            f"({(total_margin / total_costed_revenue * 100) if total_costed_revenue else 0:.1f}%)",
+            f"{self.get_bilingual('revenue_without_cost', 'Revenue Without Cost Basis', 'إيرادات بدون تكلفة مسجلة')}: ${revenue[~has_cost].sum():.2f}",
+            "",
+            f"{self.get_bilingual('margin_by_category', 'Margin by Category', 'الهامش حسب الفئة')}:"
+        ]
+
+        def margin_line(name, totals, index):
+            group_revenue, group_cost, margin, margin_percent = totals
+            return f"{name}: ${group_revenue[index]:.2f} - ${group_cost[index]:.2f} = ${margin[index]:.2f} ({margin_percent[index]:.1f}%)"
+
+        for index in np.argsort(-category_totals[2]).tolist():
+            report_lines.append(margin_line(category_names[index], category_totals, index))
+
+        report_lines.append(f"\n{self.get_bilingual('margin_by_product', 'Margin by Product', 'الهامش حسب المنتج')}:")
+        for index in np.argsort(-product_totals[2])[:MARGIN_REPORT_PRODUCTS].tolist():
+            report_lines.append(margin_line(product_names[index], product_totals, index))
+
+        return "\n".join(report_lines)
+
+    def generate_breakdown_report(self):
+        """Generates and displays sales totals grouped by one or two cube dimensions."""
+        start_date, end_date = self.start_date, self.end_date
+        group_by = [self.dimension_by_label[self.breakdown_menu.get()]]
+        then_by = self.dimension_by_label.get(self.breakdown_then_menu.get())
+        if then_by and then_by not in group_by:
+            group_by.append(then_by)
+        self.run_report(
+            lambda job: self._cached_report(
+                'breakdown', (start_date, end_date, tuple(group_by)), ['sales_cube'],
+                lambda: self._compute_breakdown_report(job, start_date, end_date, group_by)
+            ),
+            lambda text: self._set_textbox(self.breakdown_report_text, text)
+        )
+
+    def _compute_breakdown_report(self, job, start_date, end_date, group_by):
+        """Query the sales cube for grouped totals (runs on the report worker)"""
+        job.report_progress(0.0, self.get_bilingual('loading_sales', 'Loading sales...', 'جاري تحميل المبيعات...'))
+        ensure_cube()
+        rows = query_cube(group_by, start_date=start_date, end_date=end_date)
+        job.check_cancelled()
+        if not rows:
+            return self.get_bilingual('no_sales', 'No sales in this period', 'لا توجد مبيعات في هذه الفترة')
+
+        total_revenue = sum(row['revenue'] for row in rows)
+        report_lines = [
+            f"{self.get_bilingual('total_revenue', 'Total Revenue', 'الإيرادات الكلية')}: ${total_revenue:.2f} "
+            f"({len(rows)} {self.get_bilingual('groups', 'groups', 'مجموعات')})",
+            ""
+        ]
+        for row in rows[:BREAKDOWN_ROWS]:
+            group_text = " / ".join(str(row.get(dimension) or '-') for dimension in group_by)
+            share = row['revenue'] / total_revenue * 100 if total_revenue else 0
+            report_lines.append(f"{group_text}: ${row['revenue']:.2f} ({share:.1f}%), {row['quantity']} {self.get_bilingual('items', 'items', 'عنصر')}")
+        if len(rows) > BREAKDOWN_ROWS:
+            report_lines.append(f"... +{len(rows) - BREAKDOWN_ROWS}")
+
+        return "\n".join(report_lines)
+
+    def generate_heatmap_report(self):
+        """Generates and displays tickets and revenue by weekday and hour for staffing."""
+        store = self.heatmap_store_menu.get()
+        store = None if store == self.all_stores_label else store
+        chart_size = self._chart_size()
+        self.run_report(
+            lambda job: self._compute_heatmap_report(job, store, chart_size),
+            lambda result: self._show_heatmap(*result)
+        )
+
+    def _show_heatmap(self, text, chart_path, stores):
+        self._set_heatmap_stores(stores)
+        self._set_textbox(self.heatmap_report_text, text)
+        self._show_chart(self.heatmap_chart_label, chart_path)
+
+    def _compute_heatmap_report(self, job, store, chart_size):
+        """Build the heatmap text and chart from at most 168 cells per store (runs on the report worker)"""
+        ensure_heatmap() # In case the first load was cancelled before building the cells
+        stores = load_heatmap_stores()
+        revenue, tickets = self._cached_report(
+            'heatmap_cells', (store,), ['sales_hourly_rollups'],
+            lambda: load_heatmap(store)
+        )
+        job.check_cancelled()
+        if not tickets.any():
+            return self.get_bilingual('no_sales', 'No sales in this period', 'لا توجد مبيعات في هذه الفترة'), None, stores
+
+        weekday_labels = [en if self.current_language == 'en' else ar for en, ar in WEEKDAY_LABELS]
+        # Only the hours the shop has ever traded in
+        open_hours = np.flatnonzero(tickets.sum(axis=0))
+        first_hour, last_hour = int(open_hours[0]), int(open_hours[-1])
+        chart_path = self._render_chart(
+            'heatmap_chart', (store,), ['sales_hourly_rollups'], chart_size,
+            lambda axes: draw_heatmap(
+                axes,
+                tickets[:, first_hour:last_hour + 1],
+                weekday_labels,
+                [str(hour) for hour in range(first_hour, last_hour + 1)],
+                self.get_bilingual('tickets_by_hour', 'Tickets by Weekday and Hour', 'الفواتير حسب اليوم والساعة'),
+                self._chart_colors()
+            )
+        )
+
+        busiest_weekday, busiest_hour = np.unravel_index(int(np.argmax(tickets)), tickets.shape)
+        report_lines = [
+            f"{self.get_bilingual('busiest_slot', 'Busiest Slot', 'أكثر وقت ازدحاما')}: "
+            f"{weekday_labels[busiest_weekday]} {busiest_hour:02d}:00 ({int(tickets[busiest_weekday, busiest_hour])} "
+            f"{self.get_bilingual('tickets', 'tickets', 'فاتورة')}, ${revenue[busiest_weekday, busiest_hour]:.2f})",
+            ""
+        ]
+        for weekday, label in enumerate(weekday_labels):
+            day_tickets = tickets[weekday]
+            if not day_tickets.any():
+                report_lines.append(f"{label}: -")
+                continue
+            peaks = [hour for hour in np.argsort(day_tickets)[::-1][:HEATMAP_PEAK_HOURS] if day_tickets[hour]]
+            peak_text = ", ".join(f"{hour:02d}:00 ({int(day_tickets[hour])})" for hour in peaks)
+            report_lines.append(
+                f"{label}: {int(day_tickets.sum())} {self.get_bilingual('tickets', 'tickets', 'فاتورة')}, "
+                f"${revenue[weekday].sum():.2f} - {self.get_bilingual('peak_hours', 'Peak Hours', 'ساعات الذروة')}: {peak_text}"
+            )
+
+        return "\n".join(report_lines), chart_path, stores
+
+    def generate_shrinkage_report(self):
+        """Generates and displays stock shrinkage for the counts taken in the selected period."""
+        start_date, end_date = self.start_date, self.end_date
+        self.run_report(
+            lambda job: self._cached_report(
+                'shrinkage', (start_date, end_date), ['stock_counts', 'stock_movements', 'store_stock'],
+                lambda: self._compute_shrinkage_report(job, start_date, end_date)
+            ),
+            lambda text: self._set_textbox(self.shrinkage_report_text, text)
+        )
+
+    def _compute_shrinkage_report(self, job, start_date, end_date):
+        """Build the shrinkage text per item and store, per item and per store (runs on the report worker)"""
+        rows = shrinkage_report(start_date, end_date)
+        job.check_cancelled()
+        if not rows:
+            return self.get_bilingual('no_stock_counts', 'No stock counts in this period', 'لا توجد عمليات جرد في هذه الفترة')
 
-        self.top_selling_report_text.configure(state='normal')
-        self.top_selling_report_text.delete('1.0', 'end')
-        self.top_selling_report_text.insert('1.0', report_text)
-        self.top_selling_report_text.configure(state='disabled')
+        def shrinkage_line(name, row):
+            return f"{name}: {self.get_bilingual('expected', 'Expected', 'المتوقع')} {row['expected']:g}, " \
+                f"{self.get_bilingual('counted', 'Counted', 'المعدود')} {row['counted']:g}, " \
+                f"{self.get_bilingual('shrinkage', 'Shrinkage', 'العجز')} {row['shrinkage']:g}"
 
-    # We will add methods for generating other specific reports later
-    # def generate_employee_report(self): pass
\ No newline at end of file
+        shortfall = sum(row['shrinkage'] for row in rows if row['shrinkage'] > 0)
+        report_lines = [
+            f"{self.get_bilingual('counted_items', 'Counted Items', 'الأصناف المعدودة')}: {len(rows)}",
+            f"{self.get_bilingual('total_shrinkage', 'Total Missing Units', 'إجمالي الوحدات المفقودة')}: {shortfall:g}",
+            "",
+            f"{self.get_bilingual('shrinkage_by_store', 'Shrinkage by Store', 'العجز بالمخزن')}:"
+        ]
+        report_lines += [shrinkage_line(total['store'], total) for total in shrinkage_totals(rows, 'store')]
+        report_lines += ["", f"{self.get_bilingual('shrinkage_by_item', 'Shrinkage by Item', 'العجز بالصنف')}:"]
+        report_lines += [shrinkage_line(total['name'], total) for total in shrinkage_totals(rows, 'name')]
+        report_lines += ["", f"{self.get_bilingual('top_discrepancies', 'Top Discrepancies', 'أكبر الفروقات')}:"]
+        report_lines += [
+            shrinkage_line(f"{row['name']} @ {row['store']}", row) + f" ({row['counted_at'][:10]})"
+            for row in rows if row['shrinkage']
+        ][:TOP_DISCREPANCY_ROWS]
+        return "\n".join(report_lines)
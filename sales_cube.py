@@ -0,0 +1,133 @@
+import numpy as np
+from datetime import datetime, timedelta
+from constants import MONGODB_COLLECTIONS, DEFAULT_STORE
+from data_handler import load_data, save_data, increment_documents, aggregate_data, get_collection
+from sales_utils import parse_sale_datetime, iter_sale_items, sale_item_product
+from sales_rollups import UNASSIGNED_EMPLOYEE
+
+CUBE_COLLECTION = MONGODB_COLLECTIONS["sales_cube"]
+
+# Cell fields that can be grouped or filtered on
+CUBE_DIMENSIONS = ['day', 'month', 'product', 'product_id', 'category', 'flavor', 'employee', 'employee_id', 'store']
+CUBE_MEASURES = ['revenue', 'quantity', 'lines']
+
+def iter_cube_lines(sale):
+    """Yield (item, product_id, name, category, price, quantity) for each valid line item"""
+    for item in sale.get('items', []) or []:
+        if not isinstance(item, dict):
+            continue
+        for product_id, name, category, price, quantity in iter_sale_items({'items': [item]}):
+            yield item, product_id, name, category, price, quantity
+
+def sale_cube_cells(sale):
+    """Return a (key, increments, labels) update for every line item of a sale"""
+    sale_datetime = parse_sale_datetime(sale.get('date'))
+    if sale_datetime is None:
+        return []
+    day = sale_datetime.strftime('%Y-%m-%d')
+    employee_id = sale.get('employee_id')
+    employee_id = str(employee_id) if employee_id not in (None, '') else UNASSIGNED_EMPLOYEE
+    store = sale.get('store') or DEFAULT_STORE
+
+    cells = {}
+    for item, product_id, name, category, price, quantity in iter_cube_lines(sale):
+        product = sale_item_product(item)
+        product_key = str(product_id) if product_id not in (None, '') else name
+        key = (day, product_key, employee_id, store)
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = (
+                {'day': day, 'product_id': product_key, 'employee_id': employee_id, 'store': store},
+                {'revenue': 0.0, 'quantity': 0, 'lines': 0},
+                {
+                    'month': day[:7],
+                    'product': name,
+                    'category': category,
+                    'flavor': product.get('flavor', ''),
+                    'employee': sale.get('employee', '')
+                }
+            )
+        cell[1]['revenue'] += price * quantity
+        cell[1]['quantity'] += quantity
+        cell[1]['lines'] += 1
+    return list(cells.values())
+
+def record_sale_in_cube(sale):
+    """Add a sale to the cube with one bulk upsert"""
+    return increment_documents(CUBE_COLLECTION, sale_cube_cells(sale))
+
+def rebuild_cube(sales=None):
+    """Recompute every cube cell from the sales history"""
+    if sales is None:
+        sales = load_data('sales') or []
+    cells = {}
+    for sale in sales:
+        for key, increments, labels in sale_cube_cells(sale):
+            cell_key = tuple(key.values())
+            cell = cells.get(cell_key)
+            if cell is None:
+                cell = cells[cell_key] = dict(key, revenue=0.0, quantity=0, lines=0)
+            cell.update(labels)
+            for measure, value in increments.items():
+                cell[measure] += value
+    save_data('sales_cube', list(cells.values()))
+    print(f"[DEBUG] Rebuilt sales cube with {len(cells)} cells")
+
+def ensure_cube():
+    """Build the cube from history the first time it is needed"""
+    collection = get_collection(CUBE_COLLECTION)
+    if collection is not None and collection.find_one({}, {'_id': 1}) is None:
+        rebuild_cube()
+
+def query_cube(group_by, filters=None, start_date=None, end_date=None, sort_by='revenue', limit=None):
+    """Slice and dice the cube: grouped revenue/quantity/lines totals.
+
+    group_by is a list of CUBE_DIMENSIONS keys (empty for a grand total),
+    filters maps dimensions to a value or a list of values, and the date range
+    is inclusive. Returns one dict per group with the dimension values and the
+    measures, sorted by sort_by descending.
+    """
+    match = {}
+    if start_date is not None:
+        match.setdefault('day', {})['$gte'] = start_date.strftime('%Y-%m-%d')
+    if end_date is not None:
+        match.setdefault('day', {})['$lt'] = (end_date + timedelta(days=1)).strftime('%Y-%m-%d')
+    for dimension in list(group_by) + list(filters or {}):
+        if dimension not in CUBE_DIMENSIONS:
+            raise ValueError(f"Unknown cube dimension: {dimension}")
+    for dimension, value in (filters or {}).items():
+        match[dimension] = {'$in': list(value)} if isinstance(value, (list, tuple, set)) else value
+
+    group = {'_id': {dimension: f"${dimension}" for dimension in group_by} if group_by else None}
+    for measure in CUBE_MEASURES:
+        group[measure] = {'$sum': f"${measure}"}
+
+    pipeline = [{'$match': match}, {'$group': group}, {'$sort': {sort_by: -1}}]
+    if limit:
+        pipeline.append({'$limit': limit})
+
+    rows = []
+    for document in aggregate_data('sales_cube', pipeline):
+        row = dict(document.get('_id') or {})
+        for measure in CUBE_MEASURES:
+            row[measure] = document.get(measure, 0)
+        rows.append(row)
+    return rows
+
+def load_product_day_matrix(start_date, end_date, measure='quantity'):
+    """Return (product_ids, names, matrix) with one row per product and one column per day.
+
+    Days without sales are zero; the matrix covers start_date..end_date inclusive.
+    """
+    first = start_date.toordinal()
+    length = end_date.toordinal() - first + 1
+    cells = query_cube(['day', 'product_id', 'product'], start_date=start_date, end_date=end_date)
+    if not cells:
+        return [], {}, np.zeros((0, length))
+
+    product_ids, rows = np.unique(np.asarray([str(cell['product_id']) for cell in cells]), return_inverse=True)
+    names = {str(cell['product_id']): cell.get('product') or str(cell['product_id']) for cell in cells}
+    columns = np.asarray([datetime.strptime(cell['day'], '%Y-%m-%d').toordinal() for cell in cells], dtype=np.int64) - first
+    matrix = np.zeros((product_ids.size, length))
+    np.add.at(matrix, (rows, columns), [float(cell.get(measure, 0)) for cell in cells])
+    return product_ids.tolist(), names, matrix
@@ -0,0 +1,86 @@
+import numpy as np
+from constants import MONGODB_COLLECTIONS, DEFAULT_STORE
+from data_handler import load_data, save_data, increment_document, aggregate_data, get_collection
+from sales_utils import parse_sale_datetime
+from sales_rollups import sale_totals
+
+HEATMAP_COLLECTION = MONGODB_COLLECTIONS["sales_hourly_rollups"]
+
+# Weekday (Monday = 0) -> (English, Arabic) label
+WEEKDAY_LABELS = [
+    ("Mon", "الإثنين"),
+    ("Tue", "الثلاثاء"),
+    ("Wed", "الأربعاء"),
+    ("Thu", "الخميس"),
+    ("Fri", "الجمعة"),
+    ("Sat", "السبت"),
+    ("Sun", "الأحد")
+]
+
+def sale_heatmap_key(sale):
+    """Return the (store, weekday, hour) cell of a sale, or None if it has no valid date"""
+    sale_datetime = parse_sale_datetime(sale.get('date'))
+    if sale_datetime is None:
+        return None
+    return sale.get('store') or DEFAULT_STORE, sale_datetime.weekday(), sale_datetime.hour
+
+def record_sale_in_heatmap(sale):
+    """Add one sale to its (store, weekday, hour) cell"""
+    key = sale_heatmap_key(sale)
+    if key is None:
+        return False
+    store, weekday, hour = key
+    revenue, items = sale_totals(sale)
+    return increment_document(
+        HEATMAP_COLLECTION,
+        {'store': store, 'weekday': weekday, 'hour': hour},
+        {'revenue': revenue, 'tickets': 1, 'items': items}
+    )
+
+def rebuild_heatmap(sales=None):
+    """Recompute every hourly cell from the sales history"""
+    if sales is None:
+        sales = load_data('sales') or []
+    cells = {}
+    for sale in sales:
+        key = sale_heatmap_key(sale)
+        if key is None:
+            continue
+        store, weekday, hour = key
+        revenue, items = sale_totals(sale)
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = {'store': store, 'weekday': weekday, 'hour': hour, 'revenue': 0.0, 'tickets': 0, 'items': 0}
+        cell['revenue'] += revenue
+        cell['tickets'] += 1
+        cell['items'] += items
+    save_data('sales_hourly_rollups', list(cells.values()))
+    print(f"[DEBUG] Rebuilt {len(cells)} hourly sales cells")
+
+def ensure_heatmap():
+    """Build the hourly cells from history the first time they are needed"""
+    collection = get_collection(HEATMAP_COLLECTION)
+    if collection is not None and collection.find_one({}, {'_id': 1}) is None:
+        rebuild_heatmap()
+
+def load_heatmap_stores():
+    """Return the stores that have hourly cells"""
+    return sorted(row['_id'] for row in aggregate_data('sales_hourly_rollups', [{'$group': {'_id': '$store'}}]) if row.get('_id'))
+
+def load_heatmap(store=None):
+    """Return 7x24 (revenue, tickets) arrays for one store, or summed over all stores"""
+    pipeline = []
+    if store:
+        pipeline.append({'$match': {'store': store}})
+    pipeline.append({'$group': {
+        '_id': {'weekday': '$weekday', 'hour': '$hour'},
+        'revenue': {'$sum': '$revenue'},
+        'tickets': {'$sum': '$tickets'}
+    }})
+    revenue = np.zeros((7, 24))
+    tickets = np.zeros((7, 24))
+    for row in aggregate_data('sales_hourly_rollups', pipeline):
+        weekday, hour = row['_id']['weekday'], row['_id']['hour']
+        revenue[weekday, hour] = row.get('revenue', 0)
+        tickets[weekday, hour] = row.get('tickets', 0)
+    return revenue, tickets
@@ -0,0 +1,94 @@
+from collections import defaultdict
+from constants import MONGODB_COLLECTIONS
+from data_handler import load_data, save_data, load_data_in_range, increment_document, get_collection
+from sales_utils import parse_sale_datetime, iter_sale_lines
+
+ROLLUP_COLLECTION = MONGODB_COLLECTIONS["sales_daily_rollups"]
+UNASSIGNED_EMPLOYEE = "unassigned"
+
+def sale_rollup_key(sale):
+    """Return (day, employee_id, hour) for a sale, or None if it has no valid date"""
+    sale_datetime = parse_sale_datetime(sale.get('date'))
+    if sale_datetime is None:
+        return None
+    employee_id = sale.get('employee_id')
+    employee_id = str(employee_id) if employee_id not in (None, '') else UNASSIGNED_EMPLOYEE
+    return sale_datetime.strftime('%Y-%m-%d'), employee_id, sale_datetime.hour
+
+def sale_totals(sale):
+    """Return (revenue, items) for a sale"""
+    revenue = 0.0
+    items = 0
+    for name, category, price, quantity in iter_sale_lines(sale):
+        revenue += price * quantity
+        items += quantity
+    return revenue, items
+
+def record_sale_rollup(sale):
+    """Add one sale to its (day, employee) rollup document"""
+    key = sale_rollup_key(sale)
+    if key is None:
+        return False
+    day, employee_id, hour = key
+    revenue, items = sale_totals(sale)
+    return increment_document(
+        ROLLUP_COLLECTION,
+        {'day': day, 'employee_id': employee_id},
+        {
+            'revenue': revenue,
+            'tickets': 1,
+            'items': items,
+            f'hourly_revenue.{hour}': revenue,
+            f'hourly_tickets.{hour}': 1
+        },
+        {'employee': sale.get('employee', '')}
+    )
+
+def rebuild_daily_rollups(sales=None):
+    """Recompute every rollup document from the sales history"""
+    if sales is None:
+        sales = load_data('sales') or []
+    rollups = {}
+    for sale in sales:
+        key = sale_rollup_key(sale)
+        if key is None:
+            continue
+        day, employee_id, hour = key
+        revenue, items = sale_totals(sale)
+        rollup = rollups.get((day, employee_id))
+        if rollup is None:
+            rollup = rollups[(day, employee_id)] = {
+                'day': day,
+                'employee_id': employee_id,
+                'employee': '',
+                'revenue': 0.0,
+                'tickets': 0,
+                'items': 0,
+                'hourly_revenue': defaultdict(float),
+                'hourly_tickets': defaultdict(int)
+            }
+        rollup['employee'] = sale.get('employee', '') or rollup['employee']
+        rollup['revenue'] += revenue
+        rollup['tickets'] += 1
+        rollup['items'] += items
+        rollup['hourly_revenue'][str(hour)] += revenue
+        rollup['hourly_tickets'][str(hour)] += 1
+
+    documents = []
+    for rollup in rollups.values():
+        rollup['hourly_revenue'] = dict(rollup['hourly_revenue'])
+        rollup['hourly_tickets'] = dict(rollup['hourly_tickets'])
+        documents.append(rollup)
+    save_data('sales_daily_rollups', documents)
+    print(f"[DEBUG] Rebuilt {len(documents)} daily sales rollups")
+    return documents
+
+def ensure_daily_rollups():
+    """Build the rollups from history the first time they are needed"""
+    collection = get_collection(ROLLUP_COLLECTION)
+    if collection is not None and collection.find_one({}, {'_id': 1}) is None:
+        rebuild_daily_rollups()
+
+def load_daily_rollups(start_date=None, end_date=None):
+    """Load the (day, employee) rollups for an inclusive date range using the day index"""
+    return load_data_in_range('sales_daily_rollups', start_date, end_date, date_field='day')
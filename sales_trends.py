@@ -0,0 +1,134 @@
+import numpy as np
+from datetime import date
+from sales_utils import parse_sale_datetime, iter_sale_lines
+
+GRANULARITIES = ["daily", "weekly", "monthly"]
+TREND_TABLE_ROWS = 14
+
+def build_daily_series(sales, start_date=None, end_date=None):
+    """Aggregate sales into a dense per-day series.
+
+    Returns (day_ordinals, revenue, items) NumPy arrays with one entry per
+    calendar day between start_date and end_date (or the first and last sale
+    when unbounded). Days without sales are zero.
+    """
+    ordinals = []
+    revenue = []
+    items = []
+    for sale in sales:
+        sale_datetime = parse_sale_datetime(sale.get('date'))
+        if sale_datetime is None:
+            continue
+        sale_revenue = 0.0
+        sale_items = 0
+        for name, category, price, quantity in iter_sale_lines(sale):
+            sale_revenue += price * quantity
+            sale_items += quantity
+        ordinals.append(sale_datetime.date().toordinal())
+        revenue.append(sale_revenue)
+        items.append(sale_items)
+
+    if not ordinals and (start_date is None or end_date is None):
+        empty = np.zeros(0)
+        return empty.astype(np.int64), empty, empty
+
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    first = start_date.toordinal() if start_date is not None else int(ordinals.min())
+    last = end_date.toordinal() if end_date is not None else int(ordinals.max())
+    length = max(0, last - first + 1)
+
+    offsets = ordinals - first
+    in_range = (offsets >= 0) & (offsets < length)
+    offsets = offsets[in_range]
+    daily_revenue = np.bincount(offsets, weights=np.asarray(revenue, dtype=float)[in_range], minlength=length)
+    daily_items = np.bincount(offsets, weights=np.asarray(items, dtype=float)[in_range], minlength=length)
+    return np.arange(first, first + length, dtype=np.int64), daily_revenue, daily_items
+
+def moving_average(values, window):
+    """Trailing moving average; the first window-1 entries average what is available"""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return values
+    cumulative = np.cumsum(np.insert(values, 0, 0.0))
+    upper = np.arange(1, values.size + 1)
+    lower = np.maximum(0, upper - window)
+    return (cumulative[upper] - cumulative[lower]) / (upper - lower)
+
+def resample(day_ordinals, values, granularity):
+    """Sum a daily series into weekly (Monday-based) or monthly buckets.
+
+    Returns (period_start_ordinals, totals).
+    """
+    day_ordinals = np.asarray(day_ordinals, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    if granularity == "daily" or day_ordinals.size == 0:
+        return day_ordinals, values
+
+    if granularity == "weekly":
+        # Ordinal 1 (0001-01-01) is a Monday, so (ordinal - 1) // 7 numbers the weeks
+        keys = (day_ordinals - 1) // 7
+    else:
+        epoch = date(1970, 1, 1).toordinal()
+        months = (day_ordinals - epoch).astype('datetime64[D]').astype('datetime64[M]')
+        keys = months.astype(np.int64)
+
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    totals = np.bincount(inverse, weights=values, minlength=unique_keys.size)
+    # First day of each bucket that is inside the series
+    starts = np.full(unique_keys.size, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(starts, inverse, day_ordinals)
+    return starts, totals
+
+def linear_trend(values):
+    """Least-squares fit over the series: returns (slope per step, intercept, r_squared)"""
+    values = np.asarray(values, dtype=float)
+    n = values.size
+    if n < 2:
+        return 0.0, float(values[0]) if n else 0.0, 0.0
+    x = np.arange(n, dtype=float)
+    x_mean = x.mean()
+    y_mean = values.mean()
+    x_centered = x - x_mean
+    y_centered = values - y_mean
+    slope = float(np.dot(x_centered, y_centered) / np.dot(x_centered, x_centered))
+    intercept = y_mean - slope * x_mean
+    total = float(np.dot(y_centered, y_centered))
+    residual = values - (intercept + slope * x)
+    r_squared = 1.0 - float(np.dot(residual, residual)) / total if total > 0 else 0.0
+    return slope, float(intercept), r_squared
+
+def summarize_trends(days, revenue, items, granularity="daily", max_rows=TREND_TABLE_ROWS):
+    """Compute the trend summary and a compact period table from a build_daily_series() result"""
+    ma7 = moving_average(revenue, 7)
+    ma30 = moving_average(revenue, 30)
+    slope, intercept, r_squared = linear_trend(revenue)
+    mean_revenue = float(revenue.mean()) if revenue.size else 0.0
+
+    period_starts, period_revenue = resample(days, revenue, granularity)
+    _, period_items = resample(days, items, granularity)
+
+    rows = []
+    for index in range(max(0, period_starts.size - max_rows), period_starts.size):
+        row = {
+            'period': date.fromordinal(int(period_starts[index])),
+            'revenue': float(period_revenue[index]),
+            'items': int(period_items[index])
+        }
+        if granularity == "daily":
+            row['ma7'] = float(ma7[index])
+            row['ma30'] = float(ma30[index])
+        rows.append(row)
+
+    return {
+        'days': int(days.size),
+        'total_revenue': float(revenue.sum()),
+        'total_items': int(items.sum()),
+        'average_daily_revenue': mean_revenue,
+        'ma7': float(ma7[-1]) if ma7.size else 0.0,
+        'ma30': float(ma30[-1]) if ma30.size else 0.0,
+        'growth_per_day': slope,
+        'growth_percent_per_day': (slope / mean_revenue * 100) if mean_revenue else 0.0,
+        'r_squared': r_squared,
+        'granularity': granularity,
+        'rows': rows
+    }
@@ -0,0 +1,58 @@
+from datetime import datetime, date, timedelta
+
+# Date range presets used by the reporting screens
+DATE_PRESETS = ["today", "this_week", "this_month", "last_month", "all_time", "custom"]
+
+def parse_sale_datetime(value):
+    """Parse a stored sale date (str(datetime) or ISO string) into a datetime"""
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+def get_preset_range(preset, today=None):
+    """Return the inclusive (start_date, end_date) for a preset, or (None, None) for all time"""
+    today = today or date.today()
+    if preset == "today":
+        return today, today
+    if preset == "this_week":
+        return today - timedelta(days=today.weekday()), today
+    if preset == "this_month":
+        return today.replace(day=1), today
+    if preset == "last_month":
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+        return last_month_end.replace(day=1), last_month_end
+    return None, None
+
+def sale_item_product(item):
+    """Return the product fields of a sale line item (nested product or the flat item itself)"""
+    return item.get('product') if isinstance(item.get('product'), dict) else item
+
+def iter_sale_items(sale):
+    """Yield (product_id, name, category, price, quantity) for each line item of a sale.
+
+    Checkout stores items as {'product': {...}, 'quantity': n} while imported
+    records use flat items, so both shapes are supported.
+    """
+    for item in sale.get('items', []) or []:
+        if not isinstance(item, dict):
+            continue
+        product = sale_item_product(item)
+        try:
+            price = float(product.get('price', item.get('price', 0)) or 0)
+            quantity = int(item.get('quantity', 0) or 0)
+        except (ValueError, TypeError):
+            continue
+        product_id = product.get('id', item.get('product_id'))
+        name = product.get('name', 'Unnamed Item')
+        category = product.get('category') or product.get('type') or 'Uncategorized'
+        yield product_id, name, category, price, quantity
+
+def iter_sale_lines(sale):
+    """Yield (name, category, price, quantity) for each line item of a sale"""
+    for product_id, name, category, price, quantity in iter_sale_items(sale):
+        yield name, category, price, quantity
@@ -0,0 +1,75 @@
+from collections import deque
+
+SCANNER_KEY_GAP_MS = 35  # Keys closer together than this come from a scanner, not a person
+MIN_SCAN_LENGTH = 4  # Shorter bursts are treated as typing
+BURST_END_MS = 80  # A scanner burst with no Return suffix is complete after this idle time
+
+class ScannerInput:
+    """Turns the keystrokes of a barcode entry into complete codes, handled off the key events.
+
+    Scanner bursts are recognised by inter-key timing; a burst ends at Return
+    or, for scanners without a suffix, when the keys stop. Codes typed by hand
+    are still taken on Return. Complete codes are queued in order and handed to
+    `on_codes` from a Tk idle callback as [(code, count)], so repeated scans
+    of the same code arriving together become one quantity update.
+    """
+    def __init__(self, entry, on_codes):
+        self.entry = entry
+        self.on_codes = on_codes
+        self.queue = deque()
+        self.burst = []
+        self.last_key_time = None
+        self.end_job = None
+        self.drain_job = None
+        entry.bind('<KeyPress>', self.on_key)
+        entry.bind('<Return>', self.on_return)
+
+    def on_key(self, event):
+        if not event.char or not event.char.isprintable():
+            return
+        if self.last_key_time is None or event.time - self.last_key_time > SCANNER_KEY_GAP_MS:
+            self.burst = []
+        self.last_key_time = event.time
+        self.burst.append(event.char)
+        if self.end_job is not None:
+            self.entry.after_cancel(self.end_job)
+        self.end_job = self.entry.after(BURST_END_MS, self.end_burst)
+
+    def is_scan(self):
+        return len(self.burst) >= MIN_SCAN_LENGTH
+
+    def end_burst(self):
+        """Idle timeout: queue a scanner burst that had no Return suffix"""
+        self.end_job = None
+        if self.is_scan():
+            self.take(''.join(self.burst))
+
+    def on_return(self, event=None):
+        if self.end_job is not None:
+            self.entry.after_cancel(self.end_job)
+            self.end_job = None
+        code = ''.join(self.burst) if self.is_scan() else self.entry.get()
+        self.take(code)
+        return "break"
+
+    def take(self, code):
+        """Queue a complete code and clear the entry for the next one"""
+        self.burst = []
+        self.last_key_time = None
+        self.entry.delete(0, 'end')
+        code = code.strip()
+        if not code:
+            return
+        self.queue.append(code)
+        if self.drain_job is None:
+            self.drain_job = self.entry.after_idle(self.drain)
+
+    def drain(self):
+        """Hand every queued code to on_codes, grouping repeats in first-scanned order"""
+        self.drain_job = None
+        counts = {}
+        while self.queue:
+            code = self.queue.popleft()
+            counts[code] = counts.get(code, 0) + 1
+        if counts:
+            self.on_codes(list(counts.items()))
@@ -0,0 +1,98 @@
+from constants import MONGODB_COLLECTIONS, DEFAULT_STORE
+from data_handler import load_data, find_data, insert_documents
+
+COUNT_COLLECTION = MONGODB_COLLECTIONS["stock_counts"]
+STOCKTAKE_REFERENCE = 'stocktake'  # Reference of the adjustments a stock take commits
+TOP_DISCREPANCIES = 5  # Largest shortfalls raised as notifications
+
+def record_counts(collection, store, counted, counted_at):
+    """Persist the physical counts of a stock take at one store; counted is [(item, system_quantity, counted)]"""
+    return insert_documents(COUNT_COLLECTION, [
+        {
+            'collection': collection,
+            'item_id': str(item.get('id')),
+            'store': store or DEFAULT_STORE,
+            'system': system,
+            'counted': count,
+            'date': counted_at
+        }
+        for item, system, count in counted
+    ])
+
+def latest_counts(start, end):
+    """Return {(collection, item_id, store): count} with the last count of each item and store in the period"""
+    counts = {}
+    for count in find_data('stock_counts', {'date': {'$gte': start, '$lte': end}}):
+        key = (count['collection'], count['item_id'], count.get('store') or DEFAULT_STORE)
+        if key not in counts or count['date'] > counts[key]['date']:
+            counts[key] = count
+    return counts
+
+def compute_shrinkage(counts, movements, store_levels):
+    """Compare expected stock with the physical counts in one pass over the movements.
+
+    movements are every ledger movement since the start of the period, and
+    store_levels the current {(collection, item_id, store): quantity}. Each
+    movement rewinds the current level to the opening stock, and those up to
+    the count are added as receipts, sales, transfers or adjustments.
+    Stock take adjustments are left out, since they are what the count found.
+    Returns one row per counted item and store, largest shortfall first.
+    """
+    rows = {}
+    for key, count in counts.items():
+        collection, item_id, store = key
+        rows[key] = {
+            'collection': collection, 'item_id': item_id, 'store': store,
+            'opening': store_levels.get(key, 0), 'receipts': 0, 'sales': 0, 'transfers': 0, 'adjustments': 0,
+            'counted': count.get('counted', 0), 'counted_at': count['date']
+        }
+    for entry in movements:
+        row = rows.get((entry.get('collection'), entry.get('item_id'), entry.get('store') or DEFAULT_STORE))
+        if row is None:
+            continue
+        delta = entry.get('delta', 0)
+        row['opening'] -= delta
+        if entry.get('date', '') > row['counted_at'] or str(entry.get('reference', '')).startswith(STOCKTAKE_REFERENCE):
+            continue
+        if entry.get('type') == 'sale':
+            row['sales'] -= delta
+        elif entry.get('type') == 'restock':
+            row['receipts'] += delta
+        elif entry.get('type') == 'transfer':
+            row['transfers'] += delta
+        else:
+            row['adjustments'] += delta
+    for row in rows.values():
+        row['expected'] = row['opening'] + row['receipts'] - row['sales'] + row['transfers'] + row['adjustments']
+        row['shrinkage'] = row['expected'] - row['counted']
+    return sorted(rows.values(), key=lambda row: row['shrinkage'], reverse=True)
+
+def shrinkage_report(start_date, end_date):
+    """Shrinkage per counted item and store for the counts taken between two dates, with item names"""
+    start = str(start_date)
+    counts = latest_counts(start, f"{end_date} 23:59:59.999999")
+    if not counts:
+        return []
+    item_ids = sorted({key[1] for key in counts})
+    store_levels = {
+        (row['collection'], row['item_id'], row['store']): row.get('quantity', 0)
+        for row in find_data('store_stock', {'item_id': {'$in': item_ids}})
+    }
+    movements = find_data('stock_movements', {'date': {'$gte': start}, 'item_id': {'$in': item_ids}})
+    rows = compute_shrinkage(counts, movements, store_levels)
+
+    names = {}
+    for collection in {row['collection'] for row in rows}:
+        names.update({(collection, str(item.get('id'))): item.get('name', '') for item in load_data(collection) or []})
+    for row in rows:
+        row['name'] = names.get((row['collection'], row['item_id']), row['item_id'])
+    return rows
+
+def shrinkage_totals(rows, field):
+    """Sum expected, counted and shrinkage by 'store' or by item ('name'), largest shortfall first"""
+    totals = {}
+    for row in rows:
+        total = totals.setdefault(row[field], {field: row[field], 'expected': 0, 'counted': 0, 'shrinkage': 0})
+        for measure in ('expected', 'counted', 'shrinkage'):
+            total[measure] += row[measure]
+    return sorted(totals.values(), key=lambda total: total['shrinkage'], reverse=True)
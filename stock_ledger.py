@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta
+from constants import MONGODB_COLLECTIONS
+from data_handler import load_data, save_data, find_data, insert_documents, delete_documents, aggregate_data, get_collection
+from store_stock import STORE_STOCK_COLLECTION, STOCK_COLLECTIONS, apply_movements, ensure_store_stock, item_stock, item_store, store_key
+
+LEDGER_COLLECTION = MONGODB_COLLECTIONS["stock_movements"]
+SNAPSHOT_COLLECTION = MONGODB_COLLECTIONS["stock_snapshots"]
+MOVEMENT_TYPES = ['sale', 'restock', 'adjustment', 'transfer']
+COMPACT_EVERY = 1000  # Movements since the last snapshot before compaction runs
+HISTORY_RETENTION_DAYS = 365  # Compacted movements older than this are dropped
+
+def movement(collection, item_id, movement_type, delta, reference='', store=''):
+    """Build one stock movement for an item of `collection` ('products' or 'inventory')"""
+    if movement_type not in MOVEMENT_TYPES:
+        raise ValueError(f"Unknown stock movement type: {movement_type}")
+    return {
+        'collection': collection,
+        'item_id': str(item_id),
+        'type': movement_type,
+        'delta': delta,
+        'date': str(datetime.now()),
+        'reference': reference,
+        'store': store
+    }
+
+def record_movements(movements):
+    """Append movements to the ledger and to their stores' quantities (movements with no change are skipped)"""
+    movements = [entry for entry in movements if entry['delta']]
+    if movements:
+        apply_movements(movements)
+    return insert_documents(LEDGER_COLLECTION, movements)
+
+def record_movement(collection, item_id, movement_type, delta, reference='', store=''):
+    return record_movements([movement(collection, item_id, movement_type, delta, reference, store)])
+
+def quantity_change_movement(collection, item_id, old_quantity, new_quantity, reference='', store=''):
+    """Movement for a quantity edited by hand: increases are restocks, decreases are adjustments"""
+    try:
+        delta = float(new_quantity) - float(old_quantity or 0)
+    except (ValueError, TypeError):
+        return None
+    if not delta:
+        return None
+    delta = int(delta) if delta.is_integer() else delta
+    return movement(collection, item_id, 'restock' if delta > 0 else 'adjustment', delta, reference, store)
+
+def transfer_movements(collection, item_id, from_store, to_store, quantity, reference=''):
+    """The pair of movements taking `quantity` of an item out of one store and into another"""
+    return [
+        movement(collection, item_id, 'transfer', -quantity, reference, from_store),
+        movement(collection, item_id, 'transfer', quantity, reference, to_store)
+    ]
+
+def transfer_stock(collection, item_id, from_store, to_store, quantity, reference='transfer'):
+    """Move stock of an item between stores; its total quantity is unchanged"""
+    if from_store == to_store or quantity <= 0:
+        raise ValueError("A transfer needs two different stores and a positive quantity")
+    held = item_stock(collection, [item_id]).get(str(item_id), {}).get(from_store, 0)
+    if held < quantity:
+        raise ValueError(f"Only {held:g} in stock at {from_store}")
+    return record_movements(transfer_movements(collection, item_id, from_store, to_store, quantity, reference))
+
+def relocation_movements(collection, items, new_store):
+    """Transfers moving the stock each item holds at its current location to `new_store`"""
+    held = item_stock(collection, [item.get('id') for item in items])
+    movements = []
+    for item in items:
+        old_store = item_store(item)
+        quantity = held.get(str(item.get('id')), {}).get(old_store, 0)
+        if old_store != new_store and quantity > 0:
+            movements += transfer_movements(collection, item.get('id'), old_store, new_store, quantity, 'relocation')
+    return movements
+
+def last_snapshot_time():
+    """Time of the last compaction ('' before the first one)"""
+    collection = get_collection(SNAPSHOT_COLLECTION)
+    if collection is None:
+        return ''
+    latest = collection.find_one({}, {'_id': 0, 'as_of': 1}, sort=[('as_of', -1)])
+    return latest.get('as_of', '') if latest else ''
+
+def ensure_ledger():
+    """Seed the snapshots (and store quantities) from the current quantities the first time the ledger is used"""
+    ensure_store_stock()
+    collection = get_collection(SNAPSHOT_COLLECTION)
+    if collection is not None and collection.find_one({}, {'_id': 1}) is None:
+        as_of = str(datetime.now())
+        snapshots = []
+        for data_type in STOCK_COLLECTIONS:
+            for item in load_data(data_type) or []:
+                try:
+                    quantity = float(item.get('quantity', 0) or 0)
+                except (ValueError, TypeError):
+                    continue
+                snapshots.append({'collection': data_type, 'item_id': str(item.get('id')), 'quantity': quantity, 'as_of': as_of})
+        save_data('stock_snapshots', snapshots)
+        print(f"[DEBUG] Seeded stock ledger with {len(snapshots)} opening snapshots")
+
+def seed_untracked_items(collection, items):
+    """Give items that entered without a movement (e.g. from an Excel import) store stock and a snapshot.
+
+    Items with no store stock row at all are placed at their location with their
+    current quantity. Their snapshots take the time of the existing ones, so
+    the other items' movements since that compaction still count.
+    """
+    ensure_ledger()
+    tracked = {row['item_id'] for row in find_data('store_stock', {'collection': collection}, {'item_id': 1})}
+    untracked = []
+    for item in items:
+        if str(item.get('id')) in tracked:
+            continue
+        try:
+            untracked.append((item, float(item.get('quantity', 0) or 0)))
+        except (ValueError, TypeError):
+            continue
+    if not untracked:
+        return 0
+    snapshotted = {row['item_id'] for row in find_data('stock_snapshots', {'collection': collection}, {'item_id': 1})}
+    as_of = last_snapshot_time() or str(datetime.now())
+    insert_documents(STORE_STOCK_COLLECTION, [
+        dict(store_key(collection, item.get('id'), item_store(item)), quantity=quantity) for item, quantity in untracked
+    ])
+    insert_documents(SNAPSHOT_COLLECTION, [
+        {'collection': collection, 'item_id': str(item.get('id')), 'quantity': quantity, 'as_of': as_of}
+        for item, quantity in untracked if str(item.get('id')) not in snapshotted
+    ])
+    print(f"[DEBUG] Seeded store stock for {len(untracked)} untracked {collection} items")
+    return len(untracked)
+
+def _movement_totals(match):
+    """Sum the movement deltas matching `match`, grouped by (collection, item_id)"""
+    pipeline = [
+        {'$match': match},
+        {'$group': {'_id': {'collection': '$collection', 'item_id': '$item_id'}, 'delta': {'$sum': '$delta'}, 'movements': {'$sum': 1}}}
+    ]
+    return {(row['_id']['collection'], row['_id']['item_id']): row for row in aggregate_data('stock_movements', pipeline)}
+
+def current_stock(collection, item_id):
+    """Snapshot quantity plus the movements recorded after it, read through the (collection, item_id, date) index"""
+    snapshots = get_collection(SNAPSHOT_COLLECTION)
+    snapshot = snapshots.find_one({'collection': collection, 'item_id': str(item_id)}, {'_id': 0}) if snapshots is not None else None
+    as_of = snapshot.get('as_of', '') if snapshot else ''
+    totals = _movement_totals({'collection': collection, 'item_id': str(item_id), 'date': {'$gt': as_of}})
+    delta = totals.get((collection, str(item_id)), {}).get('delta', 0)
+    return (snapshot.get('quantity', 0) if snapshot else 0) + delta
+
+def current_stock_levels(collection=None, until=None):
+    """Return {(collection, item_id): quantity} for every item from the snapshots and the movements since them.
+
+    With `until`, the current levels are rewound by the movements after it,
+    so past levels stay right when a compaction has replaced the snapshots since.
+    """
+    as_of = last_snapshot_time()
+    levels = {}
+    for snapshot in load_data('stock_snapshots') or []:
+        if collection is None or snapshot.get('collection') == collection:
+            levels[(snapshot.get('collection'), snapshot.get('item_id'))] = snapshot.get('quantity', 0)
+    match = {'date': {'$gt': as_of}}
+    if collection is not None:
+        match['collection'] = collection
+    for key, row in _movement_totals(match).items():
+        levels[key] = levels.get(key, 0) + row['delta']
+    if until is not None:
+        match['date'] = {'$gt': until}
+        for key, row in _movement_totals(match).items():
+            levels[key] = levels.get(key, 0) - row['delta']
+    return levels
+
+def item_history(collection, item_id, limit=50):
+    """Most recent movements of one item, newest first"""
+    ledger = get_collection(LEDGER_COLLECTION)
+    if ledger is None:
+        return []
+    cursor = ledger.find({'collection': collection, 'item_id': str(item_id)}, {'_id': 0}).sort('date', -1).limit(limit)
+    return list(cursor)
+
+def compact_ledger():
+    """Fold the movements since the last snapshot into new snapshots and drop old compacted movements"""
+    as_of = str(datetime.now())
+    levels = current_stock_levels(until=as_of)
+    snapshots = [
+        {'collection': collection, 'item_id': item_id, 'quantity': quantity, 'as_of': as_of}
+        for (collection, item_id), quantity in levels.items()
+    ]
+    save_data('stock_snapshots', snapshots)
+    cutoff = str(datetime.now() - timedelta(days=HISTORY_RETENTION_DAYS))
+    deleted = delete_documents(LEDGER_COLLECTION, {'date': {'$lt': cutoff}})
+    print(f"[DEBUG] Compacted stock ledger into {len(snapshots)} snapshots, dropped {deleted} old movements")
+
+def compact_if_needed():
+    """Compact once COMPACT_EVERY movements have accumulated since the last snapshot"""
+    ledger = get_collection(LEDGER_COLLECTION)
+    if ledger is not None and ledger.count_documents({'date': {'$gt': last_snapshot_time()}}, limit=COMPACT_EVERY) >= COMPACT_EVERY:
+        compact_ledger()
+
+def reconcile(collection):
+    """Return [(item, ledger_quantity)] for items whose quantity field disagrees with the ledger"""
+    levels = current_stock_levels(collection)
+    mismatches = []
+    for item in load_data(collection) or []:
+        ledger_quantity = levels.get((collection, str(item.get('id'))), 0)
+        try:
+            if float(item.get('quantity', 0) or 0) != float(ledger_quantity):
+                mismatches.append((item, ledger_quantity))
+        except (ValueError, TypeError):
+            mismatches.append((item, ledger_quantity))
+    return mismatches
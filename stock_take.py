@@ -0,0 +1,101 @@
+from datetime import datetime
+from constants import DEFAULT_STORE
+from data_handler import bulk_update_documents, export_to_excel
+from stock_ledger import ensure_ledger, movement, record_movements, seed_untracked_items
+from store_stock import item_stock, item_store
+from low_stock import low_stock_tracker
+from shrinkage import record_counts
+
+def barcode_index(collection, items, products=()):
+    """Map each barcode to the item of `collection` it counts.
+
+    Products carry their own barcode; inventory items use their own barcode if
+    they have one, else the barcode of their product (by product_id, then name).
+    """
+    if collection == 'products':
+        return {str(item.get('barcode', '')).strip(): item for item in items if str(item.get('barcode', '')).strip()}
+    by_id = {str(product.get('id')): product for product in products}
+    by_name = {product.get('name'): product for product in products}
+    index = {}
+    for item in items:
+        product = by_id.get(str(item.get('product_id'))) or by_name.get(item.get('name')) or {}
+        barcode = str(item.get('barcode') or product.get('barcode', '')).strip()
+        if barcode:
+            index[barcode] = item
+    return index
+
+class StockTake:
+    """A physical count of one store built up from scans in memory and committed as one batch of adjustments.
+
+    Counts are compared with the item's stock at that store, not its
+    cross-store total, and the differences are added to the total quantity.
+    """
+    def __init__(self, collection, items, products=(), store=DEFAULT_STORE):
+        self.collection = collection
+        self.store = store or DEFAULT_STORE
+        self.index = barcode_index(collection, items, products)
+        ensure_ledger() # Seeds the store quantities on first use, or every item would read as 0
+        stock = item_stock(collection, [item.get('id') for item in self.index.values()])
+        untracked = [item for item in self.index.values() if str(item.get('id')) not in stock]
+        if untracked:
+            seed_untracked_items(collection, untracked) # So the adjustments land on their store's full quantity
+        self.levels = {}
+        for item in self.index.values():
+            item_id = str(item.get('id'))
+            if item_id in stock:
+                self.levels[item_id] = stock[item_id].get(self.store, 0)
+            elif item_store(item) == self.store: # No store stock yet: all of it is at its location
+                self.levels[item_id] = item.get('quantity', 0)
+        self.counts = {}  # item id -> [item, counted]
+        self.unknown = {}  # barcode -> scans
+
+    def system_quantity(self, item):
+        """Quantity the system holds for an item at the counted store"""
+        try:
+            return float(self.levels.get(str(item.get('id')), 0) or 0)
+        except (ValueError, TypeError):
+            return 0.0
+
+    def scan(self, barcode, quantity=1):
+        """Count a scan; returns (item, counted), or None for an unknown barcode"""
+        barcode = str(barcode).strip()
+        item = self.index.get(barcode)
+        if item is None:
+            self.unknown[barcode] = self.unknown.get(barcode, 0) + quantity
+            return None
+        entry = self.counts.setdefault(item.get('id'), [item, 0])
+        entry[1] += quantity
+        return item, entry[1]
+
+    def differences(self):
+        """Return (item, system_quantity, counted, delta) for every counted item"""
+        rows = []
+        for item, counted in self.counts.values():
+            system = self.system_quantity(item)
+            delta = counted - system
+            rows.append((item, system, counted, int(delta) if float(delta).is_integer() else delta))
+        return rows
+
+    def commit(self, reference='stocktake'):
+        """Add the differences to the item quantities in one bulk write and record them in the ledger at the store"""
+        rows = self.differences()
+        changed = [row for row in rows if row[3]]
+        record_counts(self.collection, self.store, [row[:3] for row in rows], str(datetime.now())) # Every count, for shrinkage reports
+        if changed:
+            ensure_ledger()
+            bulk_update_documents(self.collection, [
+                ({'id': item.get('id')}, {'$inc': {'quantity': delta}}) for item, system, counted, delta in changed
+            ])
+            record_movements([
+                movement(self.collection, item.get('id'), 'adjustment', delta, reference, self.store)
+                for item, system, counted, delta in changed
+            ])
+            for item, system, counted, delta in changed:
+                item['quantity'] = float(item.get('quantity', 0) or 0) + delta
+                self.levels[str(item.get('id'))] = counted
+            low_stock_tracker.update_items(self.collection, [row[0] for row in changed])
+            export_to_excel(self.collection) # Keep the Excel copy in step so a refresh does not undo the count
+        self.counts.clear()
+        self.unknown.clear()
+        print(f"[DEBUG] Stock take committed {len(changed)} adjustments to {self.collection} at {self.store}")
+        return len(changed)
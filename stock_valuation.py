@@ -0,0 +1,178 @@
+import numpy as np
+from datetime import date
+from data_handler import load_data, aggregate_data
+from stock_ledger import current_stock_levels
+
+ISSUE_TYPES = ['sale', 'adjustment']  # Stock leaving at cost; transfers net to zero per item
+DAY_SPAN = 1 << 20  # Larger than any day number, so sku * DAY_SPAN + day sorts by (sku, day)
+
+def day_number(value):
+    """Days since 1970-01-01 of a 'YYYY-MM-DD...' date, or None"""
+    try:
+        return int(np.datetime64(str(value)[:10], 'D').astype(np.int64))
+    except ValueError:
+        return None
+
+def value_layers(on_hand, receipt_sku, receipt_day, receipt_quantity, receipt_cost, issue_sku, issue_day, issue_quantity):
+    """Value every SKU's stock by FIFO and by moving average in one batch.
+
+    SKUs are row numbers into on_hand. Receipts and issues are parallel
+    arrays (issue quantities positive). FIFO values the units on hand at the
+    newest receipts, and units beyond every receipt at the oldest cost.
+    Moving average re-averages at each receipt over the stock left after the
+    issues since the previous one; the loop runs over receipt rank, with all
+    SKUs updated together. Returns (fifo_value, average_cost, costed).
+    """
+    on_hand = np.maximum(np.asarray(on_hand, dtype=float), 0.0)
+    sku_count = len(on_hand)
+    receipt_sku = np.asarray(receipt_sku, dtype=np.int64)
+    issue_sku = np.asarray(issue_sku, dtype=np.int64)
+    if not len(receipt_sku):
+        return np.zeros(sku_count), np.zeros(sku_count), np.zeros(sku_count, dtype=bool)
+
+    receipt_key = receipt_sku * DAY_SPAN + np.asarray(receipt_day, dtype=np.int64)
+    order = np.argsort(receipt_key, kind='stable')
+    receipt_key = receipt_key[order]
+    receipt_sku = receipt_sku[order]
+    receipt_quantity = np.asarray(receipt_quantity, dtype=float)[order]
+    receipt_cost = np.asarray(receipt_cost, dtype=float)[order]
+
+    counts = np.bincount(receipt_sku, minlength=sku_count)
+    first = np.searchsorted(receipt_sku, np.arange(sku_count), side='left')
+    costed = counts > 0
+    rank = np.arange(len(receipt_sku)) - first[receipt_sku]
+
+    # FIFO: units on hand come from the newest receipts
+    cumulative = np.cumsum(receipt_quantity)
+    before_group = cumulative[first[receipt_sku]] - receipt_quantity[first[receipt_sku]]
+    received = np.bincount(receipt_sku, weights=receipt_quantity, minlength=sku_count)
+    newer = received[receipt_sku] - (cumulative - before_group)
+    units = np.clip(on_hand[receipt_sku] - newer, 0.0, receipt_quantity)
+    fifo_value = np.bincount(receipt_sku, weights=units * receipt_cost, minlength=sku_count)
+    oldest_cost = np.where(costed, receipt_cost[np.minimum(first, len(receipt_cost) - 1)], 0.0)
+    fifo_value += np.maximum(on_hand - received, 0.0) * oldest_cost
+
+    # Moving average: issues grouped by the receipt they follow
+    layers = int(counts.max())
+    quantity_matrix = np.zeros((sku_count, layers))
+    cost_matrix = np.zeros((sku_count, layers))
+    quantity_matrix[receipt_sku, rank] = receipt_quantity
+    cost_matrix[receipt_sku, rank] = receipt_cost
+    issues = np.zeros((sku_count, layers + 1))
+    if len(issue_sku):
+        issue_key = issue_sku * DAY_SPAN + np.asarray(issue_day, dtype=np.int64)
+        segment = np.searchsorted(receipt_key, issue_key, side='right') - first[issue_sku]
+        np.add.at(issues, (issue_sku, segment), np.asarray(issue_quantity, dtype=float))
+
+    stock = np.zeros(sku_count)
+    average_cost = np.zeros(sku_count)
+    for layer in range(layers):
+        stock = np.maximum(stock - issues[:, layer], 0.0)
+        quantity = quantity_matrix[:, layer]
+        total = stock + quantity
+        average_cost = np.divide(
+            stock * average_cost + quantity * cost_matrix[:, layer], total,
+            out=average_cost, where=(quantity > 0) & (total > 0)
+        )
+        stock = total
+    return fifo_value, average_cost, costed
+
+def load_issues(collection, until):
+    """Return {(item_id, day): quantity} of the stock issued per item and day, summed by MongoDB"""
+    pipeline = [
+        {'$match': {'collection': collection, 'type': {'$in': ISSUE_TYPES}, 'delta': {'$lt': 0}, 'date': {'$lte': until}}},
+        {'$group': {'_id': {'item_id': '$item_id', 'day': {'$substr': ['$date', 0, 10]}}, 'quantity': {'$sum': '$delta'}}}
+    ]
+    return {(row['_id']['item_id'], row['_id']['day']): -row['quantity'] for row in aggregate_data('stock_movements', pipeline)}
+
+def value_stock(collection='inventory', as_of=None):
+    """Value the stock of `collection` at cost as of a date.
+
+    Receipts are supplier bills, matched to items by product id (inventory
+    items through their product_id or name). Items of the same product, e.g.
+    at different locations, are valued together as one SKU and share its FIFO
+    value by their quantity on hand. Returns one row per item with quantity,
+    fifo_value, average_cost, average_value and costed.
+    """
+    as_of = as_of or date.today()
+    until = f"{as_of} 23:59:59.999999"
+    items = load_data(collection) or []
+    if collection == 'products':
+        sku_keys = [str(item.get('id')) for item in items]
+    else:
+        products = load_data('products') or []
+        product_ids = {str(product.get('id')) for product in products}
+        product_by_name = {product.get('name'): str(product.get('id')) for product in products}
+        sku_keys = [
+            str(item.get('product_id')) if str(item.get('product_id')) in product_ids else product_by_name.get(item.get('name'))
+            for item in items
+        ]
+
+    if as_of >= date.today():
+        quantities = [item.get('quantity', 0) for item in items]
+    else:
+        levels = current_stock_levels(collection, until)
+        quantities = [levels.get((collection, str(item.get('id'))), 0) for item in items]
+    on_hand = np.zeros(len(items))
+    for row, quantity in enumerate(quantities):
+        try:
+            on_hand[row] = float(quantity or 0)
+        except (ValueError, TypeError):
+            pass
+
+    # One SKU per product; items matched to no product get a SKU of their own
+    sku_by_product = {}
+    item_sku = np.zeros(len(items), dtype=np.int64)
+    for row, key in enumerate(sku_keys):
+        item_sku[row] = sku_by_product.setdefault(key if key is not None else ('item', row), len(sku_by_product))
+    held = np.maximum(on_hand, 0.0)
+    sku_on_hand = np.bincount(item_sku, weights=held, minlength=len(sku_by_product))
+
+    receipt_sku, receipt_day, receipt_quantity, receipt_cost = [], [], [], []
+    for bill in load_data('bills') or []:
+        sku = sku_by_product.get(str(bill.get('product_id')))
+        day = day_number(bill.get('date', ''))
+        try:
+            quantity = float(bill.get('quantity') or 0)
+            amount = float(bill.get('amount') or 0)
+        except (ValueError, TypeError):
+            continue
+        if sku is None or day is None or quantity <= 0 or str(bill.get('date', ''))[:10] > str(as_of):
+            continue
+        receipt_sku.append(sku)
+        receipt_day.append(day)
+        receipt_quantity.append(quantity)
+        receipt_cost.append(amount / quantity)
+
+    row_by_item = {str(item.get('id')): row for row, item in enumerate(items)}
+    issue_sku, issue_day, issue_quantity = [], [], []
+    for (item_id, day_text), quantity in load_issues(collection, until).items():
+        row = row_by_item.get(item_id)
+        day = day_number(day_text)
+        if row is not None and day is not None:
+            issue_sku.append(item_sku[row])
+            issue_day.append(day)
+            issue_quantity.append(quantity)
+
+    sku_fifo_value, sku_average_cost, sku_costed = value_layers(
+        sku_on_hand, receipt_sku, receipt_day, receipt_quantity, receipt_cost,
+        issue_sku, issue_day, issue_quantity
+    )
+    share = np.divide(held, sku_on_hand[item_sku], out=np.zeros(len(items)), where=sku_on_hand[item_sku] > 0)
+    fifo_value = sku_fifo_value[item_sku] * share
+    average_cost = sku_average_cost[item_sku]
+    costed = sku_costed[item_sku]
+    print(f"[DEBUG] Valued {len(items)} {collection} items from {len(receipt_sku)} receipts and {len(issue_sku)} issue days")
+    return [
+        {
+            'item_id': item.get('id'),
+            'name': item.get('name', ''),
+            'category': item.get('category', item.get('type', '')),
+            'quantity': float(on_hand[row]),
+            'fifo_value': round(float(fifo_value[row]), 2),
+            'average_cost': round(float(average_cost[row]), 4),
+            'average_value': round(float(on_hand[row] * average_cost[row]), 2),
+            'costed': bool(costed[row])
+        }
+        for row, item in enumerate(items)
+    ]
@@ -0,0 +1,93 @@
+import os
+import json
+from constants import EXCEL_DATA_PATH, EXCEL_FILES, DEFAULT_STORE
+from data_handler import load_data, save_data, update_documents, export_to_excel, get_data_version
+
+LEGACY_STORES_FILE = os.path.join(EXCEL_DATA_PATH, "stores.json")  # Read once to migrate older installs
+# Every (collection, field) that records a store by name; a rename rewrites them all
+STORE_NAME_FIELDS = [
+    ('inventory', 'location'),
+    ('products', 'location'),
+    ('store_stock', 'store'),
+    ('stock_movements', 'store'),
+    ('stock_counts', 'store'),
+    ('sales', 'store'),
+    ('sales_cube', 'store'),
+    ('sales_hourly_rollups', 'store')
+]
+
+class StoreRegistry:
+    """Stores kept in MongoDB and cached in memory until the stores collection changes.
+
+    Store ids are never reused: deleting a store only marks it inactive, so
+    anything that recorded a store id still resolves to its name.
+    """
+    def __init__(self):
+        self.stores = None
+        self.version = None
+
+    def _ensure_loaded(self):
+        if self.stores is None or self.version != get_data_version('stores'):
+            stores = load_data('stores') or []
+            if not stores and os.path.exists(LEGACY_STORES_FILE):
+                with open(LEGACY_STORES_FILE, 'r', encoding='utf-8') as f:
+                    stores = [dict(store, active=True) for store in json.load(f)]
+                save_data('stores', stores)
+                print(f"[DEBUG] Migrated {len(stores)} stores from {LEGACY_STORES_FILE}")
+            self.stores = sorted(stores, key=lambda store: store.get('id', 0))
+            self.version = get_data_version('stores')
+
+    def _save(self):
+        save_data('stores', [dict(store) for store in self.stores])
+        self.version = get_data_version('stores')
+
+    def active_stores(self):
+        """Return the active stores as {'id', 'name'} documents"""
+        self._ensure_loaded()
+        return [store for store in self.stores if store.get('active', True)]
+
+    def names(self, include_default=True):
+        """Names of the active stores, led by the default shop for location menus"""
+        names = [store['name'] for store in self.active_stores()]
+        return [DEFAULT_STORE] + names if include_default else names
+
+    def get(self, store_id):
+        """Return a store by id (including inactive ones), or None"""
+        self._ensure_loaded()
+        return next((store for store in self.stores if store.get('id') == store_id), None)
+
+    def add(self, name):
+        """Add a store and return it; names must be unique among active stores"""
+        name = name.strip()
+        if not name or name == DEFAULT_STORE or name in self.names(include_default=False):
+            return None
+        store = {'id': max([store.get('id', 0) for store in self.stores], default=0) + 1, 'name': name, 'active': True}
+        self.stores.append(store)
+        self._save()
+        return store
+
+    def rename(self, store_id, name):
+        """Rename a store and every item, stock, sale and rollup that refers to it by name"""
+        store = self.get(store_id)
+        name = name.strip()
+        if store is None or not name or name == DEFAULT_STORE or name in self.names(include_default=False):
+            return False
+        old_name = store['name']
+        store['name'] = name
+        self._save()
+        for collection, field in STORE_NAME_FIELDS:
+            if update_documents(collection, {field: old_name}, {'$set': {field: name}}) and collection in EXCEL_FILES:
+                export_to_excel(collection)
+        return True
+
+    def delete(self, store_id):
+        """Deactivate a store; its id stays reserved"""
+        store = self.get(store_id)
+        if store is None:
+            return False
+        store['active'] = False
+        self._save()
+        return True
+
+# Shared by every screen of the running app
+store_registry = StoreRegistry()
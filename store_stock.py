@@ -0,0 +1,72 @@
+from constants import MONGODB_COLLECTIONS, DEFAULT_STORE
+from data_handler import load_data, save_data, find_data, increment_documents, delete_documents, aggregate_data, get_collection
+
+STORE_STOCK_COLLECTION = MONGODB_COLLECTIONS["store_stock"]
+STOCK_COLLECTIONS = ['products', 'inventory']  # Collections whose items carry a quantity
+
+def item_store(item):
+    """Store an item's stock is kept at when no other store is given"""
+    return item.get('location') or DEFAULT_STORE
+
+def store_key(collection, item_id, store):
+    return {'collection': collection, 'item_id': str(item_id), 'store': store or DEFAULT_STORE}
+
+def apply_movements(movements):
+    """Add stock movements to the quantities of their stores in one bulk write"""
+    return increment_documents(STORE_STOCK_COLLECTION, [
+        (store_key(entry['collection'], entry['item_id'], entry.get('store')), {'quantity': entry['delta']}, None)
+        for entry in movements
+    ])
+
+def rebuild_store_stock():
+    """Place every item's current quantity at its location"""
+    rows = []
+    for data_type in STOCK_COLLECTIONS:
+        for item in load_data(data_type) or []:
+            try:
+                quantity = float(item.get('quantity', 0) or 0)
+            except (ValueError, TypeError):
+                continue
+            rows.append(dict(store_key(data_type, item.get('id'), item_store(item)), quantity=quantity))
+    save_data('store_stock', rows)
+    print(f"[DEBUG] Rebuilt {len(rows)} store stock entries")
+
+def ensure_store_stock():
+    """Seed the per-store quantities the first time they are needed"""
+    collection = get_collection(STORE_STOCK_COLLECTION)
+    if collection is not None and collection.find_one({}, {'_id': 1}) is None:
+        rebuild_store_stock()
+
+def remove_items(collection, item_ids):
+    """Drop the per-store quantities of deleted items"""
+    return delete_documents(STORE_STOCK_COLLECTION, {'collection': collection, 'item_id': {'$in': [str(item_id) for item_id in item_ids]}})
+
+def item_stock(collection, item_ids):
+    """Return {item_id: {store: quantity}} for the given items"""
+    stock = {}
+    for row in find_data('store_stock', {'collection': collection, 'item_id': {'$in': [str(item_id) for item_id in item_ids]}}):
+        stock.setdefault(row['item_id'], {})[row['store']] = row.get('quantity', 0)
+    return stock
+
+def stock_matrix(collection):
+    """Return (stores, rows) for the item x store matrix of a collection, with cross-store totals.
+
+    One aggregation over the (collection, item_id, store) index groups every
+    item's store quantities; rows are {'item_id', 'total', 'stores': {store: quantity}}.
+    """
+    pipeline = [
+        {'$match': {'collection': collection}},
+        {'$group': {
+            '_id': '$item_id',
+            'total': {'$sum': '$quantity'},
+            'stores': {'$push': {'store': '$store', 'quantity': '$quantity'}}
+        }},
+        {'$sort': {'_id': 1}}
+    ]
+    stores = set()
+    rows = []
+    for row in aggregate_data('store_stock', pipeline):
+        by_store = {entry['store']: entry['quantity'] for entry in row['stores']}
+        stores.update(by_store)
+        rows.append({'item_id': row['_id'], 'total': row['total'], 'stores': by_store})
+    return sorted(stores), rows